@@ -0,0 +1,208 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from decouple import config
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from app_gen.models import ContentGenerationLog, UsageRollup
+
+@dataclass(slots=True, frozen=True)
+class UsageQuery:
+    start: date
+    end: date                       # inclusive
+    granularity: str
+    group_by: tuple[str, ...]       # subset of "user", "model" and "bucket"
+    user_id: int | None = None
+    model: str | None = None
+
+class GENAnalytics:
+    """
+    Maintains and queries the `UsageRollup` tables behind the usage analytics endpoint.
+
+    Every batch of `ContentGenerationLog` rows adds its counts to the hourly and daily rollups of
+    each (user, model) in the same transaction, so reports never touch the log table. Days follow
+    `TIME_ZONE`. Rollups for existing logs are built with the `backfill_usage_rollups` command, and
+    hourly rollups older than `GEN_ROLLUP_HOURLY_RETENTION_DAYS` can be pruned with
+    `compact_usage_rollups`, leaving the daily ones.
+    """
+    #: Days of hourly rollups kept by `compact`.
+    _hourly_retention_days: int = config("GEN_ROLLUP_HOURLY_RETENTION_DAYS", default=90, cast=int)
+    #: Counters kept by each rollup row.
+    _METRICS: tuple[str, ...] = ("requests", "cache_hits", "prompt_tokens", "completion_tokens", "cached_tokens")
+    #: Rollup column behind each `group_by` option.
+    _GROUP_FIELDS: dict[str, str] = {"user": "user_id", "model": "model_used", "bucket": "bucket"}
+
+    @classmethod
+    def record(cls, records: list[dict]) -> None:
+        """
+        Adds newly inserted log rows to the rollups; must run in the transaction inserting them.
+
+        Args:
+            records (list[dict]): Keyword arguments of the `ContentGenerationLog` rows.
+        """
+        totals: dict[tuple, Counter] = defaultdict(Counter)
+        for record in records:
+            for granularity, bucket in cls._buckets(record["created_at"]).items():
+                counter = totals[(granularity, bucket, record["created_by_id"], record["model_used"])]
+                counter["requests"] += 1
+                counter["cache_hits"] += int(record["cache_hit"])
+                counter["prompt_tokens"] += record["prompt_tokens"]
+                counter["completion_tokens"] += record["completion_tokens"]
+                counter["cached_tokens"] += record.get("cached_tokens", 0)  # absent from older spills
+
+        # A stable order keeps concurrent writers from deadlocking on each other's rows.
+        for (granularity, bucket, user_id, model_used), counter in sorted(totals.items()):
+            lookup = {"granularity": granularity, "bucket": bucket, "user_id": user_id, "model_used": model_used}
+            increments = {metric: F(metric) + counter[metric] for metric in cls._METRICS}
+            if UsageRollup.objects.filter(**lookup).update(**increments):
+                continue
+            try:
+                with transaction.atomic():
+                    UsageRollup.objects.create(**lookup, **{metric: counter[metric] for metric in cls._METRICS})
+            except IntegrityError:
+                # Created concurrently by another writer.
+                UsageRollup.objects.filter(**lookup).update(**increments)
+
+    @classmethod
+    def rebuild(cls, start: date | None = None, end: date | None = None) -> int:
+        """
+        Recomputes the rollups of a range of days from `ContentGenerationLog`.
+
+        The range is limited to the days the logs still cover, so the rollups of archived months,
+        whose logs are gone, are never deleted.
+
+        Args:
+            start (date | None): First day to rebuild; defaults to the oldest log.
+            end (date | None): Last day to rebuild (inclusive); defaults to the newest log.
+
+        Returns:
+            int: Number of rollup rows written.
+        """
+        covered = ContentGenerationLog.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+        if covered["first"] is None:
+            return 0
+        first, last = timezone.localdate(covered["first"]), timezone.localdate(covered["last"])
+        start = first if start is None else max(start, first)
+        end = last if end is None else min(end, last)
+        if start > end:
+            return 0
+
+        since, until = cls._day_start(start), cls._day_start(end + timedelta(days=1))
+        logs = ContentGenerationLog.objects.filter(created_at__gte=since, created_at__lt=until)
+        rollups = UsageRollup.objects.filter(bucket__gte=since, bucket__lt=until)
+
+        written = 0
+        with transaction.atomic():
+            rollups.delete()
+            for granularity in UsageRollup.Granularity.values:
+                rows = (
+                    logs.annotate(bucket=Trunc("created_at", granularity))
+                    .values("bucket", "created_by", "model_used")
+                    .annotate(
+                        total_requests=Count("id"),
+                        total_cache_hits=Count("id", filter=Q(cache_hit=True)),
+                        total_prompt_tokens=Sum("prompt_tokens"),
+                        total_completion_tokens=Sum("completion_tokens"),
+                        total_cached_tokens=Sum("cached_tokens"),
+                    )
+                    .order_by()
+                )
+                created = UsageRollup.objects.bulk_create(
+                    [
+                        UsageRollup(
+                            granularity=granularity,
+                            bucket=row["bucket"],
+                            user_id=row["created_by"],
+                            model_used=row["model_used"],
+                            **{metric: row[f"total_{metric}"] for metric in cls._METRICS},
+                        )
+                        for row in rows.iterator()
+                    ],
+                    batch_size=1000,
+                )
+                written += len(created)
+        return written
+
+    @classmethod
+    def compact(cls, retention_days: int | None = None) -> int:
+        """
+        Deletes hourly rollups older than the retention period; daily rollups are kept.
+
+        Args:
+            retention_days (int | None): Days of hourly rollups to keep; defaults to
+                                         `GEN_ROLLUP_HOURLY_RETENTION_DAYS`.
+
+        Returns:
+            int: Number of hourly rollups deleted.
+        """
+        days = cls._hourly_retention_days if retention_days is None else retention_days
+        cutoff = cls._day_start(timezone.localdate() - timedelta(days=days))
+        deleted, _ = UsageRollup.objects.filter(granularity=UsageRollup.Granularity.HOUR, bucket__lt=cutoff).delete()
+        return deleted
+
+    @classmethod
+    def summary(cls, query: UsageQuery) -> list[dict]:
+        """
+        Aggregates usage over a range of days, grouped as requested.
+
+        Args:
+            query (UsageQuery): Range, granularity, filters and grouping.
+
+        Returns:
+            list[dict]: One row per group, with request, cache hit and token totals (including the
+                        prompt tokens served from the provider's prompt cache).
+        """
+        rollups = UsageRollup.objects.filter(
+            granularity=query.granularity,
+            bucket__gte=cls._day_start(query.start),
+            bucket__lt=cls._day_start(query.end + timedelta(days=1)),
+        )
+        if query.user_id is not None:
+            rollups = rollups.filter(user_id=query.user_id)
+        if query.model:
+            rollups = rollups.filter(model_used=query.model)
+
+        sums = {f"total_{metric}": Sum(metric) for metric in cls._METRICS}
+        columns = [cls._GROUP_FIELDS[group] for group in query.group_by]
+        if columns:
+            rows = list(rollups.values(*columns).annotate(**sums).order_by(*columns))
+        else:
+            rows = [rollups.aggregate(**sums)]
+
+        results: list[dict] = []
+        for row in rows:
+            result: dict = {}
+            if "user" in query.group_by:
+                result["user_id"] = row["user_id"]
+            if "model" in query.group_by:
+                result["model"] = row["model_used"]
+            if "bucket" in query.group_by:
+                result["bucket"] = timezone.localtime(row["bucket"]).isoformat()
+            for metric in cls._METRICS:
+                result[metric] = row[f"total_{metric}"] or 0
+            result["total_tokens"] = result["prompt_tokens"] + result["completion_tokens"]
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _buckets(created_at: datetime) -> dict[str, datetime]:
+        """
+        Returns the hour and local day a log row belongs to.
+        """
+        local = timezone.localtime(created_at)
+        return {
+            UsageRollup.Granularity.HOUR: local.replace(minute=0, second=0, microsecond=0),
+            UsageRollup.Granularity.DAY: local.replace(hour=0, minute=0, second=0, microsecond=0),
+        }
+
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        """
+        Returns the start of a local day.
+        """
+        return timezone.make_aware(datetime.combine(day, time.min))
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class AppGenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_gen'
+
+    def ready(self) -> None:
+        pre_migrate.connect(self._check_log_migrations, sender=self)
+
+    @staticmethod
+    def _check_log_migrations(plan: list, **kwargs) -> None:
+        """
+        Stops `migrate` before it alters the partitioned log table as if it were plain.
+        """
+        # Imported here: the models are not loaded when this module is.
+        from app_gen.partitions import GENLogPartitions
+
+        GENLogPartitions.check_migrations(plan)
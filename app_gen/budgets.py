@@ -0,0 +1,169 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from asgiref.sync import sync_to_async
+from decouple import config
+
+from django.utils import timezone
+
+from app_gen.content import GENContentStore
+from app_gen.models import ContentGenerationLog
+from app_gen.prompts import GENPrompts
+
+if TYPE_CHECKING:
+    from app_gen.services import GENData
+
+class GENTokenBudget:
+    """
+    Output-length budgets (`max_tokens`) learned from the completion lengths of past generations.
+
+    Completion lengths depend mostly on what is asked for, so the recent history of
+    `ContentGenerationLog` is grouped by prompt template (version included) and exact return
+    format, and each group's budget is the `GEN_TOKEN_BUDGET_PERCENTILE` of its completion tokens,
+    per candidate, times `GEN_TOKEN_BUDGET_MARGIN`. Groups with too few generations fall back to
+    their template's budget, and templates with too few to no budget at all.
+
+    Each process keeps the budgets in memory and recomputes them from the newest
+    `GEN_TOKEN_BUDGET_SAMPLE` logs at most every `GEN_TOKEN_BUDGET_REFRESH` seconds. A response
+    cut by the budget is continued by `GENServices`, so the budget bounds the latency of runaway
+    completions without truncating answers.
+    """
+    #: Whether budgets are applied at all.
+    _enabled: bool = config("GEN_TOKEN_BUDGET", default=False, cast=bool)
+    #: Percentile of past completion lengths used as budget.
+    _percentile: float = config("GEN_TOKEN_BUDGET_PERCENTILE", default=95.0, cast=float)
+    #: Headroom multiplied into the percentile.
+    _margin: float = config("GEN_TOKEN_BUDGET_MARGIN", default=1.2, cast=float)
+    #: Smallest budget ever set.
+    _min_tokens: int = config("GEN_TOKEN_BUDGET_MIN", default=256, cast=int)
+    #: Generations needed before a group gets its own budget.
+    _min_samples: int = config("GEN_TOKEN_BUDGET_MIN_SAMPLES", default=30, cast=int)
+    #: Days of history considered.
+    _days: int = config("GEN_TOKEN_BUDGET_DAYS", default=14, cast=int)
+    #: Newest logs read on each refresh.
+    _sample: int = config("GEN_TOKEN_BUDGET_SAMPLE", default=20000, cast=int)
+    #: Seconds between refreshes.
+    _refresh_seconds: float = config("GEN_TOKEN_BUDGET_REFRESH", default=600.0, cast=float)
+    #: Continuations requested for a response cut by its budget before giving up.
+    max_continuations: int = config("GEN_TOKEN_BUDGET_MAX_CONTINUATIONS", default=2, cast=int)
+
+    _lock = threading.Lock()
+    _budgets: dict[tuple[str, str | None], int] = {}
+    _next_refresh: float = 0.0
+    _refreshing: bool = False
+    _stats: dict[str, int] = {"applied": 0, "continued": 0, "truncated": 0}
+
+    @classmethod
+    def get(cls, data: "GENData") -> int | None:
+        """
+        Returns the output budget of a request.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+
+        Returns:
+            int | None: `max_tokens` to send, or `None` to leave the length unbounded.
+        """
+        if not cls._enabled:
+            return None
+        if cls._refresh_due():
+            cls._refresh()
+        return cls._lookup(data)
+
+    @classmethod
+    async def aget(cls, data: "GENData") -> int | None:
+        """
+        Asynchronous counterpart of `get`.
+        """
+        if not cls._enabled:
+            return None
+        if cls._refresh_due():
+            await sync_to_async(cls._refresh)()
+        return cls._lookup(data)
+
+    @classmethod
+    def record(cls, continuations: int, truncated: bool) -> None:
+        """
+        Counts a budgeted generation, for `stats`.
+
+        Args:
+            continuations (int): Continuations it needed.
+            truncated (bool): Whether it was still cut after the last continuation.
+        """
+        with cls._lock:
+            cls._stats["applied"] += 1
+            cls._stats["continued"] += continuations > 0
+            cls._stats["truncated"] += truncated
+
+    @classmethod
+    def stats(cls) -> dict[str, bool | int]:
+        """
+        Reports this process's budgets, for operators.
+
+        Returns:
+            dict[str, bool | int]: Whether budgets are enabled, how many groups have one, and how
+                                   many budgeted generations were continued or left truncated.
+        """
+        with cls._lock:
+            return {"enabled": cls._enabled, "budgets": len(cls._budgets), **cls._stats}
+
+    @classmethod
+    def _lookup(cls, data: "GENData") -> int | None:
+        """
+        Reads the budget of a request's group, or of its template.
+        """
+        label = GENPrompts.get(data.document_type).label
+        budgets = cls._budgets
+        return budgets.get((label, GENContentStore.digest(data.return_format)), budgets.get((label, None)))
+
+    @classmethod
+    def _refresh_due(cls) -> bool:
+        """
+        Tells whether the budgets should be recomputed, letting a single caller do it.
+        """
+        with cls._lock:
+            if cls._refreshing or time.monotonic() < cls._next_refresh:
+                return False
+            cls._refreshing = True
+            return True
+
+    @classmethod
+    def _refresh(cls) -> None:
+        """
+        Recomputes every budget from the newest logs that called the provider.
+        """
+        try:
+            since = timezone.now() - timedelta(days=cls._days)
+            rows = (
+                ContentGenerationLog.objects
+                .filter(created_at__gte=since, cache_hit=False, coalesced=False, completion_tokens__gt=0)
+                .order_by("-created_at")
+                .values_list("prompt_template", "return_format_blob_id", "completion_tokens", "candidates")[:cls._sample]
+            )
+            lengths: dict[tuple[str, str | None], list[int]] = defaultdict(list)
+            for label, return_format, completion_tokens, candidates in rows:
+                per_candidate = math.ceil(completion_tokens / max(1, candidates))
+                lengths[(label, None)].append(per_candidate)
+                if return_format is not None:
+                    lengths[(label, return_format)].append(per_candidate)
+
+            budgets = {key: cls._budget(values) for key, values in lengths.items() if len(values) >= cls._min_samples}
+            with cls._lock:
+                cls._budgets = budgets
+        finally:
+            with cls._lock:
+                cls._refreshing = False
+                cls._next_refresh = time.monotonic() + cls._refresh_seconds
+
+    @classmethod
+    def _budget(cls, lengths: list[int]) -> int:
+        """
+        Turns a group's completion lengths into its budget.
+        """
+        ordered = sorted(lengths)
+        index = min(len(ordered) - 1, max(0, math.ceil(len(ordered) * cls._percentile / 100) - 1))
+        return max(cls._min_tokens, math.ceil(ordered[index] * cls._margin))
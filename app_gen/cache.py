@@ -0,0 +1,225 @@
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from decouple import config
+
+from django.db import IntegrityError
+from django.utils import timezone
+
+from app_gen.exceptions import InvalidCacheModeException
+from app_gen.models import GenerationCacheEntry
+
+if TYPE_CHECKING:
+    from app_gen.services import GENData
+
+class CacheMode(str, Enum):
+    """
+    Per-request cache behaviour, selected by the caller through the `cache` query parameter.
+
+    - `use`: serve a cached response when available, store fresh ones otherwise.
+    - `bypass`: ignore the cache entirely, neither reading nor writing it.
+    - `refresh`: skip the lookup but overwrite the cached entry with the fresh response.
+    """
+    USE = "use"
+    BYPASS = "bypass"
+    REFRESH = "refresh"
+
+    @classmethod
+    def parse(cls, value: str | None) -> "CacheMode":
+        """
+        Converts the raw query parameter into a `CacheMode`, defaulting to `use`.
+
+        Args:
+            value (str | None): The `cache` query parameter, if present.
+
+        Returns:
+            CacheMode: The requested cache behaviour.
+
+        Raises:
+            InvalidCacheModeException: If the value is not a known mode.
+        """
+        try:
+            return cls(value or cls.USE)
+        except ValueError as exc:
+            raise InvalidCacheModeException(value) from exc
+
+@dataclass(slots=True, frozen=True)
+class CachedGeneration:
+    model: str
+    generated_content: str
+    alternatives: tuple[str, ...] = ()      # further candidates of a multi-candidate request
+
+class GENCache:
+    """
+    Content-addressed, two-tier cache for generated responses.
+
+    Entries are keyed on a hash of the normalized request plus every parameter that
+    influences the completion. The first tier is an in-process LRU with TTL; the second
+    is the `GenerationCacheEntry` table, shared by every worker. Hits on the shared tier
+    are promoted to the local one.
+    """
+    #: Lifetime of a cached response, in seconds, for both tiers.
+    _ttl: int = config("GEN_CACHE_TTL", default=86400, cast=int)
+    #: Maximum number of entries kept by the in-process tier.
+    _max_entries: int = config("GEN_CACHE_MAX_ENTRIES", default=512, cast=int)
+
+    _entries: "OrderedDict[str, tuple[float, CachedGeneration]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def make_key(data: "GENData", model: str, temperature: float, system_prompt: str) -> str:
+        """
+        Builds the cache key for a generation request.
+
+        Text fields are Unicode-normalized and their whitespace collapsed, so requests that
+        differ only in spacing or line breaks share the same entry.
+
+        Args:
+            data (GENData): The generation input.
+            model (str): Model that would serve the request.
+            temperature (float): Sampling temperature that would be used.
+            system_prompt (str): System prompt sent along with the request.
+
+        Returns:
+            str: Hex-encoded SHA-256 digest.
+        """
+        normalized = {
+            name: " ".join(unicodedata.normalize("NFKC", value).split()) if isinstance(value, str) else value
+            for name, value in asdict(data).items()
+        }
+        material = json.dumps(
+            [normalized, model, temperature, system_prompt],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> CachedGeneration | None:
+        """
+        Looks up a cached response, first locally and then in the shared table.
+
+        Args:
+            key (str): Key produced by `make_key`.
+
+        Returns:
+            CachedGeneration | None: The cached response, or `None` on a miss.
+        """
+        cached = cls._get_local(key)
+        if cached is not None:
+            return cached
+
+        row = GenerationCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+        if row is None:
+            return None
+        return cls._promote(row)
+
+    @classmethod
+    async def aget(cls, key: str) -> CachedGeneration | None:
+        """
+        Asynchronous counterpart of `get`, using the async ORM for the shared tier.
+        """
+        cached = cls._get_local(key)
+        if cached is not None:
+            return cached
+
+        row = await GenerationCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).afirst()
+        if row is None:
+            return None
+        return cls._promote(row)
+
+    @classmethod
+    def set(cls, key: str, entry: CachedGeneration) -> None:
+        """
+        Stores a response in both tiers, replacing any previous entry for the key.
+
+        Args:
+            key (str): Key produced by `make_key`.
+            entry (CachedGeneration): The response to cache.
+        """
+        cls._set_local(key, entry)
+        try:
+            GenerationCacheEntry.objects.update_or_create(key=key, defaults=cls._row_defaults(entry))
+        except IntegrityError:
+            # Another worker stored the same key concurrently; its entry is just as good.
+            pass
+
+    @classmethod
+    async def aset(cls, key: str, entry: CachedGeneration) -> None:
+        """
+        Asynchronous counterpart of `set`.
+        """
+        cls._set_local(key, entry)
+        try:
+            await GenerationCacheEntry.objects.aupdate_or_create(key=key, defaults=cls._row_defaults(entry))
+        except IntegrityError:
+            pass
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """
+        Deletes expired entries from the shared tier and clears the local one.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        with cls._lock:
+            cls._entries.clear()
+        deleted, _ = GenerationCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    @classmethod
+    def _get_local(cls, key: str) -> CachedGeneration | None:
+        """
+        Reads the in-process tier, dropping the entry if it has expired.
+        """
+        with cls._lock:
+            item = cls._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del cls._entries[key]
+                return None
+            cls._entries.move_to_end(key)
+            return entry
+
+    @classmethod
+    def _set_local(cls, key: str, entry: CachedGeneration, ttl: float | None = None) -> None:
+        """
+        Writes the in-process tier, evicting the least recently used entries beyond the size limit.
+        """
+        with cls._lock:
+            cls._entries[key] = (time.monotonic() + (cls._ttl if ttl is None else ttl), entry)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > cls._max_entries:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def _promote(cls, row: GenerationCacheEntry) -> CachedGeneration:
+        """
+        Copies a shared-tier row into the local tier; the copy never outlives the row.
+        """
+        entry = CachedGeneration(model=row.model, generated_content=row.response, alternatives=tuple(row.alternatives))
+        cls._set_local(row.key, entry, ttl=(row.expires_at - timezone.now()).total_seconds())
+        return entry
+
+    @classmethod
+    def _row_defaults(cls, entry: CachedGeneration) -> dict:
+        """
+        Builds the column values of a shared-tier row, stamping a fresh expiry.
+        """
+        return {
+            "model": entry.model,
+            "response": entry.generated_content,
+            "alternatives": list(entry.alternatives),
+            "expires_at": timezone.now() + timedelta(seconds=cls._ttl),
+        }
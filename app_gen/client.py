@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI, OpenAIError
+
+from decouple import config
+
+import logging
+logger = logging.getLogger(__name__)
+
+class GENClient:
+    """
+    Owner of the per-process OpenAI clients and their HTTP connection pools.
+
+    One sync client is created per worker process and reused by every request, so TLS connections
+    are kept alive between calls instead of being renegotiated. An async pool cannot outlive the
+    event loop it was opened on, so there is one async client per loop: under ASGI that is the
+    worker's serving loop, while under WSGI each async view runs on a loop of its own, and its
+    client is dropped once that loop is closed. Pool size,
+    keep-alive and timeouts come from configuration, and each request is traced to count how
+    often it reused a pooled connection versus opening a new one.
+    """
+    #: Provider endpoint; point it at `run_fake_provider` to run without spending tokens.
+    _base_url: str | None = config("OPENAI_BASE_URL", default=None)
+    #: Maximum simultaneous connections to the provider per client.
+    _max_connections: int = config("OPENAI_MAX_CONNECTIONS", default=100, cast=int)
+    #: Idle connections kept open for reuse per client.
+    _max_keepalive: int = config("OPENAI_MAX_KEEPALIVE", default=20, cast=int)
+    #: Seconds an idle connection stays in the pool before being closed.
+    _keepalive_expiry: float = config("OPENAI_KEEPALIVE_EXPIRY", default=120.0, cast=float)
+    #: Overall request timeout, in seconds.
+    _timeout: float = config("OPENAI_TIMEOUT", default=30, cast=float)
+    #: Timeout for establishing a connection; kept short so a dead endpoint fails fast.
+    _connect_timeout: float = config("OPENAI_CONNECT_TIMEOUT", default=5.0, cast=float)
+    #: Negotiate HTTP/2, multiplexing concurrent requests over fewer connections.
+    _http2: bool = config("OPENAI_HTTP2", default=False, cast=bool)
+
+    _client: OpenAI | None = None
+    _async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI] = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+    _stats: dict[str, int] = {"requests": 0, "new_connections": 0}
+
+    @classmethod
+    def get_client(cls) -> OpenAI:
+        """
+        Returns the process-wide synchronous client, creating it on first use.
+
+        Returns:
+            OpenAI: The shared client.
+        """
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    cls._client = OpenAI(
+                        api_key=config("OPENAI_API_KEY"),
+                        base_url=cls._base_url,
+                        # Retries are handled by `GENResilience`.
+                        max_retries=0,
+                        http_client=DefaultHttpxClient(
+                            limits=cls._limits(),
+                            timeout=cls._timeouts(),
+                            http2=cls._http2,
+                            event_hooks={"request": [cls._on_request]},
+                        ),
+                    )
+        return cls._client
+
+    @classmethod
+    def get_async_client(cls) -> AsyncOpenAI:
+        """
+        Returns the asynchronous client of the running event loop, creating it on first use.
+
+        Returns:
+            AsyncOpenAI: The client shared by every call made on this loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = cls._async_clients.get(loop)
+        if client is None:
+            with cls._lock:
+                # The pool of a closed loop references the loop, so it would never be collected.
+                for closed in [other for other in cls._async_clients if other.is_closed()]:
+                    del cls._async_clients[closed]
+                client = cls._async_clients[loop] = AsyncOpenAI(
+                    api_key=config("OPENAI_API_KEY"),
+                    base_url=cls._base_url,
+                    max_retries=0,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=cls._limits(),
+                        timeout=cls._timeouts(),
+                        http2=cls._http2,
+                        event_hooks={"request": [cls._aon_request]},
+                    ),
+                )
+        return client
+
+    @classmethod
+    def warm_up(cls) -> None:
+        """
+        Opens a pooled connection ahead of the first generation, paying the TLS handshake at boot.
+
+        Failures are logged and ignored: a cold pool only costs latency, never availability.
+        """
+        try:
+            cls.get_client().with_options(max_retries=0).models.list()
+        except OpenAIError:
+            logger.warning("OpenAI client warm-up failed.", exc_info=True)
+
+    @classmethod
+    async def awarm_up(cls) -> None:
+        """
+        Asynchronous counterpart of `warm_up`; warms the client of the loop it is awaited on.
+        """
+        try:
+            await cls.get_async_client().with_options(max_retries=0).models.list()
+        except OpenAIError:
+            logger.warning("OpenAI async client warm-up failed.", exc_info=True)
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """
+        Closes the sync client and the async client of the running loop; used on graceful worker shutdown.
+        """
+        client = cls._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+        if cls._client is not None:
+            cls._client.close()
+            cls._client = None
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        """
+        Returns the connection reuse counters of this process.
+
+        Returns:
+            dict[str, int]: Total requests, requests served by a pooled connection (`pool_hits`)
+                            and requests that had to open a new connection.
+        """
+        with cls._lock:
+            requests, new_connections = cls._stats["requests"], cls._stats["new_connections"]
+        return {
+            "requests": requests,
+            "pool_hits": requests - new_connections,
+            "new_connections": new_connections,
+        }
+
+    @classmethod
+    def _limits(cls) -> httpx.Limits:
+        """
+        Builds the connection pool limits.
+        """
+        return httpx.Limits(
+            max_connections=cls._max_connections,
+            max_keepalive_connections=cls._max_keepalive,
+            keepalive_expiry=cls._keepalive_expiry,
+        )
+
+    @classmethod
+    def _timeouts(cls) -> httpx.Timeout:
+        """
+        Builds the request timeouts, with a shorter connect phase.
+        """
+        return httpx.Timeout(cls._timeout, connect=cls._connect_timeout)
+
+    @classmethod
+    def _count(cls, event: str) -> None:
+        """
+        Updates the counters from an httpcore trace event.
+        """
+        if event == "connection.connect_tcp.started":
+            with cls._lock:
+                cls._stats["new_connections"] += 1
+
+    @classmethod
+    def _on_request(cls, request: httpx.Request) -> None:
+        """
+        Request hook of the sync client: counts the request and attaches the connection tracer.
+        """
+        with cls._lock:
+            cls._stats["requests"] += 1
+        request.extensions["trace"] = lambda event, info: cls._count(event)
+
+    @classmethod
+    async def _aon_request(cls, request: httpx.Request) -> None:
+        """
+        Request hook of the async client; httpcore requires an async tracer there.
+        """
+        with cls._lock:
+            cls._stats["requests"] += 1
+
+        async def trace(event: str, info: dict) -> None:
+            cls._count(event)
+
+        request.extensions["trace"] = trace
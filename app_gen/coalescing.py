@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import TypeVar
+
+from asgiref.sync import sync_to_async
+from decouple import config
+
+from django.db import connection
+
+
+T = TypeVar("T")
+
+class GENSingleFlight:
+    """
+    Coalesces concurrent calls that share the same fingerprint into a single execution.
+
+    Inside a process, the first caller for a key becomes the leader and everyone else waits on its
+    future, receiving the same result or exception. Across processes, leaders serialize on a Postgres
+    advisory lock derived from the key: whoever gets the lock second first re-checks the shared
+    result store (`recheck`), which the previous holder has just filled, before doing any work.
+
+    Coalescing only saves work and never fails a request: a caller that has waited `_wait_timeout`
+    for someone else's execution re-checks the store and, if still empty, does the work itself.
+    """
+    #: Upper bound, in seconds, on how long a caller waits for someone else's execution.
+    _wait_timeout: float = config("GEN_COALESCE_WAIT", default=35.0, cast=float)
+    #: Delay between advisory lock attempts while another process holds it.
+    _poll_interval: float = 0.05
+
+    _inflight: dict[str, Future] = {}
+    _ainflight: dict[str, asyncio.Future] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def run(cls, key: str, compute: Callable[[], T], recheck: Callable[[], T | None]) -> tuple[T, bool]:
+        """
+        Executes `compute` once per key across all concurrent callers.
+
+        Args:
+            key (str): Hex fingerprint of the work (e.g., a `GENCache` key).
+            compute (Callable[[], T]): Performs the work; only called by the leader.
+            recheck (Callable[[], T | None]): Looks the result up in shared storage, so a leader that
+                                              waited on another process can reuse its output.
+
+        Returns:
+            tuple[T, bool]: The result and whether it was produced by another caller.
+        """
+        with cls._lock:
+            future = cls._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = cls._inflight[key] = Future()
+
+        if not leader:
+            try:
+                return future.result(timeout=cls._wait_timeout)[0], True
+            except FutureTimeoutError:
+                # The leader is slower than expected: stop waiting on it, but not on the result.
+                shared = recheck()
+                return (shared, True) if shared is not None else (compute(), False)
+
+        try:
+            with cls._advisory_lock(key):
+                shared = recheck()
+                outcome = (shared, True) if shared is not None else (compute(), False)
+            future.set_result(outcome)
+            return outcome
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with cls._lock:
+                cls._inflight.pop(key, None)
+
+    @classmethod
+    async def arun(
+        cls,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        recheck: Callable[[], Awaitable[T | None]],
+    ) -> tuple[T, bool]:
+        """
+        Asynchronous counterpart of `run`, coalescing coroutines of the same event loop.
+        """
+        future = cls._ainflight.get(key)
+        if future is not None:
+            try:
+                result, _ = await asyncio.wait_for(asyncio.shield(future), cls._wait_timeout)
+                return result, True
+            except asyncio.TimeoutError:
+                shared = await recheck()
+                return (shared, True) if shared is not None else (await compute(), False)
+
+        future = cls._ainflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            lock_id: int = cls._lock_id(key)
+            acquired: bool = await sync_to_async(cls._acquire)(lock_id)
+            try:
+                shared = await recheck()
+                outcome = (shared, True) if shared is not None else (await compute(), False)
+            finally:
+                if acquired:
+                    await sync_to_async(cls._release)(lock_id)
+            future.set_result(outcome)
+            return outcome
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved: nobody may be waiting on the future.
+            future.exception()
+            raise
+        finally:
+            cls._ainflight.pop(key, None)
+
+    @classmethod
+    @contextmanager
+    def _advisory_lock(cls, key: str) -> Iterator[None]:
+        """
+        Holds the cross-process advisory lock of a key for the duration of the block.
+        """
+        lock_id: int = cls._lock_id(key)
+        acquired: bool = cls._acquire(lock_id)
+        try:
+            yield
+        finally:
+            if acquired:
+                cls._release(lock_id)
+
+    @classmethod
+    def _acquire(cls, lock_id: int) -> bool:
+        """
+        Polls for a session-level advisory lock until it is granted or `_wait_timeout` elapses.
+
+        Giving up only costs the coalescing, not the request, so a stuck holder can never block
+        callers indefinitely. Backends other than PostgreSQL skip cross-process coalescing.
+
+        Args:
+            lock_id (int): Signed 64-bit advisory lock id.
+
+        Returns:
+            bool: Whether the lock was acquired and must be released.
+        """
+        if connection.vendor != "postgresql":
+            return False
+        deadline: float = time.monotonic() + cls._wait_timeout
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+                if cursor.fetchone()[0]:
+                    return True
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(cls._poll_interval)
+
+    @staticmethod
+    def _release(lock_id: int) -> None:
+        """
+        Releases an advisory lock taken by `_acquire` on the same connection.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+    @staticmethod
+    def _lock_id(key: str) -> int:
+        """
+        Maps a hex fingerprint onto the signed 64-bit id space of Postgres advisory locks.
+        """
+        return int.from_bytes(bytes.fromhex(key[:16]), "big", signed=True)
@@ -0,0 +1,247 @@
+import hashlib
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from decouple import config
+
+from django.db import transaction
+from django.db.models import Q
+
+from app_gen.models import ContentBlob, ContentGenerationLog
+
+class GENContentStore:
+    """
+    Content-addressed storage of the prompt and response texts of `ContentGenerationLog`.
+
+    Each distinct text is stored once in `ContentBlob`, keyed by its SHA-256, and log rows only
+    reference it; the same objective, data or return format sent thousands of times (or a cached
+    response replayed) therefore costs one row. Texts of at least `GEN_BLOB_COMPRESS_MIN_BYTES`
+    are zlib-compressed when that makes them smaller. Each process remembers the hashes it has
+    stored for `_known_ttl` seconds and skips storing them again; storing a blob that already
+    exists refreshes its `used_at`. Blobs whose last references went away with an archived
+    partition are deleted by `collect`, which keeps every blob that may still be in use.
+    """
+    #: Text fields of `ContentGenerationLog` stored as blobs.
+    FIELDS: tuple[str, ...] = ("objective", "data", "return_format", "response", "alternatives")
+    #: UTF-8 size from which texts are compressed.
+    _compress_min_bytes: int = config("GEN_BLOB_COMPRESS_MIN_BYTES", default=512, cast=int)
+    #: Hashes remembered as stored by each process.
+    _max_known: int = 50000
+    #: Seconds a process relies on a blob it stored still existing, without storing it again.
+    _known_ttl: float = 600.0
+
+    _lock = threading.Lock()
+    _known: OrderedDict[str, float] = OrderedDict()     # hash -> `time.monotonic()` when stored
+
+    @staticmethod
+    def digest(text: str) -> str:
+        """
+        Returns the hash identifying a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            str: SHA-256 hex digest of its UTF-8 encoding.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def pack(cls, logs: list[ContentGenerationLog]) -> None:
+        """
+        Moves the inline texts of unsaved log rows into blobs, storing the blobs not yet stored.
+
+        Must run in the transaction that saves the rows, so they never reference a missing blob.
+
+        Args:
+            logs (list[ContentGenerationLog]): Rows about to be inserted or updated.
+        """
+        texts: dict[str, str] = {}
+        for log in logs:
+            for field in cls.FIELDS:
+                text = getattr(log, field)
+                if text is None:
+                    continue
+                key = cls.digest(text)
+                setattr(log, f"{field}_blob_id", key)
+                setattr(log, field, None)
+                texts[key] = text
+        cls._store(texts)
+
+    @classmethod
+    def put(cls, text: str) -> str:
+        """
+        Stores a single text, unless already stored.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            str: Hash of its blob.
+        """
+        key = cls.digest(text)
+        cls._store({key: text})
+        return key
+
+    @classmethod
+    def convert(cls, batch_size: int = 500) -> int:
+        """
+        Moves the inline texts of rows written before blobs existed into blobs.
+
+        Rows are converted in batches of their own transactions, walking the ids upwards, so the
+        conversion can run while the application writes logs and can be resumed if interrupted.
+
+        Args:
+            batch_size (int): Rows converted per transaction.
+
+        Returns:
+            int: Number of rows converted.
+        """
+        legacy = Q()
+        for field in cls.FIELDS:
+            legacy |= Q(**{f"{field}__isnull": False})
+        columns = [*cls.FIELDS, *(f"{field}_blob" for field in cls.FIELDS)]
+
+        converted, last_id = 0, 0
+        while True:
+            with transaction.atomic():
+                logs = list(
+                    ContentGenerationLog.objects.filter(legacy, id__gt=last_id)
+                    .order_by("id")
+                    .only("id", *columns)[:batch_size]
+                )
+                if not logs:
+                    return converted
+                cls.pack(logs)
+                ContentGenerationLog.objects.bulk_update(logs, columns)
+            converted += len(logs)
+            last_id = logs[-1].id
+
+    @classmethod
+    def collect(cls, keys: list[str], scanned_at: datetime) -> int:
+        """
+        Deletes blobs that a scan of every referencing row, started at `scanned_at`, found unused.
+
+        A writer may have referenced one of them since the scan started: it then stored the blob
+        again, refreshing `used_at`, unless its process had stored it less than `_known_ttl`
+        seconds before. Blobs used within twice that period before the scan are therefore kept.
+
+        Args:
+            keys (list[str]): Hashes no row referenced during the scan.
+            scanned_at (datetime): When the scan started.
+
+        Returns:
+            int: Number of blobs deleted.
+        """
+        cutoff = scanned_at - timedelta(seconds=2 * cls._known_ttl)
+        deleted, _ = ContentBlob.objects.filter(hash__in=keys, used_at__lt=cutoff).delete()
+        with cls._lock:
+            for key in keys:
+                cls._known.pop(key, None)
+        return deleted
+
+    @classmethod
+    def unpack(cls, logs: list[ContentGenerationLog]) -> None:
+        """
+        Fills in the texts of log rows from their blobs, with one query for all of them.
+
+        Args:
+            logs (list[ContentGenerationLog]): Rows read from the database.
+        """
+        texts = cls.get_many({
+            getattr(log, f"{field}_blob_id") for log in logs for field in cls.FIELDS
+        } - {None})
+        for log in logs:
+            for field in cls.FIELDS:
+                key = getattr(log, f"{field}_blob_id")
+                if key is not None and getattr(log, field) is None:
+                    setattr(log, field, texts.get(key))
+
+    @classmethod
+    def unpack_rows(cls, rows: list[dict]) -> None:
+        """
+        Replaces the blob references of raw log rows (keyed by column) with their texts.
+
+        Args:
+            rows (list[dict]): Rows of the log table, modified in place.
+        """
+        texts = cls.get_many({row.get(f"{field}_blob_id") for row in rows for field in cls.FIELDS} - {None})
+        for row in rows:
+            for field in cls.FIELDS:
+                key = row.pop(f"{field}_blob_id", None)
+                if key is not None and row.get(field) is None:
+                    row[field] = texts.get(key)
+
+    @classmethod
+    def get_many(cls, keys: set[str]) -> dict[str, str]:
+        """
+        Reads the texts of several blobs.
+
+        Args:
+            keys (set[str]): Hashes of the blobs.
+
+        Returns:
+            dict[str, str]: Text of each blob found, by hash.
+        """
+        texts: dict[str, str] = {}
+        pending = list(keys)
+        for start in range(0, len(pending), 500):
+            for blob in ContentBlob.objects.filter(hash__in=pending[start:start + 500]):
+                texts[blob.hash] = cls._decode(blob)
+        return texts
+
+    @classmethod
+    def _store(cls, texts: dict[str, str]) -> None:
+        """
+        Inserts the blobs of the texts not yet known to be stored.
+        """
+        stored_at = time.monotonic()
+        with cls._lock:
+            # Sorted, so that writers sharing texts lock their blob rows in the same order.
+            missing = sorted(
+                key for key in texts if stored_at - cls._known.get(key, -math.inf) >= cls._known_ttl
+            )
+        if not missing:
+            return
+        # Identical texts stored concurrently by another process have the same hash and content.
+        ContentBlob.objects.bulk_create(
+            [cls._encode(key, texts[key]) for key in missing],
+            batch_size=500, update_conflicts=True, unique_fields=["hash"], update_fields=["used_at"],
+        )
+        transaction.on_commit(lambda: cls._remember(missing, stored_at))
+
+    @classmethod
+    def _encode(cls, key: str, text: str) -> ContentBlob:
+        """
+        Builds the blob of a text, compressed if it is large enough for that to pay off.
+        """
+        raw = text.encode("utf-8")
+        if len(raw) >= cls._compress_min_bytes:
+            packed = zlib.compress(raw, 6)
+            if len(packed) < len(raw):
+                return ContentBlob(hash=key, size=len(raw), compressed=True, content=packed)
+        return ContentBlob(hash=key, size=len(raw), compressed=False, content=raw)
+
+    @staticmethod
+    def _decode(blob: ContentBlob) -> str:
+        """
+        Returns the text of a blob.
+        """
+        content = bytes(blob.content)
+        return (zlib.decompress(content) if blob.compressed else content).decode("utf-8")
+
+    @classmethod
+    def _remember(cls, keys: list[str], stored_at: float) -> None:
+        """
+        Records committed blobs, evicting the least recently stored hashes beyond the limit.
+        """
+        with cls._lock:
+            for key in keys:
+                cls._known[key] = stored_at
+                cls._known.move_to_end(key)
+            while len(cls._known) > cls._max_known:
+                cls._known.popitem(last=False)
@@ -1,2 +1,37 @@
 class FailedDependencyException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class InvalidCacheModeException(Exception):
+    pass
+
+class CircuitOpenException(FailedDependencyException):
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+class ProviderBusyException(FailedDependencyException):
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+class QuotaExceededException(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+class LogPartitionException(Exception):
+    pass
+
+class SearchUnavailableException(Exception):
+    pass
+
+class InvalidIdempotencyKeyException(Exception):
+    pass
+
+class IdempotencyKeyReusedException(Exception):
+    pass
+
+class IdempotencyInFlightException(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from decouple import config
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from app_gen.content import GENContentStore
+from app_gen.models import ContentGenerationLog
+
+@dataclass(slots=True, frozen=True)
+class ExportQuery:
+    start: date | None = None
+    end: date | None = None             # inclusive
+    user_id: int | None = None
+    format: str = "ndjson"              # "ndjson" or "csv"
+    compress: bool = False              # gzip the output
+
+class GENLogExport:
+    """
+    Streams `ContentGenerationLog` rows as NDJSON or CSV, optionally gzipped, for compliance exports.
+
+    Rows are read in `id` order through a server-side cursor (`iterator(chunk_size=...)`) inside
+    a transaction, so the database hands them over one chunk at a time; the texts of each chunk
+    are read from `ContentBlob` with one query, encoded and compressed on the fly, and the chunk
+    is yielded before the next one is fetched. Memory therefore stays flat whatever the number of
+    rows. Days follow `TIME_ZONE`.
+
+    Under ASGI, Django would buffer a synchronous iterator whole before sending it, so `astream`
+    pulls the same chunks one at a time instead.
+    """
+    #: Rows fetched from the server-side cursor at a time.
+    _chunk_size: int = config("GEN_EXPORT_CHUNK_SIZE", default=2000, cast=int)
+    #: Exported columns: everything but blob references, replaced by their texts, and the search vector.
+    COLUMNS: tuple[str, ...] = tuple(
+        field.attname
+        for field in ContentGenerationLog._meta.concrete_fields
+        if not field.attname.endswith("_blob_id") and field.attname != "search_vector"
+    )
+    #: Media type of each format.
+    CONTENT_TYPES: dict[str, str] = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    @classmethod
+    def stream(cls, query: ExportQuery) -> Iterator[bytes]:
+        """
+        Yields the export of the logs matching a query, chunk by chunk.
+
+        Args:
+            query (ExportQuery): Filters, format and compression.
+
+        Returns:
+            Iterator[bytes]: Encoded (and compressed) chunks of the export.
+        """
+        compressor = zlib.compressobj(wbits=31) if query.compress else None  # 31: gzip container
+        for chunk in cls._encoded(query):
+            data = compressor.compress(chunk) if compressor else chunk
+            if data:
+                yield data
+        if compressor:
+            yield compressor.flush()
+
+    @classmethod
+    async def astream(cls, query: ExportQuery) -> AsyncIterator[bytes]:
+        """
+        Asynchronous counterpart of `stream`, for ASGI responses.
+
+        Each chunk is pulled with its own thread-sensitive `sync_to_async` call, so the cursor and
+        its transaction stay on the request's thread while chunks are sent as they are encoded.
+        """
+        chunks = cls.stream(query)
+        pull = sync_to_async(next, thread_sensitive=True)
+        try:
+            while (chunk := await pull(chunks, None)) is not None:
+                yield chunk
+        finally:
+            # Ends the transaction even if the client goes away mid-export.
+            await sync_to_async(chunks.close, thread_sensitive=True)()
+
+    @classmethod
+    def filename(cls, query: ExportQuery) -> str:
+        """
+        Names the file of an export.
+
+        Args:
+            query (ExportQuery): Filters, format and compression.
+
+        Returns:
+            str: e.g. `generation_logs_2025-01-01_2025-03-31.csv.gz`.
+        """
+        span = "_".join(day.isoformat() for day in (query.start, query.end) if day is not None)
+        return f"generation_logs{'_' + span if span else ''}.{query.format}{'.gz' if query.compress else ''}"
+
+    @classmethod
+    def _encoded(cls, query: ExportQuery) -> Iterator[bytes]:
+        """
+        Yields the uncompressed export, one encoded chunk of rows at a time.
+        """
+        if query.format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=cls.COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for rows in cls._chunks(query):
+                writer.writerows(rows)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        else:
+            for rows in cls._chunks(query):
+                yield "".join(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows).encode("utf-8")
+
+    @classmethod
+    def _chunks(cls, query: ExportQuery) -> Iterator[list[dict]]:
+        """
+        Yields the matching rows, with their texts, in chunks read from a server-side cursor.
+        """
+        logs = ContentGenerationLog.objects.all()
+        if query.start is not None:
+            logs = logs.filter(created_at__gte=cls._day_start(query.start))
+        if query.end is not None:
+            logs = logs.filter(created_at__lt=cls._day_start(query.end + timedelta(days=1)))
+        if query.user_id is not None:
+            logs = logs.filter(created_by_id=query.user_id)
+        blob_columns = [f"{field}_blob_id" for field in GENContentStore.FIELDS]
+        rows = logs.order_by("id").values(*cls.COLUMNS, *blob_columns)
+
+        # Outside a transaction the cursor would be declared WITH HOLD, and PostgreSQL would
+        # materialize the whole result before returning the first row.
+        with transaction.atomic():
+            iterator = rows.iterator(chunk_size=cls._chunk_size)
+            while chunk := list(islice(iterator, cls._chunk_size)):
+                GENContentStore.unpack_rows(chunk)
+                yield chunk
+
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        """
+        Returns the start of a local day.
+        """
+        return timezone.make_aware(datetime.combine(day, time.min))
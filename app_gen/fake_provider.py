@@ -0,0 +1,231 @@
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logging
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True, frozen=True)
+class FakeProviderProfile:
+    latency_median: float = 0.8         # seconds until the full response (lognormal median)
+    latency_sigma: float = 0.5          # lognormal shape; 0 makes every call take the median
+    error_rate: float = 0.0             # share of calls answered with 500
+    rate_limit_rate: float = 0.0        # share of calls answered with 429 and Retry-After
+    timeout_rate: float = 0.0           # share of calls that hang for `hang_seconds`
+    hang_seconds: float = 120.0
+    min_completion_tokens: int = 150
+    max_completion_tokens: int = 600
+
+class FakeProvider:
+    """
+    Local stand-in for the OpenAI chat-completions API, for load tests and offline development.
+
+    Serves `POST /v1/chat/completions` (plain and streamed, with `n` choices and the
+    `max_tokens`/`max_completion_tokens` cap) and `GET /v1/models` with the same JSON shapes as
+    the real API, so `GENServices` talks to it unchanged once `OPENAI_BASE_URL` points at it.
+    Latency follows a lognormal distribution, errors, rate limits and hangs are injected at the
+    configured rates, and usage reports prompt tokens (about four characters each), completion
+    tokens and, like the real API, cached tokens for system prompts of 1024+ tokens seen before.
+    """
+    #: Words used to fill generated content.
+    _WORDS: tuple[str, ...] = (
+        "competência", "desenvolvimento", "liderança", "comunicação", "resultado", "equipe", "meta",
+        "feedback", "plano", "ação", "prazo", "indicador", "cargo", "responsabilidade", "processo",
+    )
+
+    def __init__(self, profile: FakeProviderProfile, seed: int | None = None) -> None:
+        self.profile = profile
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prefixes: set[str] = set()
+        self.stats: dict[str, int] = {"requests": 0, "errors": 0, "rate_limited": 0, "hung": 0}
+
+    def serve(self, host: str, port: int) -> ThreadingHTTPServer:
+        """
+        Creates the HTTP server; call `serve_forever` on it (one thread per connection).
+
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind.
+
+        Returns:
+            ThreadingHTTPServer: The bound server.
+        """
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/").endswith("/models"):
+                    provider._send_json(self, HTTPStatus.OK, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+                else:
+                    provider._send_json(self, HTTPStatus.NOT_FOUND, provider._error("Not found."))
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if self.path.rstrip("/").endswith("/chat/completions"):
+                    provider._complete(self, body)
+                else:
+                    provider._send_json(self, HTTPStatus.NOT_FOUND, provider._error("Not found."))
+
+            def log_message(self, format: str, *args) -> None:
+                logger.debug(format, *args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+    def _complete(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        """
+        Answers a chat completion request according to the profile.
+        """
+        profile = self.profile
+        with self._lock:
+            self.stats["requests"] += 1
+            draw = self._rng.random()
+            latency = profile.latency_median * math.exp(self._rng.gauss(0, profile.latency_sigma))
+            completion_tokens = self._rng.randint(profile.min_completion_tokens, profile.max_completion_tokens)
+
+        if draw < profile.timeout_rate:
+            self._count("hung")
+            time.sleep(profile.hang_seconds)
+            handler.close_connection = True
+            return
+        draw -= profile.timeout_rate
+        if draw < profile.rate_limit_rate:
+            self._count("rate_limited")
+            self._send_json(handler, HTTPStatus.TOO_MANY_REQUESTS, self._error("Rate limit reached."), {"Retry-After": "1"})
+            return
+        draw -= profile.rate_limit_rate
+        if draw < profile.error_rate:
+            self._count("errors")
+            time.sleep(latency)
+            self._send_json(handler, HTTPStatus.INTERNAL_SERVER_ERROR, self._error("Injected failure."))
+            return
+
+        limit = body.get("max_completion_tokens") or body.get("max_tokens")
+        finish_reason = "stop"
+        if limit is not None and completion_tokens > limit:
+            completion_tokens, finish_reason = limit, "length"
+        choices = max(1, int(body.get("n") or 1))
+        usage = self._usage(body.get("messages") or [], completion_tokens * choices)
+        model = body.get("model") or "fake"
+
+        if body.get("stream"):
+            self._stream(handler, model, latency, completion_tokens, finish_reason, usage)
+            return
+
+        time.sleep(latency)
+        self._send_json(handler, HTTPStatus.OK, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": index,
+                    "message": {"role": "assistant", "content": self._text(completion_tokens)},
+                    "finish_reason": finish_reason,
+                }
+                for index in range(choices)
+            ],
+            "usage": usage,
+        })
+
+    def _stream(
+        self,
+        handler: BaseHTTPRequestHandler,
+        model: str,
+        latency: float,
+        completion_tokens: int,
+        finish_reason: str,
+        usage: dict,
+    ) -> None:
+        """
+        Streams one word per chunk as Server-Sent Events, spread over the sampled latency.
+        """
+        handler.send_response(HTTPStatus.OK)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write(payload: dict | str) -> None:
+            data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+            chunk = f"data: {data}\n\n".encode("utf-8")
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            handler.wfile.flush()
+
+        words = self._text(completion_tokens).split(" ")
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        # The first token takes about a fifth of the latency, like a real model's prefill.
+        time.sleep(latency * 0.2)
+        pause = latency * 0.8 / max(1, len(words))
+        for index, word in enumerate(words):
+            content = word if index == 0 else f" {word}"
+            write({**base, "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}]})
+            time.sleep(pause)
+        write({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+        write({**base, "choices": [], "usage": usage})
+        write("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+
+    def _usage(self, messages: list[dict], completion_tokens: int) -> dict:
+        """
+        Estimates the usage of a request, reporting repeated long system prompts as cached.
+        """
+        prompt_tokens = sum(len(str(message.get("content") or "")) for message in messages) // 4 + 1
+        cached_tokens = 0
+        system = next((str(message.get("content")) for message in messages if message.get("role") == "system"), "")
+        system_tokens = len(system) // 4
+        if system_tokens >= 1024:
+            key = hashlib.sha256(system.encode("utf-8")).hexdigest()
+            with self._lock:
+                if key in self._prefixes:
+                    cached_tokens = system_tokens // 128 * 128
+                self._prefixes.add(key)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+    def _text(self, tokens: int) -> str:
+        """
+        Builds filler content of roughly `tokens` tokens.
+        """
+        with self._lock:
+            return " ".join(self._rng.choice(self._WORDS) for _ in range(max(1, tokens // 2)))
+
+    def _count(self, counter: str) -> None:
+        """
+        Increments an outcome counter.
+        """
+        with self._lock:
+            self.stats[counter] += 1
+
+    @staticmethod
+    def _error(message: str) -> dict:
+        return {"error": {"message": message, "type": "fake_provider_error", "code": None}}
+
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, status: HTTPStatus, payload: dict, headers: dict | None = None) -> None:
+        """
+        Writes a complete JSON response.
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
@@ -0,0 +1,320 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TypeVar
+
+from decouple import config
+
+T = TypeVar("T")
+
+class GENHedge:
+    """
+    Hedged provider calls: a slow call gets an identical backup, and the first answer wins.
+
+    Each process keeps the latencies of its recent successful calls. When a call has not answered
+    within the `GEN_HEDGE_PERCENTILE` of those latencies, a second identical call is sent and
+    whichever answers first is returned; if one of them fails, the other is still waited for.
+    The budget is a token bucket: every call earns `GEN_HEDGE_BUDGET` tokens and every hedge spends
+    one, so at most that share of calls is duplicated, even when the provider slows down as a whole.
+
+    Under asyncio the losing call is cancelled, which closes its connection. Synchronous calls
+    cannot be interrupted, so the call runs on a thread of its own, the hedge on a pool of
+    `GEN_HEDGE_THREADS` threads, and the loser finishes in the background, its response discarded.
+    Calls never wait for a pool thread: a hedge is skipped when every one is busy.
+
+    A hedge is one more call in flight, so callers may pass `reserve` to take a slot for it from a
+    concurrency limit without waiting; the hedge is skipped when none is free, and the slot is
+    freed once both calls have finished.
+    """
+    #: Whether slow calls are hedged.
+    _enabled: bool = config("GEN_HEDGE", default=False, cast=bool)
+    #: Percentile of recent latencies after which a hedge is sent.
+    _percentile: float = config("GEN_HEDGE_PERCENTILE", default=95.0, cast=float)
+    #: Share of calls that may be hedged.
+    _budget: float = config("GEN_HEDGE_BUDGET", default=0.05, cast=float)
+    #: Lower bound on the hedge delay, in seconds.
+    _min_delay: float = config("GEN_HEDGE_MIN_DELAY", default=1.0, cast=float)
+    #: Recent latencies kept per process.
+    _window: int = config("GEN_HEDGE_WINDOW", default=500, cast=int)
+    #: Latencies needed before the first hedge.
+    _min_samples: int = config("GEN_HEDGE_MIN_SAMPLES", default=50, cast=int)
+    #: Threads running the hedges of synchronous calls.
+    _threads: int = config("GEN_HEDGE_THREADS", default=32, cast=int)
+
+    #: Hedges that may be sent in a burst once the budget has built up.
+    _BURST: float = 10.0
+
+    _lock = threading.Lock()
+    _latencies: deque[float] = deque(maxlen=_window)
+    _tokens: float = 0.0
+    _executor: ThreadPoolExecutor | None = None
+    #: Pool threads not taken by a hedge; a hedge that finds none is skipped rather than queued.
+    _idle_threads = threading.BoundedSemaphore(_threads)
+    _stats: dict[str, int] = {
+        "calls": 0, "hedged": 0, "hedge_won": 0, "primary_won": 0, "over_budget": 0, "no_slot": 0, "no_thread": 0,
+    }
+
+    @classmethod
+    def call(cls, operation: Callable[[], T], reserve: Callable[[], Callable[[], None] | None] | None = None) -> T:
+        """
+        Runs a provider call, hedging it if it is slow and the budget allows.
+
+        Args:
+            operation (Callable[[], T]): Performs one provider call; must be safe to run twice.
+            reserve (Callable[[], Callable[[], None] | None] | None): Takes a concurrency slot for
+                the hedge without waiting, returning the function that frees it, or `None` if no
+                slot is free. Hedges are only limited by the pool threads when omitted.
+
+        Returns:
+            T: The result of whichever call answered first.
+
+        Raises:
+            Exception: The error of the call, or of the hedge if both failed.
+        """
+        delay = cls._admit()
+        if delay is None:
+            return cls._timed(operation)
+
+        primary = cls._spawn(operation)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        release = cls._reserve(reserve)
+        if release is None or not cls._spend():
+            if release is not None:
+                release()
+            return primary.result()
+
+        hedge = cls._pool().submit(cls._timed, operation)
+        cls._release_when_done((primary, hedge), release)
+        pending: set[Future] = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None or not pending:
+                break
+        cls._count("hedge_won" if winner is hedge else "primary_won" if winner is primary else None)
+        for future in pending:
+            future.cancel()
+        return (winner or hedge).result()
+
+    @classmethod
+    async def acall(
+        cls,
+        operation: Callable[[], Awaitable[T]],
+        reserve: Callable[[], Awaitable[Callable[[], Awaitable[None]] | None]] | None = None,
+    ) -> T:
+        """
+        Asynchronous counterpart of `call`; the losing call is cancelled.
+        """
+        delay = cls._admit()
+        if delay is None:
+            return await cls._atimed(operation)
+
+        primary = asyncio.ensure_future(cls._atimed(operation))
+        tasks: set[asyncio.Future] = {primary}
+        release: Callable[[], Awaitable[None]] | None = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return await primary
+            release = await reserve() if reserve is not None else cls._anothing
+            if release is None:
+                cls._count("no_slot")
+                return await primary
+            if not cls._spend():
+                return await primary
+
+            hedge = asyncio.ensure_future(cls._atimed(operation))
+            tasks.add(hedge)
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None or not pending:
+                    break
+            cls._count("hedge_won" if winner is hedge else "primary_won" if winner is primary else None)
+            return (winner or hedge).result()
+        finally:
+            # Also covers the caller being cancelled while waiting.
+            for task in tasks:
+                task.cancel()
+            if release is not None:
+                await release()
+
+    @classmethod
+    def stats(cls) -> dict[str, bool | int | float | None]:
+        """
+        Reports this process's hedging counters, for operators.
+
+        Returns:
+            dict[str, bool | int | float | None]: Calls, hedges sent, how often the hedge or the
+                                                  original call answered first, hedges skipped for
+                                                  lack of budget, of a concurrency slot or of a
+                                                  pool thread and the current hedge delay.
+        """
+        with cls._lock:
+            return {
+                "enabled": cls._enabled,
+                **cls._stats,
+                "delay_seconds": cls._delay() if len(cls._latencies) >= cls._min_samples else None,
+            }
+
+    @classmethod
+    def _admit(cls) -> float | None:
+        """
+        Counts a call and returns after how long it may be hedged, or `None` if it may not be.
+        """
+        if not cls._enabled:
+            return None
+        with cls._lock:
+            cls._stats["calls"] += 1
+            cls._tokens = min(cls._BURST, cls._tokens + cls._budget)
+            if len(cls._latencies) < cls._min_samples or cls._tokens < 1:
+                return None
+            return cls._delay()
+
+    @classmethod
+    def _spend(cls) -> bool:
+        """
+        Takes a hedge from the budget; another call may have spent it since `_admit`.
+        """
+        with cls._lock:
+            if cls._tokens < 1:
+                cls._stats["over_budget"] += 1
+                return False
+            cls._tokens -= 1
+            cls._stats["hedged"] += 1
+            return True
+
+    @classmethod
+    def _reserve(cls, reserve: Callable[[], Callable[[], None] | None] | None) -> Callable[[], None] | None:
+        """
+        Takes a pool thread and, if the caller limits hedges, a concurrency slot for a hedge.
+
+        Returns:
+            Callable[[], None] | None: Frees both, or `None` if either is not free.
+        """
+        if not cls._idle_threads.acquire(blocking=False):
+            cls._count("no_thread")
+            return None
+        release = reserve() if reserve is not None else cls._nothing
+        if release is None:
+            cls._idle_threads.release()
+            cls._count("no_slot")
+            return None
+
+        def release_both() -> None:
+            release()
+            cls._idle_threads.release()
+
+        return release_both
+
+    @staticmethod
+    def _release_when_done(futures: tuple[Future, ...], release: Callable[[], None]) -> None:
+        """
+        Frees the hedge's slot once every call has finished, including a loser left in the background.
+        """
+        lock = threading.Lock()
+        remaining = [len(futures)]
+
+        def finished(_: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            release()
+
+        for future in futures:
+            future.add_done_callback(finished)
+
+    @staticmethod
+    def _nothing() -> None:
+        """
+        Release of an unlimited hedge.
+        """
+
+    @staticmethod
+    async def _anothing() -> None:
+        """
+        Asynchronous counterpart of `_nothing`.
+        """
+
+    @classmethod
+    def _delay(cls) -> float:
+        """
+        Returns the configured percentile of recent latencies; the caller holds `_lock`.
+        """
+        ordered = sorted(cls._latencies)
+        index = min(len(ordered) - 1, math.ceil(len(ordered) * cls._percentile / 100) - 1)
+        return max(cls._min_delay, ordered[max(0, index)])
+
+    @classmethod
+    def _spawn(cls, operation: Callable[[], T]) -> Future:
+        """
+        Starts a call that may be hedged on a thread of its own, so it never waits for the pool.
+        """
+        future: Future = Future()
+
+        def run() -> None:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(cls._timed(operation))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=run, name="gen-hedge-call", daemon=True).start()
+        return future
+
+    @classmethod
+    def _timed(cls, operation: Callable[[], T]) -> T:
+        """
+        Runs a call and records its latency if it succeeds.
+        """
+        started = time.monotonic()
+        result = operation()
+        cls._record(time.monotonic() - started)
+        return result
+
+    @classmethod
+    async def _atimed(cls, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Asynchronous counterpart of `_timed`.
+        """
+        started = time.monotonic()
+        result = await operation()
+        cls._record(time.monotonic() - started)
+        return result
+
+    @classmethod
+    def _record(cls, latency: float) -> None:
+        """
+        Adds a latency to the window.
+        """
+        if cls._enabled:
+            with cls._lock:
+                cls._latencies.append(latency)
+
+    @classmethod
+    def _count(cls, counter: str | None) -> None:
+        """
+        Increments an outcome counter, if any.
+        """
+        if counter is not None:
+            with cls._lock:
+                cls._stats[counter] += 1
+
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool of synchronous hedges, creating it on first use.
+        """
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls._threads, thread_name_prefix="gen-hedge")
+        return cls._executor
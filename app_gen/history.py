@@ -0,0 +1,129 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from app_gen.content import GENContentStore
+from app_gen.models import ContentGenerationLog
+from app_gen.partitions import GENLogPartitions
+
+@dataclass(slots=True, frozen=True)
+class HistoryQuery:
+    limit: int
+    after: tuple[datetime, int] | None = None   # (`created_at`, `id`) of the last row already listed
+
+class GENHistory:
+    """
+    Lists the generations of a user, newest first, and returns single generations in full.
+
+    Pages are read with keyset pagination on (`created_at`, `id`): each page ends with an opaque
+    cursor holding the position of its last row, and the next page starts right after it, so every
+    page costs the same index range scan on `(created_by, -created_at)` however deep it is, and
+    rows inserted meanwhile never shift or repeat entries. Pages only read metadata columns; the
+    prompt and response texts, which live in `ContentBlob`, are read by `get` for one row at a time.
+    Only generations since `GENLogPartitions.retained_since` are listed, so a deep page, or a user
+    with no recent generation, never reads the partitions of older months.
+    """
+    #: Columns read for each row of a page.
+    _LIST_FIELDS: tuple[str, ...] = (
+        "id", "title", "prompt_template", "model_used", "candidates", "prompt_tokens",
+        "completion_tokens", "cached_tokens", "cache_hit", "created_at",
+    )
+
+    @classmethod
+    def page(cls, user: User, query: HistoryQuery) -> dict:
+        """
+        Reads a page of a user's generations.
+
+        Args:
+            user (User): Owner of the generations.
+            query (HistoryQuery): Page size and position.
+
+        Returns:
+            dict: `results`, the metadata of each generation, and `next_cursor`, to be sent back
+                  for the following page, or `None` on the last one.
+        """
+        logs = ContentGenerationLog.objects.filter(
+            created_by=user, created_at__gte=GENLogPartitions.retained_since(),
+        )
+        if query.after is not None:
+            created_at, log_id = query.after
+            logs = logs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=log_id))
+
+        # One row more than asked tells whether there is a next page without a COUNT.
+        rows = list(logs.order_by("-created_at", "-id").values(*cls._LIST_FIELDS)[:query.limit + 1])
+        next_cursor = None
+        if len(rows) > query.limit:
+            rows = rows[:query.limit]
+            next_cursor = cls.encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return {"results": rows, "next_cursor": next_cursor}
+
+    @classmethod
+    def get(cls, user: User, log_id: int) -> dict:
+        """
+        Returns a generation with its prompt and response texts.
+
+        Args:
+            user (User): The requesting user; generations are only visible to their creator.
+            log_id (int): Id listed by `page`.
+
+        Returns:
+            dict: The metadata listed by `page`, plus the request fields, the response and the
+                  alternatives generated with it.
+
+        Raises:
+            ContentGenerationLog.DoesNotExist: If no retained generation with that id belongs to the user.
+        """
+        log = ContentGenerationLog.objects.get(
+            pk=log_id, created_by=user, created_at__gte=GENLogPartitions.retained_since(),
+        )
+        GENContentStore.unpack([log])
+        payload = {field: getattr(log, field) for field in cls._LIST_FIELDS}
+        payload.update({
+            "objective": log.objective,
+            "data": log.data,
+            "return_format": log.return_format,
+            "response": log.response,
+            "alternatives": json.loads(log.alternatives) if log.alternatives else [],
+        })
+        return payload
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, log_id: int) -> str:
+        """
+        Builds the cursor pointing right after a row.
+
+        Args:
+            created_at (datetime): Creation time of the row.
+            log_id (int): Id of the row.
+
+        Returns:
+            str: URL-safe, opaque cursor.
+        """
+        raw = json.dumps([created_at.isoformat(), log_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, int]:
+        """
+        Reads the position held by a cursor.
+
+        Args:
+            cursor (str): Cursor returned by `page`.
+
+        Returns:
+            tuple[datetime, int]: Creation time and id of the row it points after.
+
+        Raises:
+            ValueError: If the cursor was not built by `encode_cursor`.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_at, log_id = json.loads(raw)
+            return datetime.fromisoformat(created_at), int(log_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise ValueError(cursor) from e
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from decouple import config
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from app_gen.exceptions import IdempotencyInFlightException, IdempotencyKeyReusedException, InvalidIdempotencyKeyException
+from app_gen.models import IdempotencyKey
+
+class GENIdempotency:
+    """
+    `Idempotency-Key` support for generation requests, shared by every worker through `IdempotencyKey`.
+
+    The first request with a key claims it by inserting its row, holding it for
+    `GEN_IDEMPOTENCY_LEASE` seconds, and stores its response when it succeeds; retries with the same
+    key then get that response for `GEN_IDEMPOTENCY_TTL` seconds instead of paying for a second
+    provider call. A retry arriving while the original is still running polls the row for up to
+    `GEN_IDEMPOTENCY_WAIT` seconds. Failed requests release their key, so a retry runs again, and a
+    claim whose worker died is taken over once its lease expires. Each claim has its own
+    `lease_token`, so a request outliving its lease can neither complete nor release the claim
+    taken over by a retry. Keys are scoped to their user.
+    """
+    #: Seconds a successful response is replayed.
+    _ttl: int = config("GEN_IDEMPOTENCY_TTL", default=86400, cast=int)
+    #: Seconds a request holds its key while running; must exceed the longest generation.
+    _lease: int = config("GEN_IDEMPOTENCY_LEASE", default=300, cast=int)
+    #: Seconds a retry waits for the original request to finish.
+    _wait: float = config("GEN_IDEMPOTENCY_WAIT", default=60.0, cast=float)
+    #: Seconds between reads of an in-flight key.
+    _poll_interval: float = 0.25
+    #: Longest key accepted, the size of `IdempotencyKey.key`.
+    _max_key_length: int = IdempotencyKey._meta.get_field("key").max_length
+
+    @staticmethod
+    def fingerprint(path: str, cache_mode: str | None, data: dict) -> str:
+        """
+        Identifies a request, to tell a retry from a different request reusing the key.
+
+        Args:
+            path (str): Path of the endpoint.
+            cache_mode (str | None): Raw `cache` query parameter.
+            data (dict): Parsed request body.
+
+        Returns:
+            str: SHA-256 hex digest of the canonical request.
+        """
+        canonical = json.dumps([path, cache_mode, data], sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def begin(cls, user: User, key: str, fingerprint: str) -> IdempotencyKey:
+        """
+        Claims a key for a request, or returns the stored outcome of an earlier one.
+
+        Args:
+            user (User): The requesting user.
+            key (str): Value of the `Idempotency-Key` header.
+            fingerprint (str): `fingerprint` of the request.
+
+        Returns:
+            IdempotencyKey: The completed row to replay or, while `IN_FLIGHT`, the claim now held
+                            by the caller, who must run the request, then `complete` or `release` it.
+
+        Raises:
+            InvalidIdempotencyKeyException: If the key is empty or longer than 255 characters.
+            IdempotencyKeyReusedException: If the key was used with a different request.
+            IdempotencyInFlightException: If the original request is still running after the wait.
+        """
+        if not 0 < len(key) <= cls._max_key_length:
+            raise InvalidIdempotencyKeyException(key)
+
+        deadline = time.monotonic() + cls._wait
+        while True:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    return IdempotencyKey.objects.create(
+                        user=user, key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=cls._lease),
+                    )
+            except IntegrityError:
+                pass
+
+            row = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if row is None:
+                # Released in the meantime: claim it again.
+                continue
+            if row.expires_at <= now:
+                # Replay period over, or abandoned by a dead worker: take it over unless another retry did.
+                claim = {
+                    "fingerprint": fingerprint,
+                    "status": IdempotencyKey.Status.IN_FLIGHT,
+                    "status_code": None,
+                    "response": None,
+                    "lease_token": uuid.uuid4(),
+                    "expires_at": now + timedelta(seconds=cls._lease),
+                }
+                if IdempotencyKey.objects.filter(pk=row.pk, lease_token=row.lease_token, expires_at=row.expires_at).update(**claim):
+                    for field, value in claim.items():
+                        setattr(row, field, value)
+                    return row
+                continue
+            if row.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedException(key)
+            if row.status == IdempotencyKey.Status.COMPLETED:
+                return row
+            if time.monotonic() >= deadline:
+                raise IdempotencyInFlightException(1)
+            time.sleep(cls._poll_interval)
+
+    @classmethod
+    def complete(cls, claim: IdempotencyKey, status_code: int, response: dict) -> None:
+        """
+        Stores the outcome of a request holding a key, to be replayed to its retries.
+
+        Nothing is stored if the claim was taken over by a retry after its lease expired.
+
+        Args:
+            claim (IdempotencyKey): The claim returned by `begin`.
+            status_code (int): HTTP status of the response.
+            response (dict): Body of the response.
+        """
+        IdempotencyKey.objects.filter(
+            pk=claim.pk, lease_token=claim.lease_token, status=IdempotencyKey.Status.IN_FLIGHT,
+        ).update(
+            status=IdempotencyKey.Status.COMPLETED,
+            status_code=status_code,
+            response=response,
+            expires_at=timezone.now() + timedelta(seconds=cls._ttl),
+        )
+
+    @staticmethod
+    def release(claim: IdempotencyKey) -> None:
+        """
+        Gives up a key whose request failed, so that a retry runs it again.
+
+        Args:
+            claim (IdempotencyKey): The claim returned by `begin`; left alone if taken over since.
+        """
+        IdempotencyKey.objects.filter(
+            pk=claim.pk, lease_token=claim.lease_token, status=IdempotencyKey.Status.IN_FLIGHT,
+        ).delete()
+
+    @staticmethod
+    def purge_expired() -> int:
+        """
+        Deletes keys past their replay period and claims abandoned by dead workers.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
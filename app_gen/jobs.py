@@ -0,0 +1,193 @@
+import uuid
+from dataclasses import asdict
+from datetime import timedelta
+
+from decouple import config
+
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from app_gen.cache import CacheMode
+from app_gen.exceptions import FailedDependencyException, ProviderBusyException
+from app_gen.messages import GenMessages
+from app_gen.models import GenerationJob
+from app_gen.services import GENData, GENServices
+
+from core.messages import CoreMessages
+
+import logging
+logger = logging.getLogger(__name__)
+
+class GENJobServices:
+    """
+    Service layer for queued (submit/poll) content generation.
+
+    Submitting only inserts a `GenerationJob` row, so the HTTP request returns immediately.
+    Worker processes claim jobs straight from Postgres with `FOR UPDATE SKIP LOCKED` and run
+    `GENServices.generate`, retrying failures with exponential backoff until `max_attempts`.
+    """
+    #: Attempts (including the first one) before a job is marked as failed.
+    _max_attempts: int = config("GEN_JOB_MAX_ATTEMPTS", default=3, cast=int)
+    #: How long a claim stays valid; must comfortably exceed `OPENAI_TIMEOUT`.
+    _lease_seconds: int = config("GEN_JOB_LEASE_SECONDS", default=300, cast=int)
+    #: Delay before the first retry; doubles on each subsequent attempt.
+    _retry_backoff: int = config("GEN_JOB_RETRY_BACKOFF", default=30, cast=int)
+
+    @classmethod
+    def submit(cls, data: GENData, user: User, cache_mode: CacheMode = CacheMode.USE) -> dict[str, str]:
+        """
+        Queues a generation request.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+            user (User): The Django user submitting the job.
+            cache_mode (CacheMode): Cache behaviour applied when the job runs.
+
+        Returns:
+            dict[str, str]: The job id and its initial status.
+        """
+        job = GenerationJob.objects.create(
+            payload=asdict(data),
+            cache_mode=cache_mode.value,
+            max_attempts=cls._max_attempts,
+            created_by=user,
+        )
+        return {"job_id": str(job.pk), "status": job.status}
+
+    @staticmethod
+    def get_job(job_id: uuid.UUID, user: User) -> dict:
+        """
+        Returns the status of a job and, once finished, its result or error.
+
+        Args:
+            job_id (uuid.UUID): Id returned by `submit`.
+            user (User): The requesting user; jobs are only visible to their creator.
+
+        Returns:
+            dict: Job status, attempt count, timestamps and result/error.
+
+        Raises:
+            GenerationJob.DoesNotExist: If no job with that id belongs to the user.
+        """
+        job = GenerationJob.objects.get(pk=job_id, created_by=user)
+        payload = {
+            "job_id": str(job.pk),
+            "status": job.status,
+            "attempts": job.attempts,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+        if job.status == GenerationJob.Status.SUCCEEDED:
+            payload["result"] = job.result
+        elif job.status == GenerationJob.Status.FAILED:
+            payload["message"] = job.error
+        return payload
+
+    @classmethod
+    def claim(cls, limit: int) -> list[GenerationJob]:
+        """
+        Atomically claims up to `limit` runnable jobs for the calling worker.
+
+        Runnable jobs are pending ones whose backoff has elapsed and running ones whose lease
+        expired (their worker crashed). Rows locked by other workers are skipped rather than
+        waited on, so any number of workers can poll concurrently. Expired jobs that already used
+        all their attempts are marked as failed instead.
+
+        Args:
+            limit (int): Maximum number of jobs to claim.
+
+        Returns:
+            list[GenerationJob]: The claimed jobs, each with a fresh `lease_token`.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            GenerationJob.objects.filter(
+                status=GenerationJob.Status.RUNNING,
+                lease_expires_at__lte=now,
+                attempts__gte=F("max_attempts"),
+            ).update(status=GenerationJob.Status.FAILED, error=GenMessages.JOB_LEASE_EXPIRED, finished_at=now)
+
+            jobs = list(
+                # Only the job rows: locking the joined `auth_user` rows would block the user and
+                # make other workers skip every job of a user whose row is locked.
+                GenerationJob.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(
+                    Q(status=GenerationJob.Status.PENDING, available_at__lte=now)
+                    | Q(status=GenerationJob.Status.RUNNING, lease_expires_at__lte=now)
+                )
+                .select_related("created_by")
+                .order_by("available_at")[:limit]
+            )
+            for job in jobs:
+                job.status = GenerationJob.Status.RUNNING
+                job.attempts += 1
+                job.lease_token = uuid.uuid4()
+                job.lease_expires_at = now + timedelta(seconds=cls._lease_seconds)
+            GenerationJob.objects.bulk_update(jobs, ["status", "attempts", "lease_token", "lease_expires_at"])
+        return jobs
+
+    @classmethod
+    def run(cls, job: GenerationJob) -> None:
+        """
+        Executes a claimed job and records its outcome.
+
+        Meant to run in a worker thread; the thread's DB connection is released afterwards.
+        Outcomes are only written while the job still carries this claim's `lease_token`, so a
+        worker whose lease expired cannot overwrite the work of the one that reclaimed the job.
+
+        Args:
+            job (GenerationJob): A job returned by `claim`.
+        """
+        try:
+            payload = GENServices.generate(GENData(**job.payload), job.created_by, CacheMode(job.cache_mode))
+        except ProviderBusyException:
+            logger.info(GenMessages.PROVIDER_BUSY)
+            cls._fail(job, GenMessages.PROVIDER_BUSY)
+        except FailedDependencyException:
+            logger.info(GenMessages.FAILED_DEPENDENCY)
+            cls._fail(job, GenMessages.FAILED_DEPENDENCY)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True)
+            cls._fail(job, CoreMessages.INTERNAL_SERVER_ERROR)
+        else:
+            GenerationJob.objects.filter(pk=job.pk, lease_token=job.lease_token).update(
+                status=GenerationJob.Status.SUCCEEDED,
+                result=payload,
+                error="",
+                lease_token=None,
+                lease_expires_at=None,
+                finished_at=timezone.now(),
+            )
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def _fail(cls, job: GenerationJob, error: str) -> None:
+        """
+        Schedules a retry with exponential backoff, or marks the job failed if out of attempts.
+
+        Args:
+            job (GenerationJob): The job whose attempt failed.
+            error (str): Message exposed to the job owner.
+        """
+        now = timezone.now()
+        jobs = GenerationJob.objects.filter(pk=job.pk, lease_token=job.lease_token)
+        if job.attempts >= job.max_attempts:
+            jobs.update(
+                status=GenerationJob.Status.FAILED,
+                error=error,
+                lease_token=None,
+                lease_expires_at=None,
+                finished_at=now,
+            )
+        else:
+            delay = cls._retry_backoff * 2 ** (job.attempts - 1)
+            jobs.update(
+                status=GenerationJob.Status.PENDING,
+                error=error,
+                available_at=now + timedelta(seconds=delay),
+                lease_token=None,
+                lease_expires_at=None,
+            )
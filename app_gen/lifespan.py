@@ -0,0 +1,39 @@
+from asgiref.sync import sync_to_async
+
+from app_gen.client import GENClient
+from app_gen.logwriter import GENLogWriter
+
+def lifespan(app):
+    """
+    Wraps the Django ASGI application to handle the ASGI `lifespan` protocol.
+
+    Django only speaks HTTP, so worker startup and shutdown events are answered here: on startup
+    the OpenAI connection pools are warmed up on the serving event loop, and on shutdown buffered
+    generation logs are flushed and the pools are closed cleanly. Every other scope is forwarded
+    to Django untouched.
+
+    Args:
+        app: The Django ASGI application.
+
+    Returns:
+        The wrapped ASGI application.
+    """
+    async def application(scope, receive, send) -> None:
+        if scope["type"] != "lifespan":
+            await app(scope, receive, send)
+            return
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await GENClient.awarm_up()
+                # The sync client serves DRF views running in worker threads.
+                await sync_to_async(GENClient.warm_up, thread_sensitive=False)()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await sync_to_async(GENLogWriter.drain, thread_sensitive=False)()
+                await GENClient.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    return application
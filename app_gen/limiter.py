@@ -0,0 +1,346 @@
+import asyncio
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from decouple import config
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from app_gen.exceptions import ProviderBusyException
+from app_gen.models import ProviderSlot, ProviderWaiter
+
+class GENConcurrencyLimiter:
+    """
+    Limits the provider calls in flight across every worker and pod, queueing the rest fairly.
+
+    The OpenAI account has one concurrency and TPM ceiling for the whole deployment, so a call
+    must hold one of `GEN_PROVIDER_CONCURRENCY` rows of `ProviderSlot`, claimed with
+    `SELECT ... FOR UPDATE SKIP LOCKED` so that two workers never take the same one. Without a
+    free slot, the request joins the `ProviderWaiter` queue and polls it for up to
+    `GEN_PROVIDER_QUEUE_WAIT` seconds.
+
+    The queue is fair per user rather than first come, first served: each waiter is ranked by the
+    slots its user already holds plus its place among that user's waiters, then by arrival, and
+    only the waiters ranked before the number of free slots may take one. A user with many calls
+    in flight therefore waits behind users with none, and cannot starve them. When the queue
+    already holds `GEN_PROVIDER_QUEUE_SIZE` waiters, or `GEN_PROVIDER_QUEUE_PER_USER` of the
+    user's, the request is rejected at once, so workers are not tied up waiting.
+
+    Slots are held for a lease of `GEN_PROVIDER_SLOT_LEASE` seconds, after which the slot of a
+    worker that died mid-call becomes free again. `GEN_PROVIDER_CONCURRENCY=0` disables the limit.
+    """
+    #: Provider calls allowed at once across every worker; 0 disables the limit.
+    _concurrency: int = config("GEN_PROVIDER_CONCURRENCY", default=0, cast=int)
+    #: Requests allowed to wait for a slot, across every worker.
+    _queue_size: int = config("GEN_PROVIDER_QUEUE_SIZE", default=50, cast=int)
+    #: Requests of a single user allowed to wait for a slot.
+    _queue_per_user: int = config("GEN_PROVIDER_QUEUE_PER_USER", default=5, cast=int)
+    #: Seconds a request waits for a slot before giving up.
+    _wait: float = config("GEN_PROVIDER_QUEUE_WAIT", default=10.0, cast=float)
+    #: Seconds a slot is held at most; must exceed the longest generation.
+    _lease: int = config("GEN_PROVIDER_SLOT_LEASE", default=300, cast=int)
+    #: Seconds clients are told to wait before retrying a rejected request.
+    _retry_after: int = config("GEN_PROVIDER_RETRY_AFTER", default=5, cast=int)
+    #: Mean seconds between polls of a waiting request.
+    _poll_interval: float = 0.2
+    #: Seconds after which a waiter that stopped polling is ignored.
+    _stale_after: float = 5.0
+
+    _lock = threading.Lock()
+    _slots_ready: bool = False
+    _stats: dict[str, int] = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        Tells whether provider calls are limited.
+
+        Returns:
+            bool: True when `GEN_PROVIDER_CONCURRENCY` is positive.
+        """
+        return cls._concurrency > 0
+
+    @classmethod
+    def acquire(cls, user: User) -> uuid.UUID | None:
+        """
+        Takes a provider slot for a request, waiting for its turn in the fair queue if needed.
+
+        Args:
+            user (User): The user the provider call is made for.
+
+        Returns:
+            uuid.UUID | None: Token of the slot, to be given to `release` once the call is over,
+                              or `None` when the limit is disabled.
+
+        Raises:
+            ProviderBusyException: If the queue is full or no slot was granted within the wait.
+        """
+        if not cls.enabled():
+            return None
+        cls._ensure_slots()
+        token = cls._admit(user, None)
+        if token is not None:
+            cls._count("admitted")
+            return token
+
+        waiter = cls._enqueue(user)
+        deadline = time.monotonic() + cls._wait
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(cls._poll_delay())
+                token = cls._admit(user, waiter)
+                if token is not None:
+                    cls._count("admitted")
+                    return token
+        finally:
+            if token is None:
+                ProviderWaiter.objects.filter(pk=waiter.pk).delete()
+        cls._count("timed_out")
+        raise ProviderBusyException(cls._retry_after)
+
+    @classmethod
+    async def aacquire(cls, user: User) -> uuid.UUID | None:
+        """
+        Asynchronous counterpart of `acquire`.
+        """
+        if not cls.enabled():
+            return None
+        await sync_to_async(cls._ensure_slots)()
+        token = await sync_to_async(cls._admit)(user, None)
+        if token is not None:
+            cls._count("admitted")
+            return token
+
+        waiter = await sync_to_async(cls._enqueue)(user)
+        deadline = time.monotonic() + cls._wait
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(cls._poll_delay())
+                token = await sync_to_async(cls._admit)(user, waiter)
+                if token is not None:
+                    cls._count("admitted")
+                    return token
+        finally:
+            if token is None:
+                await ProviderWaiter.objects.filter(pk=waiter.pk).adelete()
+        cls._count("timed_out")
+        raise ProviderBusyException(cls._retry_after)
+
+    @classmethod
+    def reserve(cls, user: User) -> Callable[[], None] | None:
+        """
+        Takes a slot without waiting, for an extra call such as a hedge of `GENHedge`.
+
+        The request is ranked as a newcomer, so it only gets a slot that no waiter is due for.
+
+        Args:
+            user (User): The user the call is made for.
+
+        Returns:
+            Callable[[], None] | None: Frees the slot (from any thread), or `None` if none is free.
+        """
+        if not cls.enabled():
+            return lambda: None
+        token = cls._admit(user, None)
+        if token is None:
+            return None
+        owner = threading.current_thread()
+
+        def release() -> None:
+            cls.release(token)
+            if threading.current_thread() is not owner:
+                # Freed by a pool thread when a background call ends: drop that thread's connection.
+                connection.close()
+
+        return release
+
+    @classmethod
+    async def areserve(cls, user: User) -> Callable[[], Awaitable[None]] | None:
+        """
+        Asynchronous counterpart of `reserve`.
+        """
+        if not cls.enabled():
+            return lambda: cls.arelease(None)
+        token = await sync_to_async(cls._admit)(user, None)
+        if token is None:
+            return None
+        return lambda: cls.arelease(token)
+
+    @staticmethod
+    def release(token: uuid.UUID | None) -> None:
+        """
+        Frees the slot taken by `acquire`.
+
+        Args:
+            token (uuid.UUID | None): Token returned by `acquire`.
+        """
+        if token is not None:
+            ProviderSlot.objects.filter(token=token).update(token=None, user=None, lease_expires_at=None)
+
+    @staticmethod
+    async def arelease(token: uuid.UUID | None) -> None:
+        """
+        Asynchronous counterpart of `release`.
+        """
+        if token is not None:
+            await ProviderSlot.objects.filter(token=token).aupdate(token=None, user=None, lease_expires_at=None)
+
+    @classmethod
+    @contextmanager
+    def slot(cls, user: User) -> Iterator[None]:
+        """
+        Holds a provider slot for the duration of a `with` block.
+
+        Args:
+            user (User): The user the provider call is made for.
+
+        Raises:
+            ProviderBusyException: If the queue is full or no slot was granted within the wait.
+        """
+        token = cls.acquire(user)
+        try:
+            yield
+        finally:
+            cls.release(token)
+
+    @classmethod
+    @asynccontextmanager
+    async def aslot(cls, user: User) -> AsyncIterator[None]:
+        """
+        Asynchronous counterpart of `slot`.
+        """
+        token = await cls.aacquire(user)
+        try:
+            yield
+        finally:
+            await cls.arelease(token)
+
+    @classmethod
+    def stats(cls) -> dict[str, bool | int]:
+        """
+        Describes the limiter, for operators.
+
+        Returns:
+            dict[str, bool | int]: Whether it is enabled, the slots in use and requests waiting
+                                   across every worker, and how many requests this process
+                                   admitted, queued, rejected with a full queue and timed out.
+        """
+        with cls._lock:
+            counters = dict(cls._stats)
+        if not cls.enabled():
+            return {"enabled": False, **counters}
+        now = timezone.now()
+        return {
+            "enabled": True,
+            "concurrency": cls._concurrency,
+            "in_use": ProviderSlot.objects.filter(
+                number__lt=cls._concurrency, token__isnull=False, lease_expires_at__gt=now,
+            ).count(),
+            "waiting": ProviderWaiter.objects.filter(seen_at__gt=now - timedelta(seconds=cls._stale_after)).count(),
+            **counters,
+        }
+
+    @classmethod
+    def _admit(cls, user: User, waiter: ProviderWaiter | None) -> uuid.UUID | None:
+        """
+        Takes a free slot if the request's turn has come, or refreshes its place in the queue.
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            rank = cls._rank(user.pk, waiter.pk if waiter is not None else None, now)
+            available = Q(token__isnull=True) | Q(lease_expires_at__lte=now)
+            # Slots being taken by other workers are skipped rather than waited for.
+            free = list(
+                ProviderSlot.objects
+                .select_for_update(skip_locked=True)
+                .filter(available, number__lt=cls._concurrency)
+                .order_by("number")[:rank + 1]
+            )
+            token = uuid.uuid4()
+            # The claim re-checks the slot, for databases without row locks.
+            if len(free) <= rank or not ProviderSlot.objects.filter(available, pk=free[0].pk).update(
+                token=token, user=user, lease_expires_at=now + timedelta(seconds=cls._lease),
+            ):
+                if waiter is not None:
+                    ProviderWaiter.objects.filter(pk=waiter.pk).update(seen_at=now)
+                return None
+            if waiter is not None:
+                ProviderWaiter.objects.filter(pk=waiter.pk).delete()
+            return token
+
+    @classmethod
+    def _rank(cls, user_id: int, waiter_id: int | None, now) -> int:
+        """
+        Counts the live waiters served before a request; `waiter_id` is `None` for a newcomer.
+        """
+        live = list(
+            ProviderWaiter.objects
+            .filter(seen_at__gt=now - timedelta(seconds=cls._stale_after))
+            .order_by("enqueued_at", "id")
+            .values_list("id", "user_id")
+        )
+        held = Counter(
+            ProviderSlot.objects
+            .filter(number__lt=cls._concurrency, token__isnull=False, lease_expires_at__gt=now)
+            .values_list("user_id", flat=True)
+        )
+
+        turns: Counter = Counter()
+        keys: dict[int, tuple[int, int]] = {}
+        for position, (pk, owner) in enumerate(live):
+            turns[owner] += 1
+            keys[pk] = (held[owner] + turns[owner], position)
+        # A newcomer, or a waiter whose row was purged, is served after every live waiter of its user.
+        mine = keys.get(waiter_id) or (held[user_id] + turns[user_id] + 1, len(live))
+        return sum(1 for key in keys.values() if key < mine)
+
+    @classmethod
+    def _enqueue(cls, user: User) -> ProviderWaiter:
+        """
+        Adds a request to the queue, or rejects it when the queue is full.
+        """
+        stale = timezone.now() - timedelta(seconds=cls._stale_after)
+        ProviderWaiter.objects.filter(seen_at__lte=stale).delete()
+        waiting = ProviderWaiter.objects.aggregate(total=Count("id"), mine=Count("id", filter=Q(user=user)))
+        if waiting["total"] >= cls._queue_size or waiting["mine"] >= cls._queue_per_user:
+            cls._count("rejected")
+            raise ProviderBusyException(cls._retry_after)
+        cls._count("queued")
+        return ProviderWaiter.objects.create(user=user)
+
+    @classmethod
+    def _ensure_slots(cls) -> None:
+        """
+        Creates the slot rows missing for the configured concurrency, once per process.
+        """
+        if cls._slots_ready:
+            return
+        ProviderSlot.objects.bulk_create(
+            [ProviderSlot(number=number) for number in range(cls._concurrency)], ignore_conflicts=True,
+        )
+        cls._slots_ready = True
+
+    @classmethod
+    def _poll_delay(cls) -> float:
+        """
+        Returns a jittered poll interval, so waiters of different workers do not poll in lockstep.
+        """
+        return cls._poll_interval * random.uniform(0.5, 1.5)
+
+    @classmethod
+    def _count(cls, counter: str) -> None:
+        """
+        Increments a counter of `stats`.
+        """
+        with cls._lock:
+            cls._stats[counter] += 1
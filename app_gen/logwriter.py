@@ -0,0 +1,288 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from decouple import config
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from app_gen.analytics import GENAnalytics
+from app_gen.content import GENContentStore
+from app_gen.models import ContentGenerationLog
+from app_gen.search import GENSearch
+
+import logging
+logger = logging.getLogger(__name__)
+
+class GENLogWriter:
+    """
+    Writes `ContentGenerationLog` rows, optionally off the request path.
+
+    By default every row is inserted synchronously, as before. With `GEN_LOG_BUFFERED` enabled,
+    rows are queued in memory and a background thread of each process inserts them with
+    `bulk_create` whenever `GEN_LOG_BATCH_SIZE` rows are waiting or `GEN_LOG_FLUSH_INTERVAL`
+    seconds have passed. Batches that cannot be inserted are spilled to NDJSON files in
+    `GEN_LOG_SPILL_DIR` and replayed after the next successful flush (or by the
+    `replay_generation_logs` command). The queue is drained on graceful shutdown, so recycled
+    workers do not lose rows; only a hard kill can lose the last, unflushed interval.
+    """
+    #: Whether rows are written by the background writer instead of the request.
+    _enabled: bool = config("GEN_LOG_BUFFERED", default=False, cast=bool)
+    #: Rows per `bulk_create`; a full batch is flushed immediately.
+    _batch_size: int = config("GEN_LOG_BATCH_SIZE", default=200, cast=int)
+    #: Maximum seconds a queued row waits before being flushed.
+    _flush_interval: float = config("GEN_LOG_FLUSH_INTERVAL", default=2.0, cast=float)
+    #: Queued rows above which requests write their own rows again (backpressure).
+    _queue_size: int = config("GEN_LOG_QUEUE_SIZE", default=10000, cast=int)
+    #: Directory holding batches that could not be written to the database.
+    _spill_dir: Path = Path(
+        config("GEN_LOG_SPILL_DIR", default=os.path.join(settings.BASE_DIR, "var", "generation_logs"))
+    )
+
+    _lock = threading.Lock()
+    _queue: queue.Queue | None = None
+    _thread: threading.Thread | None = None
+    _stopped = threading.Event()
+    _pid: int | None = None
+    _written: int = 0
+    _spilled: int = 0
+
+    @classmethod
+    def write(cls, record: dict) -> None:
+        """
+        Persists a log row, through the background writer when enabled.
+
+        Args:
+            record (dict): Keyword arguments for `ContentGenerationLog`.
+        """
+        if not cls._enqueue(record):
+            cls._insert([record])
+
+    @classmethod
+    async def awrite(cls, record: dict) -> None:
+        """
+        Asynchronous counterpart of `write`.
+        """
+        if not cls._enqueue(record):
+            await sync_to_async(cls._insert)([record])
+
+    @classmethod
+    async def awrite_many(cls, records: list[dict]) -> None:
+        """
+        Persists several log rows at once, through the background writer when enabled.
+
+        Args:
+            records (list[dict]): Keyword arguments for each `ContentGenerationLog`.
+        """
+        pending = [record for record in records if not cls._enqueue(record)]
+        if pending:
+            await sync_to_async(cls._insert)(pending)
+
+    @classmethod
+    def drain(cls, timeout: float | None = 30.0) -> None:
+        """
+        Stops the background writer after flushing every queued row.
+
+        Rows still queued when `timeout` expires (e.g., the database hangs) are spilled to disk.
+        Later writes go straight to the database.
+
+        Args:
+            timeout (float | None): Seconds to wait for the writer thread.
+        """
+        with cls._lock:
+            cls._stopped.set()
+            thread, pending = cls._thread, cls._queue
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        if pending is not None:
+            leftover: list[dict] = []
+            while True:
+                try:
+                    leftover.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            if leftover:
+                cls._spill(leftover)
+
+    @classmethod
+    def replay_spills(cls, include_claimed: bool = False) -> int:
+        """
+        Inserts the rows of spilled batches and deletes their files.
+
+        Each file is claimed by renaming it, so concurrent workers never replay the same batch.
+
+        Args:
+            include_claimed (bool): Also replay files left claimed by a process that died mid-replay.
+
+        Returns:
+            int: Number of rows inserted.
+        """
+        if not cls._spill_dir.is_dir():
+            return 0
+
+        patterns = ["*.ndjson", "*.replaying"] if include_claimed else ["*.ndjson"]
+        inserted = 0
+        for path in sorted(p for pattern in patterns for p in cls._spill_dir.glob(pattern)):
+            claimed = path.with_name(f"{path.stem}.{os.getpid()}.replaying")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue  # claimed by another process
+
+            with claimed.open(encoding="utf-8") as fh:
+                records = [json.loads(line) for line in fh if line.strip()]
+            for record in records:
+                record["created_at"] = parse_datetime(record["created_at"])
+            try:
+                cls._insert(records)
+            except Exception:
+                claimed.rename(path)
+                raise
+            claimed.unlink()
+            inserted += len(records)
+        return inserted
+
+    @classmethod
+    def stats(cls) -> dict[str, bool | int]:
+        """
+        Returns the background writer counters of the current process.
+
+        Returns:
+            dict[str, bool | int]: Whether buffering is enabled, rows waiting in the queue, rows
+                                   written by the writer and rows spilled to disk.
+        """
+        pending = cls._queue
+        return {
+            "enabled": cls._enabled,
+            "queued": pending.qsize() if pending is not None else 0,
+            "written": cls._written,
+            "spilled": cls._spilled,
+        }
+
+    @classmethod
+    def _enqueue(cls, record: dict) -> bool:
+        """
+        Hands a row to the background writer, starting it on first use.
+
+        Returns:
+            bool: Whether the row was queued; if not, the caller must write it itself.
+        """
+        if not cls._enabled:
+            return False
+        with cls._lock:
+            if cls._stopped.is_set():
+                return False
+            if cls._pid != os.getpid() or cls._thread is None or not cls._thread.is_alive():
+                cls._start()
+            try:
+                cls._queue.put_nowait(record)
+            except queue.Full:
+                return False
+        return True
+
+    @classmethod
+    def _start(cls) -> None:
+        """
+        Starts the writer thread of this process. Must be called with `_lock` held.
+        """
+        if cls._pid != os.getpid():
+            # Forked from a process that already had a writer: start afresh.
+            cls._queue = queue.Queue(maxsize=cls._queue_size)
+            if cls._pid is None:
+                atexit.register(cls.drain)
+            cls._pid = os.getpid()
+        cls._thread = threading.Thread(target=cls._run, name="generation-log-writer", daemon=True)
+        cls._thread.start()
+
+    @classmethod
+    def _run(cls) -> None:
+        """
+        Writer loop: collects batches and flushes them until drained.
+        """
+        try:
+            while not (cls._stopped.is_set() and cls._queue.empty()):
+                batch = cls._collect()
+                if batch:
+                    cls._flush(batch)
+        finally:
+            connection.close()
+
+    @classmethod
+    def _collect(cls) -> list[dict]:
+        """
+        Waits for up to a full batch of rows, or until the flush interval elapses.
+        """
+        batch: list[dict] = []
+        deadline = time.monotonic() + cls._flush_interval
+        while len(batch) < cls._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not cls._stopped.is_set():
+                    batch.append(cls._queue.get(timeout=remaining))
+                else:
+                    batch.append(cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _flush(cls, batch: list[dict]) -> None:
+        """
+        Inserts a batch, spilling it to disk if the database is unavailable.
+        """
+        try:
+            try:
+                cls._insert(batch)
+            except Exception:
+                # Not logged as an error: the DB log handler would fail for the same reason.
+                logger.warning("Could not write %s generation logs; spilling to disk.", len(batch), exc_info=True)
+                cls._spill(batch)
+                return
+            cls._written += len(batch)
+            try:
+                # The database is reachable again: catch up on earlier spills.
+                cls.replay_spills()
+            except Exception:
+                logger.warning("Could not replay spilled generation logs.", exc_info=True)
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def _insert(records: list[dict]) -> None:
+        """
+        Inserts rows, with their texts as deduplicated blobs, and updates the usage rollups
+        atomically, so a failed batch can be retried without duplicates.
+        """
+        logs = [ContentGenerationLog(**record) for record in records]
+        GENSearch.index(logs)
+        with transaction.atomic():
+            GENContentStore.pack(logs)
+            ContentGenerationLog.objects.bulk_create(logs)
+            GENAnalytics.record(records)
+
+    @classmethod
+    def _spill(cls, records: list[dict]) -> None:
+        """
+        Appends rows to a new NDJSON file, renamed into place once complete.
+        """
+        try:
+            cls._spill_dir.mkdir(parents=True, exist_ok=True)
+            name = f"{os.getpid()}-{time.time_ns()}"
+            partial = cls._spill_dir / f"{name}.partial"
+            with partial.open("w", encoding="utf-8") as fh:
+                for record in records:
+                    # Written in full: `DjangoJSONEncoder` would cut `created_at` to milliseconds.
+                    record = {**record, "created_at": record["created_at"].isoformat()}
+                    fh.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+            partial.rename(cls._spill_dir / f"{name}.ndjson")
+            cls._spilled += len(records)
+        except OSError:
+            logger.critical("Lost %s generation logs: could not spill them to disk.", len(records), exc_info=True)
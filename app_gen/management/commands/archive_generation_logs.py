@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_gen.exceptions import LogPartitionException
+from app_gen.partitions import GENLogPartitions
+
+class Command(BaseCommand):
+    """
+    Moves monthly generation log partitions past retention to compressed NDJSON archives.
+
+    Schedule it as a periodic job (e.g., monthly); archives go to `GEN_LOG_ARCHIVE_DIR` and can be
+    loaded back with `restore_generation_logs`.
+    """
+    help = "Detaches generation log partitions older than GEN_LOG_RETENTION_MONTHS and archives them."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--retention-months", type=int, help="Months of logs to keep in the database.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be archived.")
+
+    def handle(self, *args, **options) -> None:
+        try:
+            archived = GENLogPartitions.archive(options["retention_months"], options["dry_run"])
+        except LogPartitionException as e:
+            raise CommandError(str(e))
+        for name, rows, path in archived:
+            self.stdout.write(f"{name}: {rows} rows" + (f" -> {path}" if path else ""))
+        self.stdout.write(self.style.SUCCESS(f"Archived {len(archived)} partitions."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from app_gen.routing import GENRouter
+from app_gen.similarity import GENSimilarCache
+
+class Command(BaseCommand):
+    """
+    Indexes recent generation logs in the near-duplicate cache.
+
+    Run it once after enabling `GEN_SIMILAR_CACHE`, so the cache starts with the responses
+    already generated instead of empty. Only logs of the configured model tiers and of the current
+    version of each prompt template are indexed.
+    """
+    help = "Adds the responses of recent generation logs to the near-duplicate cache index."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--days", type=int, default=7, help="Days of generation logs to index.")
+
+    def handle(self, *args, **options) -> None:
+        created: int = sum(GENSimilarCache.backfill(options["days"], model) for model in GENRouter.models())
+        self.stdout.write(self.style.SUCCESS(f"Indexed {created} generation logs."))
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app_gen.analytics import GENAnalytics
+
+class Command(BaseCommand):
+    """
+    Rebuilds the usage rollups from `ContentGenerationLog`.
+
+    Run it once after deploying the analytics tables, to cover the logs written before them, or
+    for a range of days whose rollups need to be recomputed. Rollups in the range are replaced in
+    a single transaction, so the command can be re-run safely; days before the oldest remaining
+    log, such as archived months, are left untouched.
+    """
+    help = "Recomputes hourly and daily usage rollups from the generation logs."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--since", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day to rebuild, inclusive (YYYY-MM-DD).")
+
+    def handle(self, *args, **options) -> None:
+        written: int = GENAnalytics.rebuild(options["since"], options["until"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} usage rollups."))
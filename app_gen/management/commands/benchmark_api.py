@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import APIBenchmark
+
+class Command(BaseCommand):
+    """
+    Load-tests the login, users and generation endpoints through the WSGI and ASGI entry points.
+
+    Start `run_fake_provider` and point `OPENAI_BASE_URL` at it first, so the generation
+    scenarios neither reach nor bill OpenAI. The run creates (and afterwards deletes) its own
+    users, so use a development or staging database.
+    """
+    help = "Reports p50/p95/p99 latency, throughput and queries per request of the main endpoints."
+
+    def add_arguments(self, parser) -> None:
+        scenarios = list(APIBenchmark.scenarios())
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and interface.")
+        parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at a time.")
+        parser.add_argument("--interfaces", default="wsgi,asgi", help="Comma-separated: wsgi, asgi.")
+        parser.add_argument("--scenarios", default=",".join(scenarios), help=f"Comma-separated: {', '.join(scenarios)}.")
+        parser.add_argument("--output", help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options) -> None:
+        interfaces = [name.strip() for name in options["interfaces"].split(",") if name.strip()]
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(interfaces) - {"wsgi", "asgi"} | set(scenarios) - set(APIBenchmark.scenarios())
+        if unknown:
+            raise CommandError(f"Unknown interfaces or scenarios: {', '.join(sorted(unknown))}.")
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        results = APIBenchmark(options["requests"], options["concurrency"]).run(interfaces, scenarios)
+
+        self.stdout.write(
+            f"{'interface':<10}{'scenario':<18}{'reqs':>6}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['interface']:<10}{result['scenario']:<18}{result['requests']:>6}{result['errors']:>8}"
+                f"{result['throughput']:>9}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+                f"{result['queries_per_request']:>9}"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Benchmarked {len(results)} scenario runs."))
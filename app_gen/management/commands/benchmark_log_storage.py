@@ -0,0 +1,123 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from app_gen.content import GENContentStore
+from app_gen.models import ContentBlob, ContentGenerationLog
+
+class Command(BaseCommand):
+    """
+    Compares inline and blob storage of generation log texts on the configured database.
+
+    Synthetic logs with the repetition of real traffic (few distinct objectives and return
+    formats, repeated data, a share of replayed responses) are inserted both ways, then scanned
+    with and without their texts. Everything runs in a transaction that is rolled back, so the
+    command leaves no rows behind.
+    """
+    help = "Benchmarks storage size and insert/scan time of inline versus deduplicated log texts."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--rows", type=int, default=5000, help="Synthetic logs inserted each way.")
+        parser.add_argument("--distinct", type=int, default=50, help="Distinct objectives and data texts.")
+        parser.add_argument("--repeat-ratio", type=float, default=0.3, help="Share of responses that repeat an earlier one.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+
+    def handle(self, *args, **options) -> None:
+        records = self._records(options["rows"], options["distinct"], options["repeat_ratio"], options["seed"])
+        inline_bytes = sum(len(record[field].encode("utf-8")) for record in records for field in GENContentStore.FIELDS)
+
+        with transaction.atomic():
+            user = User.objects.create(username=f"benchmark-{time.time_ns()}")
+            for record in records:
+                record["created_by_id"] = user.pk
+
+            started = time.perf_counter()
+            inline = ContentGenerationLog.objects.bulk_create(
+                [ContentGenerationLog(**record) for record in records], batch_size=500,
+            )
+            inline_insert = time.perf_counter() - started
+
+            packed_since = timezone.now()
+            started = time.perf_counter()
+            logs = [ContentGenerationLog(**record) for record in records]
+            GENContentStore.pack(logs)
+            packed = ContentGenerationLog.objects.bulk_create(logs, batch_size=500)
+            packed_insert = time.perf_counter() - started
+
+            blob_contents = list(ContentBlob.objects.filter(created_at__gte=packed_since).values_list("content", flat=True))
+            blob_bytes = sum(len(content) for content in blob_contents)
+            reference_bytes = 64 * len(GENContentStore.FIELDS) * len(packed)
+
+            mine = ContentGenerationLog.objects.filter(created_by=user)
+            inline_logs = mine.filter(id__lte=inline[-1].id)
+            packed_logs = mine.filter(id__gte=packed[0].id)
+            metadata = ("model_used", "prompt_tokens", "completion_tokens", "created_at")
+            scans = {
+                "metadata": (
+                    self._time(lambda: list(inline_logs.values_list(*metadata))),
+                    self._time(lambda: list(packed_logs.values_list(*metadata))),
+                ),
+                "full content": (
+                    self._time(lambda: list(inline_logs)),
+                    self._time(lambda: GENContentStore.unpack(list(packed_logs))),
+                ),
+            }
+            # Nothing is committed, so the store does not remember these blobs either.
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Rows: {len(records)}, distinct blobs: {len(blob_contents)}")
+        self.stdout.write(f"Text bytes: inline {inline_bytes:,}, blobs {blob_bytes:,} + references {reference_bytes:,}")
+        self.stdout.write(f"Insert: inline {inline_insert * 1000:.1f} ms, blobs {packed_insert * 1000:.1f} ms")
+        for name, (inline_scan, packed_scan) in scans.items():
+            self.stdout.write(f"Scan ({name}): inline {inline_scan * 1000:.1f} ms, blobs {packed_scan * 1000:.1f} ms")
+        saved = 1 - (blob_bytes + reference_bytes) / inline_bytes if inline_bytes else 0
+        self.stdout.write(self.style.SUCCESS(f"Text storage reduced by {saved:.0%}."))
+
+    @staticmethod
+    def _records(rows: int, distinct: int, repeat_ratio: float, seed: int) -> list[dict]:
+        """
+        Builds synthetic log rows with realistic text sizes and repetition.
+        """
+        rng = random.Random(seed)
+        words = [f"palavra{i}" for i in range(2000)]
+
+        def text(length: int) -> str:
+            return " ".join(rng.choice(words) for _ in range(length))
+
+        objectives = [text(rng.randint(10, 40)) for _ in range(distinct)]
+        data = [text(rng.randint(50, 400)) for _ in range(distinct)]
+        formats = ["json", "markdown", "texto corrido", "lista de tópicos"]
+        responses: list[str] = []
+        records: list[dict] = []
+        for _ in range(rows):
+            if responses and rng.random() < repeat_ratio:
+                response = rng.choice(responses)
+            else:
+                response = text(rng.randint(100, 800))
+                responses.append(response)
+            records.append({
+                "title": text(5),
+                "objective": rng.choice(objectives),
+                "data": rng.choice(data),
+                "return_format": rng.choice(formats),
+                "response": response,
+                "model_used": "benchmark",
+                "temperature": 0.7,
+                "prompt_tokens": rng.randint(50, 500),
+                "completion_tokens": rng.randint(100, 1000),
+                "created_at": timezone.now(),
+            })
+        return records
+
+    @staticmethod
+    def _time(operation) -> float:
+        """
+        Returns the seconds an operation takes.
+        """
+        started = time.perf_counter()
+        operation()
+        return time.perf_counter() - started
@@ -0,0 +1,111 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from app_gen.messages import GenMessages
+from app_gen.models import ContentGenerationLog
+from app_gen.search import GENSearch, SearchParams
+
+class Command(BaseCommand):
+    """
+    Compares full-text search with a naive `icontains` scan over the generation logs.
+
+    Synthetic logs whose words follow a Zipf distribution are inserted for a single user, indexed
+    for search as production rows are, and kept inline so the naive scan can read them (with texts
+    in `ContentBlob`, a naive scan is not even possible in SQL, so this is its best case). Each
+    term is then searched both ways, from a frequent to the rarest word. Everything runs in a
+    transaction that is rolled back, so the command leaves no rows behind; it needs PostgreSQL and
+    room for the rows in the database.
+    """
+    help = "Benchmarks full-text search against an icontains scan over synthetic generation logs."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--rows", type=int, default=1000000, help="Synthetic logs inserted.")
+        parser.add_argument("--distinct", type=int, default=20000, help="Distinct data and response texts.")
+        parser.add_argument("--vocabulary", type=int, default=5000, help="Distinct words of the texts.")
+        parser.add_argument("--limit", type=int, default=20, help="Results fetched per search.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs of each search; the median is reported.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+
+    def handle(self, *args, **options) -> None:
+        if not GENSearch.enabled():
+            raise CommandError(GenMessages.NO_SEARCH)
+        rng = random.Random(options["seed"])
+        words = [f"palavra{i}" for i in range(options["vocabulary"])]
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+        def text(length: int) -> str:
+            return " ".join(rng.choices(words, cum_weights=cum_weights, k=length))
+
+        data = [text(rng.randint(20, 120)) for _ in range(options["distinct"])]
+        responses = [text(rng.randint(50, 300)) for _ in range(options["distinct"])]
+        terms = [words[0], words[len(words) // 10], words[len(words) // 2], words[-1]]
+
+        with transaction.atomic():
+            user = User.objects.create(username=f"benchmark-{time.time_ns()}")
+            started = time.perf_counter()
+            for start in range(0, options["rows"], 5000):
+                logs = [
+                    ContentGenerationLog(
+                        title=text(5),
+                        objective=text(15),
+                        data=rng.choice(data),
+                        return_format="markdown",
+                        response=rng.choice(responses),
+                        model_used="benchmark",
+                        temperature=0.7,
+                        prompt_tokens=0,
+                        completion_tokens=0,
+                        created_by=user,
+                        created_at=timezone.now(),
+                    )
+                    for _ in range(min(5000, options["rows"] - start))
+                ]
+                GENSearch.index(logs)
+                ContentGenerationLog.objects.bulk_create(logs)
+            insert = time.perf_counter() - started
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(ContentGenerationLog._meta.db_table)}")
+
+            mine = ContentGenerationLog.objects.filter(created_by=user)
+            results = []
+            for term in terms:
+                naive = mine.filter(Q(data__icontains=term) | Q(response__icontains=term)).order_by("-created_at")
+                params = SearchParams(q=term, limit=options["limit"])
+                results.append((
+                    term,
+                    naive.count(),
+                    self._median(lambda: list(naive.values_list("id", "title")[:options["limit"]]), options["repeat"]),
+                    self._median(lambda: GENSearch.search(user, params), options["repeat"]),
+                ))
+            plan = mine.filter(search_vector=GENSearch.query(terms[-1])).explain()
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Rows: {options['rows']:,}, inserted and indexed in {insert:.1f} s")
+        for term, matches, naive_seconds, search_seconds in results:
+            self.stdout.write(
+                f"{term} ({matches:,} matches): icontains {naive_seconds * 1000:.1f} ms, "
+                f"full-text {search_seconds * 1000:.1f} ms ({naive_seconds / search_seconds:.1f}x)"
+            )
+        index_used = "app_gen_log_search_gin" in plan
+        self.stdout.write(f"GIN index used for the rarest term: {'yes' if index_used else 'no'}")
+        self.stdout.write(self.style.SUCCESS("Search benchmark finished."))
+
+    @staticmethod
+    def _median(operation, repeat: int) -> float:
+        """
+        Returns the median seconds an operation takes.
+        """
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app_gen.analytics import GENAnalytics
+
+class Command(BaseCommand):
+    """
+    Deletes hourly usage rollups past their retention period, keeping the daily ones.
+
+    Schedule it as a periodic job (e.g., daily) to keep the rollup tables small.
+    """
+    help = "Deletes hourly usage rollups older than GEN_ROLLUP_HOURLY_RETENTION_DAYS."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--retention-days", type=int, help="Days of hourly rollups to keep.")
+
+    def handle(self, *args, **options) -> None:
+        deleted: int = GENAnalytics.compact(options["retention_days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} hourly usage rollups."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app_gen.content import GENContentStore
+
+class Command(BaseCommand):
+    """
+    Moves the prompt and response texts of existing generation logs into content blobs.
+
+    Run it once after deploying the blob table; logs written since then already reference blobs.
+    Each batch is converted in its own transaction, so the command can be interrupted and re-run.
+    """
+    help = "Converts the inline texts of existing generation logs into deduplicated content blobs."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows converted per transaction.")
+
+    def handle(self, *args, **options) -> None:
+        converted: int = GENContentStore.convert(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Converted {converted} generation logs."))
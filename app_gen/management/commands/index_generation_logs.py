@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_gen.exceptions import SearchUnavailableException
+from app_gen.search import GENSearch
+
+class Command(BaseCommand):
+    """
+    Computes the full-text search vector of generation logs written before search existed.
+
+    New logs are indexed as they are inserted. Each batch is a single update, so the command can
+    be interrupted and re-run; it only reads rows that still have no vector.
+    """
+    help = "Indexes existing generation logs for full-text search."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows indexed per statement.")
+
+    def handle(self, *args, **options) -> None:
+        try:
+            indexed: int = GENSearch.reindex(options["batch_size"])
+        except SearchUnavailableException as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} generation logs."))
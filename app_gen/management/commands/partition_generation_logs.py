@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_gen.exceptions import LogPartitionException
+from app_gen.partitions import GENLogPartitions
+
+class Command(BaseCommand):
+    """
+    Partitions the generation log table by month and creates the upcoming partitions.
+
+    The first run converts the existing table, copying every row, under an exclusive lock: run it
+    in a maintenance window. Afterwards, schedule it as a periodic job (e.g., daily) so the next
+    months' partitions always exist.
+    """
+    help = "Converts ContentGenerationLog to monthly partitions and creates the upcoming ones."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--months-ahead", type=int, help="Future months to create partitions for.")
+
+    def handle(self, *args, **options) -> None:
+        try:
+            converted, created = GENLogPartitions.partition(options["months_ahead"])
+        except LogPartitionException as e:
+            raise CommandError(str(e))
+        if converted:
+            self.stdout.write(self.style.SUCCESS("Converted the generation log table to monthly partitions."))
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions: {', '.join(created) or '-'}."))
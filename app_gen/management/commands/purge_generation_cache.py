@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from app_gen.cache import GENCache
+from app_gen.idempotency import GENIdempotency
+from app_gen.similarity import GENSimilarCache
+
+class Command(BaseCommand):
+    """
+    Removes expired rows from the shared generation cache, near-duplicate index and idempotency key tables.
+
+    Expired entries are already ignored (or taken over) on lookup, so this only reclaims storage;
+    schedule it as a periodic job (e.g., daily).
+    """
+    help = "Deletes expired entries from the shared generation response cache, similarity index and idempotency keys."
+
+    def handle(self, *args, **options) -> None:
+        deleted: int = GENCache.purge_expired()
+        similar: int = GENSimilarCache.purge_expired()
+        keys: int = GENIdempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired cache entries, {similar} similarity entries and {keys} idempotency keys."
+        ))
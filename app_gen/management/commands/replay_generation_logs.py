@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from app_gen.logwriter import GENLogWriter
+
+class Command(BaseCommand):
+    """
+    Inserts generation logs that the buffered writer spilled to disk while the database was unavailable.
+
+    Running workers replay spills on their own once the database recovers; this command covers
+    spills left behind by workers that are no longer running.
+    """
+    help = "Replays generation logs spilled to GEN_LOG_SPILL_DIR into the database."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--include-claimed",
+            action="store_true",
+            help="Also replay files claimed by a process that died while replaying them.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        inserted: int = GENLogWriter.replay_spills(include_claimed=options["include_claimed"])
+        self.stdout.write(self.style.SUCCESS(f"Replayed {inserted} generation logs."))
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from app_gen.exceptions import LogPartitionException
+from app_gen.partitions import GENLogPartitions
+
+class Command(BaseCommand):
+    """
+    Loads an archive written by `archive_generation_logs` back into its monthly partition.
+
+    The partition is archived again by the next archival run if it is still past retention.
+    """
+    help = "Restores an archived generation log partition."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("archive", type=Path, help="Path of the .ndjson.gz archive.")
+
+    def handle(self, *args, **options) -> None:
+        try:
+            name, rows = GENLogPartitions.restore(options["archive"])
+        except (LogPartitionException, FileNotFoundError) as e:
+            raise CommandError(str(e))
+        except IntegrityError:
+            raise CommandError("The archive's rows are already in the database.")
+        self.stdout.write(self.style.SUCCESS(f"Restored {rows} rows into {name}."))
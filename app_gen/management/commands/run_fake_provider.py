@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from app_gen.fake_provider import FakeProvider, FakeProviderProfile
+
+class Command(BaseCommand):
+    """
+    Runs a local stand-in for the OpenAI chat-completions API.
+
+    Point the application at it with `OPENAI_BASE_URL=http://<host>:<port>/v1` to develop or
+    load-test (e.g., with `benchmark_api`) without calling, or paying for, the real provider.
+    """
+    help = "Serves a fake OpenAI chat-completions endpoint with configurable latency, errors and token counts."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+        parser.add_argument("--port", type=int, default=8765, help="Port to bind.")
+        parser.add_argument("--latency-median", type=float, default=0.8, help="Median response time, in seconds.")
+        parser.add_argument("--latency-sigma", type=float, default=0.5, help="Spread of the lognormal latency; 0 = constant.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with 500.")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls answered with 429.")
+        parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of calls that hang.")
+        parser.add_argument("--hang-seconds", type=float, default=120.0, help="How long hanging calls hang.")
+        parser.add_argument("--completion-tokens", default="150:600", help="Range of completion tokens per choice (MIN:MAX).")
+        parser.add_argument("--seed", type=int, help="Seed, for reproducible runs.")
+
+    def handle(self, *args, **options) -> None:
+        low, _, high = options["completion_tokens"].partition(":")
+        profile = FakeProviderProfile(
+            latency_median=options["latency_median"],
+            latency_sigma=options["latency_sigma"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            timeout_rate=options["timeout_rate"],
+            hang_seconds=options["hang_seconds"],
+            min_completion_tokens=int(low),
+            max_completion_tokens=int(high or low),
+        )
+        provider = FakeProvider(profile, seed=options["seed"])
+        server = provider.serve(options["host"], options["port"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake provider listening on http://{options['host']}:{options['port']}/v1 (Ctrl+C to stop)."
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served: {provider.stats}")
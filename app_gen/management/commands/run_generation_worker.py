@@ -0,0 +1,53 @@
+import signal
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app_gen.jobs import GENJobServices
+from app_gen.logwriter import GENLogWriter
+
+class Command(BaseCommand):
+    """
+    Long-running worker that processes queued generation jobs.
+
+    Polls `GenerationJob` for runnable rows and executes them in a thread pool. Several workers
+    (processes or pods) can run side by side: claims use `FOR UPDATE SKIP LOCKED`, so each job
+    is handed to exactly one of them. SIGINT/SIGTERM stop the polling and let in-flight jobs finish.
+    """
+    help = "Processes queued generation jobs from the database."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--threads", type=int, default=4, help="Jobs executed concurrently.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options) -> None:
+        threads: int = options["threads"]
+        poll_interval: float = options["poll_interval"]
+        stopping = threading.Event()
+
+        def stop(signum, frame) -> None:
+            stopping.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        in_flight: set[Future] = set()
+        self.stdout.write(f"Generation worker started with {threads} threads.")
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="gen-job") as executor:
+            while not stopping.is_set():
+                in_flight = {future for future in in_flight if not future.done()}
+                free: int = threads - len(in_flight)
+
+                jobs = GENJobServices.claim(free) if free > 0 else []
+                close_old_connections()
+                for job in jobs:
+                    in_flight.add(executor.submit(GENJobServices.run, job))
+
+                if not jobs:
+                    stopping.wait(poll_interval)
+
+        GENLogWriter.drain()
+        self.stdout.write(self.style.SUCCESS("Generation worker stopped."))
@@ -3,4 +3,22 @@ from dataclasses import dataclass
 
 @dataclass(frozen=True)
 class GenMessages:
-    FAILED_DEPENDENCY: str = "Failed to communicate with the OpenAI service." 
\ No newline at end of file
+    FAILED_DEPENDENCY:      str = "Failed to communicate with the OpenAI service."
+    INVALID_CACHE_MODE:     str = "Cache mode must be one of: use, bypass, refresh."
+    JOB_NOT_FOUND:          str = "Generation job not found."
+    JOB_LEASE_EXPIRED:      str = "Generation job was abandoned by its worker too many times."
+    CIRCUIT_OPEN:           str = "The OpenAI service is unhealthy; generation requests are temporarily being rejected."
+    QUOTA_EXCEEDED:         str = "Generation quota exceeded; try again later."
+    PROVIDER_BUSY:          str = "The OpenAI service is at capacity; try again shortly."
+    INVALID_USAGE_RANGE:    str = "`start` must not be after `end`."
+    INVALID_GROUP_BY:       str = "group_by must be a comma-separated list of: user, model, bucket."
+    INVALID_HISTORY_CURSOR: str = "Invalid history cursor; use the `next_cursor` of the previous page."
+    GENERATION_NOT_FOUND:   str = "Generation not found."
+    NO_SEARCH:              str = "Full-text search requires PostgreSQL."
+    BAD_IDEMPOTENCY_KEY:    str = "Idempotency-Key must have between 1 and 255 characters."
+    IDEMPOTENCY_KEY_REUSED: str = "This Idempotency-Key was already used with a different request."
+    IDEMPOTENCY_IN_FLIGHT:  str = "A request with this Idempotency-Key is still being processed; retry shortly."
+    NO_PARTITIONING:        str = "Log partitioning requires PostgreSQL."
+    LOGS_NOT_PARTITIONED:   str = "The generation log table is not partitioned; run partition_generation_logs first."
+    INVALID_LOG_ARCHIVE:    str = "Not a generation log partition archive."
+    UNSAFE_LOG_MIGRATION:   str = "Migration {migration} cannot apply '{operation}' to the partitioned generation log table; write it with SeparateDatabaseAndState."
\ No newline at end of file
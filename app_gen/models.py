@@ -1,18 +1,271 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+class ContentBlob(models.Model):
+    """
+    Content-addressed text shared by every `ContentGenerationLog` row that contains it.
+
+    Texts at least `GEN_BLOB_COMPRESS_MIN_BYTES` long are stored zlib-compressed when that makes
+    them smaller. Texts are immutable and written through `GENContentStore`, which deletes blobs
+    no longer referenced once their logs are archived.
+    """
+    hash = models.CharField(max_length=64, primary_key=True)    # SHA-256 of the UTF-8 text
+    size = models.PositiveIntegerField()                        # UTF-8 length, before compression
+    compressed = models.BooleanField(default=False)
+    content = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    used_at = models.DateTimeField(default=timezone.now)        # last time a writer stored it
 
 class ContentGenerationLog(models.Model):
     title = models.CharField(max_length=200)
-    objective = models.TextField()
-    data = models.TextField()
-    return_format = models.CharField(max_length=200)
-    response = models.TextField()
+    # The prompt and response texts live in `ContentBlob`; the inline columns only hold rows
+    # written before it, until `convert_generation_log_content` moves them.
+    objective = models.TextField(null=True, blank=True)
+    data = models.TextField(null=True, blank=True)
+    return_format = models.CharField(max_length=200, null=True, blank=True)
+    response = models.TextField(null=True, blank=True)
+    alternatives = models.TextField(null=True, blank=True)      # JSON list of the candidates after the first
+    # No constraint or index: blobs are only ever looked up by hash, and deleted once unreferenced.
+    objective_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    data_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    return_format_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    response_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    alternatives_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    candidates = models.PositiveSmallIntegerField(default=1)   # choices requested in the single provider call
     model_used = models.CharField(max_length=100)
     temperature = models.FloatField()
     prompt_tokens = models.IntegerField()
     completion_tokens = models.IntegerField()
+    cached_tokens = models.IntegerField(default=0)  # prompt tokens served from the provider's prompt cache
+    prompt_template = models.CharField(max_length=60, blank=True)  # `PromptTemplate.label`, e.g. "pdi@1"
+    # Route chosen by `GENRouter`; `model_used` differs from `routed_model` after a fallback.
+    routed_model = models.CharField(max_length=100, blank=True)
+    route_reason = models.CharField(max_length=20, blank=True)     # "size", "document_type" or "default"
+    estimated_prompt_tokens = models.IntegerField(default=0)       # of the user message, as estimated by the router
+    fallbacks = models.PositiveSmallIntegerField(default=0)        # tiers that failed before `model_used` answered
+    max_tokens = models.IntegerField(default=0)                    # output budget of each call, see `GENTokenBudget`; 0 = none
+    continuations = models.PositiveSmallIntegerField(default=0)    # calls that finished an answer cut by the budget
+    truncated = models.BooleanField(default=False)                 # still cut after the last continuation
+    cache_hit = models.BooleanField(default=False)
+    coalesced = models.BooleanField(default=False)  # shared another request's provider call
+    # Weighted texts of the row in every `GEN_SEARCH_CONFIGS`, set on insert by `GENSearch`.
+    search_vector = SearchVectorField(null=True, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # generation time, even if inserted later
+
+    class Meta:
+        # On PostgreSQL, `partition_generation_logs` may have replaced the table with one partitioned
+        # by `created_at`, whose primary key is (id, created_at); `migrate` then refuses operations
+        # on the key, unique columns or foreign keys to it (see `GENLogPartitions.check_migrations`).
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),   # also the partition key, see `GENLogPartitions`
+            models.Index(fields=['created_by', '-created_at']),    # keyset pages of `GENHistory`
+            GinIndex(fields=['search_vector'], name='app_gen_log_search_gin'),
+        ]
+
+class GenerationCacheEntry(models.Model):
+    """
+    Shared tier of the generation response cache.
+
+    Every worker process reads and writes this table, so a response generated by one
+    gunicorn worker is reused by all the others until `expires_at`.
+    """
+    key = models.CharField(max_length=64, primary_key=True)  # SHA-256 of the normalized request
+    model = models.CharField(max_length=100)
+    response = models.TextField()
+    alternatives = models.JSONField(default=list, blank=True)  # further candidates, see `GENData.candidates`
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a generation request sent with an `Idempotency-Key` header, shared by every worker.
+
+    The first request with a key claims the row while it runs; retries with the same key and
+    payload get the stored response until `expires_at`, or wait while it is still in flight.
+    """
+    class Status(models.TextChoices):
+        IN_FLIGHT = 'in_flight'
+        COMPLETED = 'completed'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)     # SHA-256 of the request path, cache mode and body
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.IN_FLIGHT)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    lease_token = models.UUIDField(default=uuid.uuid4)  # identifies the current claim, renewed on takeover
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)  # end of the lease while in flight, of the retention once completed
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_user_key'),
+        ]
+
+class GenerationJob(models.Model):
+    """
+    Generation request queued for background processing.
+
+    Jobs are claimed by `run_generation_worker` processes with `SELECT ... FOR UPDATE SKIP LOCKED`,
+    so Postgres itself acts as the queue. A claimed job holds a lease; if its worker dies, the job
+    becomes claimable again once `lease_expires_at` passes, until `max_attempts` is exhausted.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        SUCCEEDED = 'succeeded'
+        FAILED = 'failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    payload = models.JSONField()                       # GENData fields
+    cache_mode = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    available_at = models.DateTimeField(default=timezone.now)   # not claimable before this (retry backoff)
+    lease_token = models.UUIDField(null=True, blank=True)       # identifies the current claim
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+class ProviderCircuit(models.Model):
+    """
+    Shared state of the provider circuit breaker.
+
+    The worker that trips the breaker records until when it stays open; every other worker reads
+    this row periodically, so all of them shed load together while the provider is unhealthy.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    opened_until = models.DateTimeField(null=True, blank=True)   # NULL while the circuit is closed
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class ProviderSlot(models.Model):
+    """
+    One of the `GEN_PROVIDER_CONCURRENCY` provider calls allowed at once across every worker.
+
+    A slot is free while `token` is NULL. A worker that dies during a call never frees its slot,
+    so the slot is also free once `lease_expires_at` passes.
+    """
+    number = models.PositiveSmallIntegerField(primary_key=True)
+    token = models.UUIDField(null=True, blank=True)             # identifies the current holder
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+class ProviderWaiter(models.Model):
+    """
+    Generation request waiting for a `ProviderSlot`, in the fair queue of `GENConcurrencyLimiter`.
+
+    Waiters refresh `seen_at` while they poll; rows left behind by dead workers stop being
+    refreshed, are ignored and are eventually deleted.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    seen_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+class UsageQuota(models.Model):
+    """
+    Per-user overrides of the generation limits configured by the `GEN_QUOTA_*` env vars.
+
+    A NULL field falls back to the default limit; 0 means unlimited.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    requests_per_minute = models.PositiveIntegerField(null=True, blank=True)
+    tokens_per_minute = models.PositiveIntegerField(null=True, blank=True)
+    requests_per_day = models.PositiveIntegerField(null=True, blank=True)
+    tokens_per_day = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class UsageCounter(models.Model):
+    """
+    Running request and token counts of a user in the current minute or day.
+
+    There is a single row per user and window: when a new window starts, the next increment
+    resets the counts instead of inserting a row, so quota checks read at most two rows.
+    """
+    class Window(models.TextChoices):
+        MINUTE = 'minute'
+        DAY = 'day'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    window = models.CharField(max_length=6, choices=Window.choices)
+    window_start = models.DateTimeField()
+    requests = models.PositiveIntegerField(default=0)
+    tokens = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'window'], name='usage_counter_user_window'),
+        ]
+
+class UsageRollup(models.Model):
+    """
+    Generation usage of a user and model, aggregated per hour or per local day.
+
+    Updated in the same transaction that inserts `ContentGenerationLog` rows, so usage reports
+    read a few narrow rows instead of scanning the log table.
+    """
+    class Granularity(models.TextChoices):
+        HOUR = 'hour'
+        DAY = 'day'
+
+    granularity = models.CharField(max_length=4, choices=Granularity.choices)
+    bucket = models.DateTimeField()                    # start of the hour / local day
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    model_used = models.CharField(max_length=100)
+    requests = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    cached_tokens = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'bucket', 'user', 'model_used'], name='usage_rollup_bucket_user_model',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'granularity', 'bucket']),
+        ]
+
+class SimilarityEntry(models.Model):
+    """
+    MinHash signature of a generated request, indexed by the near-duplicate cache (`GENSimilarCache`).
+
+    Rows are appended as responses are generated and read incrementally by every worker, which
+    keeps the LSH index in memory; the response itself is the `ContentBlob` shared with the log.
+    """
+    prompt_template = models.CharField(max_length=60)           # `PromptTemplate.label`
+    model_used = models.CharField(max_length=100)               # configured model, part of the lookup scope
+    model = models.CharField(max_length=100)                    # model reported by the provider
+    signature = models.BinaryField()                            # MinHash values, as an array of unsigned 32-bit ints
+    response = models.ForeignKey(
+        ContentBlob, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -0,0 +1,551 @@
+import gzip
+import json
+import os
+import re
+from collections.abc import Iterator
+from datetime import date, datetime
+from pathlib import Path
+
+from decouple import config
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.migrations.operations import (
+    AddField, AddIndex, AlterField, AlterModelOptions, RemoveField, RemoveIndex, RenameField, RenameIndex, RunPython,
+    RunSQL, SeparateDatabaseAndState,
+)
+from django.utils import timezone
+
+from app_gen.content import GENContentStore
+from app_gen.exceptions import LogPartitionException
+from app_gen.messages import GenMessages
+from app_gen.models import ContentGenerationLog, SimilarityEntry
+from app_gen.search import GENSearch
+
+import logging
+logger = logging.getLogger(__name__)
+
+class GENLogPartitions:
+    """
+    Monthly range partitioning and archival of `ContentGenerationLog` on PostgreSQL.
+
+    `partition` converts the table Django created into a table partitioned by `created_at`, with
+    one partition per local month (`<table>_pYYYY_MM`) plus a default partition that catches rows
+    outside every range, and keeps partitions created ahead of time. Queries filtering or ordering
+    by `created_at` then only touch the relevant (recent) partitions.
+
+    `archive` detaches partitions older than the retention period, exports them to gzipped NDJSON
+    files and drops them; `restore` loads such a file back into its monthly partition. Usage
+    rollups are kept, so analytics still cover archived months, while the content blobs that only
+    archived rows referenced are deleted, as the archives hold their texts.
+
+    Django's model state keeps describing the plain table, with `id` as its only primary key, so
+    `check_migrations` refuses the migrations it would get wrong on the partitioned one; those must
+    be written by hand with `SeparateDatabaseAndState`. Queries over recent generations are bounded
+    by `retained_since`, so that they never reach partitions that are about to be archived.
+    """
+    #: Months of logs kept in the database.
+    _retention_months: int = config("GEN_LOG_RETENTION_MONTHS", default=12, cast=int)
+    #: Future monthly partitions kept created in advance.
+    _months_ahead: int = config("GEN_LOG_PARTITIONS_AHEAD", default=3, cast=int)
+    #: Directory receiving the archives of detached partitions.
+    _archive_dir: Path = Path(
+        config("GEN_LOG_ARCHIVE_DIR", default=os.path.join(settings.BASE_DIR, "var", "log_archive"))
+    )
+    #: Rows per statement when exporting or restoring an archive.
+    _batch_size: int = 1000
+
+    _table: str = ContentGenerationLog._meta.db_table
+    #: Operations that apply to the partitioned table as they would to the plain one.
+    _SAFE_OPERATIONS: tuple[type, ...] = (
+        AddField, AlterField, RemoveField, RenameField, AddIndex, RemoveIndex, RenameIndex, AlterModelOptions,
+    )
+    #: Columns of the partitioned primary key, which migrations must not change.
+    _KEY_FIELDS: tuple[str, ...] = ("id", "created_at")
+    #: Temporary table collecting the blobs referenced by the partitions dropped in an `archive` run.
+    _dropped_blobs: str = "gen_dropped_blobs"
+    _PARTITION_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+    @classmethod
+    def partition(cls, months_ahead: int | None = None) -> tuple[bool, list[str]]:
+        """
+        Partitions the log table if needed and creates the upcoming monthly partitions.
+
+        Rows that landed in the default partition get their own monthly partition as well.
+
+        Args:
+            months_ahead (int | None): Future months to create; defaults to `GEN_LOG_PARTITIONS_AHEAD`.
+
+        Returns:
+            tuple[bool, list[str]]: Whether the table was converted, and the partitions created.
+
+        Raises:
+            LogPartitionException: If the database is not PostgreSQL.
+        """
+        cls._require_postgres()
+        ahead = cls._months_ahead if months_ahead is None else months_ahead
+        with transaction.atomic():
+            converted = not cls.is_partitioned()
+            if converted:
+                cls._convert(ahead)
+            created = cls._ensure(ahead)
+        return converted, created
+
+    @classmethod
+    def archive(cls, retention_months: int | None = None, dry_run: bool = False) -> list[tuple[str, int, Path | None]]:
+        """
+        Moves monthly partitions older than the retention period to compressed NDJSON archives.
+
+        Each partition is detached first, so no row can be added while it is exported; the export
+        is checked against the partition's row count before the partition is dropped. If anything
+        fails, the partition is attached again. Once every partition is archived, the content
+        blobs they referenced that no remaining row references are deleted.
+
+        Args:
+            retention_months (int | None): Months to keep; defaults to `GEN_LOG_RETENTION_MONTHS`.
+            dry_run (bool): Only report which partitions would be archived.
+
+        Returns:
+            list[tuple[str, int, Path | None]]: Partition name, row count and archive path (None on dry runs).
+
+        Raises:
+            LogPartitionException: If the database is not PostgreSQL or the table is not partitioned.
+        """
+        cls._require_partitioned()
+        retention = cls._retention_months if retention_months is None else retention_months
+        cutoff = cls._add_months(cls._month_of(timezone.now()), -retention)
+
+        archived: list[tuple[str, int, Path | None]] = []
+        for name in sorted(cls._partitions()):
+            month = cls._parse_month(name)
+            if month is None or month >= cutoff:
+                continue
+            if dry_run:
+                archived.append((name, cls._count(name), None))
+                continue
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {cls._q(cls._table)} DETACH PARTITION {cls._q(name)}")
+            try:
+                path, rows = cls._export(name)
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cls._note_blobs(cursor, name)
+                    cursor.execute(f"DROP TABLE {cls._q(name)}")
+            except Exception:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    start, end = cls._bounds(month)
+                    cursor.execute(
+                        f"ALTER TABLE {cls._q(cls._table)} ATTACH PARTITION {cls._q(name)} FOR VALUES FROM (%s) TO (%s)",
+                        [start.isoformat(), end.isoformat()],
+                    )
+                raise
+            logger.warning("Archived %s rows of %s to %s.", rows, name, path)
+            archived.append((name, rows, path))
+
+        if archived and not dry_run:
+            deleted = cls._collect_blobs()
+            logger.warning("Deleted %s content blobs only referenced by archived rows.", deleted)
+        return archived
+
+    @classmethod
+    def restore(cls, path: Path) -> tuple[str, int]:
+        """
+        Loads an archive back into its monthly partition, creating the partition if needed.
+
+        The partition is archived again by the next `archive` run if it is still past retention.
+
+        Args:
+            path (Path): Archive written by `archive`.
+
+        Returns:
+            tuple[str, int]: The partition name and the number of rows restored.
+
+        Raises:
+            LogPartitionException: If the database is not PostgreSQL, the table is not partitioned
+                                   or the file name is not a partition archive.
+            IntegrityError: If the archive's rows are already in the database.
+        """
+        cls._require_partitioned()
+        name = path.name.split(".", 1)[0]
+        month = cls._parse_month(name)
+        if month is None or not name.startswith(cls._table):
+            raise LogPartitionException(GenMessages.INVALID_LOG_ARCHIVE)
+
+        fields = list(ContentGenerationLog._meta.concrete_fields)
+        restored = 0
+        with transaction.atomic():
+            if name not in cls._partitions():
+                with connection.cursor() as cursor:
+                    cls._add_partition(cursor, month)
+            batch: list[ContentGenerationLog] = []
+            for row in cls._read(path):
+                # Columns added after the archive was written take their defaults; dropped ones are ignored.
+                batch.append(ContentGenerationLog(**{
+                    field.attname: field.to_python(row[field.column]) for field in fields if field.column in row
+                }))
+                if len(batch) >= cls._batch_size:
+                    restored += cls._insert(batch)
+                    batch = []
+            if batch:
+                restored += cls._insert(batch)
+        return name, restored
+
+    @classmethod
+    def retained_since(cls) -> datetime:
+        """
+        Returns the start of the oldest month kept by `archive`, the lower bound of hot queries.
+        """
+        return cls._bounds(cls._add_months(cls._month_of(timezone.now()), -cls._retention_months))[0]
+
+    @classmethod
+    def check_migrations(cls, plan: list) -> None:
+        """
+        Refuses a migration plan that would alter the partitioned log table as if it were plain.
+
+        Adding, altering or removing ordinary columns and indexes works on the partitioned table;
+        changing the primary key columns, unique columns, foreign keys to the table or the table
+        itself does not.
+
+        Args:
+            plan (list): (`Migration`, backwards) pairs about to be applied, as sent by `pre_migrate`.
+
+        Raises:
+            LogPartitionException: If the plan holds such an operation.
+        """
+        if connection.vendor != "postgresql" or not cls.is_partitioned():
+            return
+        model = ContentGenerationLog._meta
+        for migration, _ in plan:
+            for operation in migration.operations:
+                # Hand-written SQL and split state/database operations are the way to migrate it.
+                if isinstance(operation, (RunSQL, RunPython, SeparateDatabaseAndState)):
+                    continue
+                if not operation.references_model(model.model_name, model.app_label) or cls._is_safe(operation):
+                    continue
+                raise LogPartitionException(
+                    GenMessages.UNSAFE_LOG_MIGRATION.format(migration=migration, operation=operation.describe())
+                )
+
+    @classmethod
+    def _is_safe(cls, operation) -> bool:
+        """
+        Tells whether an operation referencing the log model can run on its partitioned table.
+        """
+        if not isinstance(operation, cls._SAFE_OPERATIONS):
+            return False
+        if isinstance(operation, AlterModelOptions):
+            return True
+        if operation.model_name_lower != ContentGenerationLog._meta.model_name:
+            return False  # e.g. a foreign key to the log table, whose `id` alone is not unique
+        names = {getattr(operation, attribute, None) for attribute in ("name", "old_name", "new_name")}
+        field = getattr(operation, "field", None)
+        return not names & set(cls._KEY_FIELDS) and not (field is not None and (field.unique or field.primary_key))
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        """
+        Tells whether the log table is already partitioned.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [cls._table])
+            row = cursor.fetchone()
+        return row is not None and row[0] == "p"
+
+    @classmethod
+    def _convert(cls, months_ahead: int) -> None:
+        """
+        Replaces the plain log table with a partitioned copy; must run inside a transaction.
+
+        The primary key becomes (id, created_at), as PostgreSQL requires the partition key in it;
+        ids keep coming from a sequence, so they stay unique. Secondary indexes and foreign keys
+        are recreated on the partitioned table under their original names.
+        """
+        table, staging, default = cls._table, f"{cls._table}_partitioned", f"{cls._table}_default"
+        q = cls._q
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {q(table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary",
+                [table],
+            )
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [table],
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute(f"SELECT min(created_at) FROM {q(table)}")
+            oldest = cursor.fetchone()[0] or timezone.now()
+
+            cursor.execute(
+                f"CREATE TABLE {q(staging)} (LIKE {q(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                f"PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute(f"ALTER TABLE {q(staging)} ALTER COLUMN id DROP DEFAULT")
+            cursor.execute(f"ALTER TABLE {q(staging)} ADD PRIMARY KEY (id, created_at)")
+            last = cls._add_months(cls._month_of(timezone.now()), months_ahead)
+            for month in cls._months(cls._month_of(oldest), last):
+                cls._create_partition(cursor, staging, month)
+            cursor.execute(f"CREATE TABLE {q(default)} PARTITION OF {q(staging)} DEFAULT")
+
+            cursor.execute(f"INSERT INTO {q(staging)} SELECT * FROM {q(table)}")
+            cursor.execute(f"DROP TABLE {q(table)}")
+            cursor.execute(f"ALTER TABLE {q(staging)} RENAME TO {q(table)}")
+
+            # The definitions name the original table, which is now the partitioned one.
+            for definition in indexes:
+                cursor.execute(definition)
+            for name, definition in foreign_keys:
+                cursor.execute(f"ALTER TABLE {q(table)} ADD CONSTRAINT {q(name)} {definition}")
+
+            # Identity columns cannot be declared on partitioned tables before PostgreSQL 17.
+            sequence = f"{table}_id_seq"
+            cursor.execute(f"CREATE SEQUENCE {q(sequence)} OWNED BY {q(table)}.id")
+            cursor.execute(f"SELECT setval(%s, COALESCE((SELECT max(id) FROM {q(table)}), 0) + 1, false)", [sequence])
+            cursor.execute(f"ALTER TABLE {q(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [sequence])
+        logger.warning("Converted %s into a partitioned table.", table)
+
+    @classmethod
+    def _ensure(cls, months_ahead: int) -> list[str]:
+        """
+        Creates the partitions of the coming months and of any month found in the default partition.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE %s)::date FROM {cls._q(cls._table + '_default')}",
+                [settings.TIME_ZONE],
+            )
+            stray = {row[0] for row in cursor.fetchall()}
+            this_month = cls._month_of(timezone.now())
+            wanted = stray | set(cls._months(this_month, cls._add_months(this_month, months_ahead)))
+            existing = cls._partitions()
+
+            created: list[str] = []
+            for month in sorted(wanted):
+                name = cls._partition_name(month)
+                if name not in existing:
+                    cls._add_partition(cursor, month)
+                    created.append(name)
+        return created
+
+    @classmethod
+    def _add_partition(cls, cursor, month: date) -> None:
+        """
+        Creates a monthly partition, moving into it any of its rows held by the default partition.
+
+        PostgreSQL refuses to create a partition whose range has rows in the default partition,
+        so in that case the default partition is detached while the rows are moved.
+        """
+        table, default, name = cls._table, f"{cls._table}_default", cls._partition_name(month)
+        start, end = cls._bounds(month)
+        bounds = [start.isoformat(), end.isoformat()]
+        q = cls._q
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {q(default)} WHERE created_at >= %s AND created_at < %s)", bounds)
+        if not cursor.fetchone()[0]:
+            cls._create_partition(cursor, table, month)
+            return
+
+        cursor.execute(f"ALTER TABLE {q(table)} DETACH PARTITION {q(default)}")
+        cls._create_partition(cursor, table, month)
+        cursor.execute(f"INSERT INTO {q(name)} SELECT * FROM {q(default)} WHERE created_at >= %s AND created_at < %s", bounds)
+        cursor.execute(f"DELETE FROM {q(default)} WHERE created_at >= %s AND created_at < %s", bounds)
+        cursor.execute(f"ALTER TABLE {q(table)} ATTACH PARTITION {q(default)} DEFAULT")
+
+    @classmethod
+    def _create_partition(cls, cursor, parent: str, month: date) -> None:
+        """
+        Creates the partition of `parent` covering a local month.
+        """
+        start, end = cls._bounds(month)
+        cursor.execute(
+            f"CREATE TABLE {cls._q(cls._partition_name(month))} PARTITION OF {cls._q(parent)} FOR VALUES FROM (%s) TO (%s)",
+            [start.isoformat(), end.isoformat()],
+        )
+
+    @classmethod
+    def _export(cls, name: str) -> tuple[Path, int]:
+        """
+        Streams a detached partition to a gzipped NDJSON file through a server-side cursor.
+
+        Blob references are replaced by their texts, so archives do not depend on `ContentBlob`.
+        """
+        cls._archive_dir.mkdir(parents=True, exist_ok=True)
+        path = cls._archive_dir / f"{name}.ndjson.gz"
+        suffix = 1
+        while path.exists():
+            # Late rows of an already archived month: never overwrite the earlier archive.
+            suffix += 1
+            path = cls._archive_dir / f"{name}.{suffix}.ndjson.gz"
+
+        partial = path.with_name(path.name + ".partial")
+        rows = 0
+        with transaction.atomic():
+            with connection.chunked_cursor() as cursor, gzip.open(partial, "wt", encoding="utf-8") as fh:
+                cursor.execute(f"SELECT row_to_json(t)::text FROM {cls._q(name)} AS t ORDER BY id")
+                while chunk := cursor.fetchmany(cls._batch_size):
+                    records = [json.loads(line) for (line,) in chunk]
+                    GENContentStore.unpack_rows(records)
+                    for record in records:
+                        # Derived from the texts, so it is recomputed on restore instead.
+                        record.pop("search_vector", None)
+                        fh.write(json.dumps(record) + "\n")
+                    rows += len(records)
+
+        expected = cls._count(name)
+        if rows != expected:
+            partial.unlink()
+            raise LogPartitionException(f"Exported {rows} of {expected} rows of {name}.")
+        partial.rename(path)
+        return path, rows
+
+    @classmethod
+    def _note_blobs(cls, cursor, name: str) -> None:
+        """
+        Adds the blobs referenced by a detached partition to the candidates of `_collect_blobs`.
+        """
+        q = cls._q
+        columns = ", ".join(f"({q(field + '_blob_id')})" for field in GENContentStore.FIELDS)
+        cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {q(cls._dropped_blobs)} (hash varchar(64) PRIMARY KEY)")
+        cursor.execute(
+            f"INSERT INTO {q(cls._dropped_blobs)} SELECT DISTINCT v.hash FROM {q(name)}, LATERAL (VALUES {columns}) AS v(hash) "
+            f"WHERE v.hash IS NOT NULL ON CONFLICT DO NOTHING"
+        )
+
+    @classmethod
+    def _collect_blobs(cls) -> int:
+        """
+        Deletes the blobs noted by `_note_blobs` that no remaining row references, in batches;
+        besides the log rows, `SimilarityEntry` rows reference the responses they serve.
+
+        The remaining rows are scanned once, without blocking writers; `GENContentStore.collect`
+        keeps the blobs a writer may have referenced since the scan started.
+        """
+        q = cls._q
+        candidates = q(cls._dropped_blobs)
+        columns = ", ".join(f"({q(field + '_blob_id')})" for field in GENContentStore.FIELDS)
+        scanned_at = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {candidates} WHERE hash IN "
+                f"(SELECT v.hash FROM {q(cls._table)}, LATERAL (VALUES {columns}) AS v(hash))"
+            )
+            cursor.execute(
+                f"DELETE FROM {candidates} WHERE hash IN (SELECT response_id FROM {q(SimilarityEntry._meta.db_table)})"
+            )
+
+        deleted, last = 0, ""
+        try:
+            while True:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT hash FROM {candidates} WHERE hash > %s ORDER BY hash LIMIT %s", [last, cls._batch_size],
+                    )
+                    keys = [row[0] for row in cursor.fetchall()]
+                if not keys:
+                    return deleted
+                with transaction.atomic():
+                    deleted += GENContentStore.collect(keys, scanned_at)
+                last = keys[-1]
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {candidates}")
+
+    @staticmethod
+    def _insert(logs: list[ContentGenerationLog]) -> int:
+        """
+        Inserts restored rows, storing their texts as blobs again and indexing them for search.
+        """
+        GENSearch.index(logs)
+        GENContentStore.pack(logs)
+        return len(ContentGenerationLog.objects.bulk_create(logs))
+
+    @staticmethod
+    def _read(path: Path) -> Iterator[dict]:
+        """
+        Yields the rows of an archive.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+    @classmethod
+    def _partitions(cls) -> set[str]:
+        """
+        Returns the names of the partitions currently attached to the log table.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+                [cls._table],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    @classmethod
+    def _count(cls, name: str) -> int:
+        """
+        Counts the rows of a partition.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {cls._q(name)}")
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def _require_postgres(cls) -> None:
+        """
+        Raises unless the database supports declarative partitioning.
+        """
+        if connection.vendor != "postgresql":
+            raise LogPartitionException(GenMessages.NO_PARTITIONING)
+
+    @classmethod
+    def _require_partitioned(cls) -> None:
+        """
+        Raises unless the log table has been partitioned by `partition`.
+        """
+        cls._require_postgres()
+        if not cls.is_partitioned():
+            raise LogPartitionException(GenMessages.LOGS_NOT_PARTITIONED)
+
+    @classmethod
+    def _partition_name(cls, month: date) -> str:
+        return f"{cls._table}_p{month.year:04d}_{month.month:02d}"
+
+    @classmethod
+    def _parse_month(cls, name: str) -> date | None:
+        match = cls._PARTITION_RE.search(name)
+        return date(int(match[1]), int(match[2]), 1) if match else None
+
+    @classmethod
+    def _bounds(cls, month: date) -> tuple[datetime, datetime]:
+        """
+        Returns the start of a local month and of the next one.
+        """
+        start = timezone.make_aware(datetime(month.year, month.month, 1))
+        following = cls._add_months(month, 1)
+        return start, timezone.make_aware(datetime(following.year, following.month, 1))
+
+    @staticmethod
+    def _month_of(moment: datetime) -> date:
+        return timezone.localtime(moment).date().replace(day=1)
+
+    @staticmethod
+    def _add_months(month: date, months: int) -> date:
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    @classmethod
+    def _months(cls, first: date, last: date) -> list[date]:
+        """
+        Lists the months from `first` to `last`, inclusive.
+        """
+        months: list[date] = []
+        month = first
+        while month <= last:
+            months.append(month)
+            month = cls._add_months(month, 1)
+        return months
+
+    @staticmethod
+    def _q(name: str) -> str:
+        return connection.ops.quote_name(name)
@@ -0,0 +1,307 @@
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from decouple import config
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from app_gen.exceptions import QuotaExceededException
+from app_gen.models import UsageCounter, UsageQuota
+
+@dataclass(slots=True, frozen=True)
+class QuotaLimits:
+    requests_per_minute: int
+    tokens_per_minute: int
+    requests_per_day: int
+    tokens_per_day: int
+
+class GENQuota:
+    """
+    Per-user request and token limits for the generation endpoints.
+
+    Usage is kept incrementally in `UsageCounter` (one row per user and window), so the pre-flight
+    check reads at most two rows instead of aggregating `ContentGenerationLog`; for limited users
+    it locks them until the request is counted. Requests are
+    counted when admitted and tokens once the provider reports them, so a request may finish
+    slightly above the token limit; the next one is then rejected until the window resets.
+    Limits default to the `GEN_QUOTA_*` env vars (0 = unlimited) and can be overridden per user
+    through `UsageQuota`; overrides are cached per process for `GEN_QUOTA_CACHE_SECONDS`.
+    """
+    #: Limits applied to users without an override.
+    _defaults: QuotaLimits = QuotaLimits(
+        requests_per_minute=config("GEN_QUOTA_REQUESTS_PER_MINUTE", default=0, cast=int),
+        tokens_per_minute=config("GEN_QUOTA_TOKENS_PER_MINUTE", default=0, cast=int),
+        requests_per_day=config("GEN_QUOTA_REQUESTS_PER_DAY", default=0, cast=int),
+        tokens_per_day=config("GEN_QUOTA_TOKENS_PER_DAY", default=0, cast=int),
+    )
+    #: Seconds a user's limits are cached by each process.
+    _cache_seconds: int = config("GEN_QUOTA_CACHE_SECONDS", default=30, cast=int)
+
+    _lock = threading.Lock()
+    _limits: dict[int, tuple[float, QuotaLimits]] = {}
+    _provisioned: set[int] = set()
+
+    @classmethod
+    def check(cls, user: User, requests: int = 1) -> None:
+        """
+        Admits `requests` generation requests for `user`, counting them against the quota.
+
+        Args:
+            user (User): The requesting user.
+            requests (int): Number of generations in the request (e.g., batch items).
+
+        Raises:
+            QuotaExceededException: If a limit has been reached; carries the seconds until it resets.
+        """
+        now = timezone.now()
+        limits = cls.get_limits(user.pk)
+        if not cls._is_limited(limits):
+            cls._increment(user.pk, requests, 0, now)
+            return
+
+        cls._provision(user.pk, now)
+        with transaction.atomic():
+            # The counter rows stay locked until the increment commits, so concurrent requests
+            # are checked one after the other and cannot all pass at the limit.
+            cls._admit(limits, cls._read_usage(user.pk, now, lock=True), requests, now)
+            cls._increment(user.pk, requests, 0, now)
+
+    @classmethod
+    async def acheck(cls, user: User, requests: int = 1) -> None:
+        """
+        Asynchronous counterpart of `check`.
+        """
+        await sync_to_async(cls.check)(user, requests)
+
+    @classmethod
+    def record_tokens(cls, user: User, tokens: int) -> None:
+        """
+        Adds the tokens consumed by a finished generation to the user's counters.
+
+        Args:
+            user (User): The requesting user.
+            tokens (int): Prompt plus completion tokens.
+        """
+        if tokens:
+            cls._increment(user.pk, 0, tokens, timezone.now())
+
+    @classmethod
+    async def arecord_tokens(cls, user: User, tokens: int) -> None:
+        """
+        Asynchronous counterpart of `record_tokens`.
+        """
+        if tokens:
+            await sync_to_async(cls._increment)(user.pk, 0, tokens, timezone.now())
+
+    @classmethod
+    def get_limits(cls, user_id: int) -> QuotaLimits:
+        """
+        Returns the effective limits of a user, cached for `GEN_QUOTA_CACHE_SECONDS`.
+
+        Args:
+            user_id (int): ID of the user.
+
+        Returns:
+            QuotaLimits: The user's overrides merged over the defaults.
+        """
+        with cls._lock:
+            cached = cls._limits.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        override = UsageQuota.objects.filter(user_id=user_id).first()
+        limits = cls._merge(override)
+        with cls._lock:
+            cls._limits[user_id] = (time.monotonic() + cls._cache_seconds, limits)
+        return limits
+
+    @classmethod
+    def describe(cls, user_id: int) -> dict:
+        """
+        Summarizes a user's limits and current usage, for administrators.
+
+        Args:
+            user_id (int): ID of the user.
+
+        Returns:
+            dict: The overrides, the effective limits and the usage of the current minute and day.
+
+        Raises:
+            User.DoesNotExist: If the user does not exist.
+        """
+        User.objects.only("id").get(id=user_id)
+        override = UsageQuota.objects.filter(user_id=user_id).first()
+        now = timezone.now()
+        usage = cls._read_usage(user_id, now)
+        return {
+            "user_id": user_id,
+            "overrides": {
+                field.name: getattr(override, field.name) if override else None for field in fields(QuotaLimits)
+            },
+            "limits": asdict(cls._merge(override)),
+            "usage": {
+                window: {
+                    "requests": usage[window][0],
+                    "tokens": usage[window][1],
+                    "resets_at": cls._window_end(window, now).isoformat(),
+                }
+                for window in UsageCounter.Window.values
+            },
+        }
+
+    @classmethod
+    def set_limits(cls, user_id: int, overrides: dict[str, int | None]) -> dict:
+        """
+        Replaces a user's overrides; omitted or null limits fall back to the defaults.
+
+        Args:
+            user_id (int): ID of the user.
+            overrides (dict[str, int | None]): Limits keyed by `QuotaLimits` field name.
+
+        Returns:
+            dict: The user's quota, as returned by `describe`.
+
+        Raises:
+            User.DoesNotExist: If the user does not exist.
+        """
+        User.objects.only("id").get(id=user_id)
+        UsageQuota.objects.update_or_create(
+            user_id=user_id,
+            defaults={field.name: overrides.get(field.name) for field in fields(QuotaLimits)},
+        )
+        cls._forget(user_id)
+        return cls.describe(user_id)
+
+    @classmethod
+    def reset_limits(cls, user_id: int) -> dict:
+        """
+        Removes a user's overrides, so the default limits apply again.
+
+        Args:
+            user_id (int): ID of the user.
+
+        Returns:
+            dict: The user's quota, as returned by `describe`.
+
+        Raises:
+            User.DoesNotExist: If the user does not exist.
+        """
+        UsageQuota.objects.filter(user_id=user_id).delete()
+        cls._forget(user_id)
+        return cls.describe(user_id)
+
+    @classmethod
+    def _merge(cls, override: UsageQuota | None) -> QuotaLimits:
+        """
+        Applies a user's overrides over the default limits.
+        """
+        if override is None:
+            return cls._defaults
+        return QuotaLimits(**{
+            field.name: (
+                getattr(override, field.name) if getattr(override, field.name) is not None
+                else getattr(cls._defaults, field.name)
+            )
+            for field in fields(QuotaLimits)
+        })
+
+    @classmethod
+    def _forget(cls, user_id: int) -> None:
+        """
+        Drops a user's cached limits in this process.
+        """
+        with cls._lock:
+            cls._limits.pop(user_id, None)
+
+    @staticmethod
+    def _is_limited(limits: QuotaLimits) -> bool:
+        """
+        Tells whether any limit applies, so unlimited users skip the counter read.
+        """
+        return any(asdict(limits).values())
+
+    @classmethod
+    def _admit(cls, limits: QuotaLimits, usage: dict[str, tuple[int, int]], requests: int, now: datetime) -> None:
+        """
+        Raises if admitting `requests` more requests would break a limit.
+        """
+        checks = (
+            (UsageCounter.Window.MINUTE, limits.requests_per_minute, limits.tokens_per_minute),
+            (UsageCounter.Window.DAY, limits.requests_per_day, limits.tokens_per_day),
+        )
+        for window, max_requests, max_tokens in checks:
+            used_requests, used_tokens = usage[window]
+            if (max_requests and used_requests + requests > max_requests) or (max_tokens and used_tokens >= max_tokens):
+                retry_after = (cls._window_end(window, now) - now).total_seconds()
+                raise QuotaExceededException(max(1, math.ceil(retry_after)))
+
+    @classmethod
+    def _read_usage(cls, user_id: int, now: datetime, lock: bool = False) -> dict[str, tuple[int, int]]:
+        """
+        Reads the user's requests and tokens in the current minute and day, optionally locking them.
+        """
+        usage = {window: (0, 0) for window in UsageCounter.Window.values}
+        starts = cls._window_starts(now)
+        counters = UsageCounter.objects.filter(user_id=user_id)
+        if lock:
+            counters = counters.select_for_update().order_by("window")
+        rows = counters.values_list("window", "window_start", "requests", "tokens")
+        for window, window_start, requests, tokens in rows:
+            if window_start == starts[window]:
+                usage[window] = (requests, tokens)
+        return usage
+
+    @classmethod
+    def _increment(cls, user_id: int, requests: int, tokens: int, now: datetime) -> None:
+        """
+        Adds to both counters of a user with one UPDATE, resetting those whose window has ended.
+        """
+        starts = cls._window_starts(now)
+        cls._provision(user_id, now)
+
+        in_window = Case(
+            *(When(window=window, window_start=start, then=Value(True)) for window, start in starts.items()),
+            default=Value(False),
+        )
+        UsageCounter.objects.filter(user_id=user_id).update(
+            requests=Case(When(in_window, then=F("requests") + requests), default=Value(requests)),
+            tokens=Case(When(in_window, then=F("tokens") + tokens), default=Value(tokens)),
+            window_start=Case(*(When(window=window, then=Value(start)) for window, start in starts.items())),
+        )
+
+    @classmethod
+    def _provision(cls, user_id: int, now: datetime) -> None:
+        """
+        Creates the counter rows of a user once, so that they are only updated afterwards.
+        """
+        if user_id in cls._provisioned:
+            return
+        for window, start in cls._window_starts(now).items():
+            UsageCounter.objects.get_or_create(user_id=user_id, window=window, defaults={"window_start": start})
+        with cls._lock:
+            cls._provisioned.add(user_id)
+
+    @staticmethod
+    def _window_starts(now: datetime) -> dict[str, datetime]:
+        """
+        Returns the start of the current minute and of the current local day.
+        """
+        return {
+            UsageCounter.Window.MINUTE: now.replace(second=0, microsecond=0),
+            UsageCounter.Window.DAY: timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0),
+        }
+
+    @classmethod
+    def _window_end(cls, window: str, now: datetime) -> datetime:
+        """
+        Returns when the current window of the given kind ends.
+        """
+        start = cls._window_starts(now)[window]
+        return start + (timedelta(minutes=1) if window == UsageCounter.Window.MINUTE else timedelta(days=1))
@@ -0,0 +1,388 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone as dt_timezone
+from typing import TypeVar
+
+from asgiref.sync import sync_to_async
+from decouple import config
+from openai import APIConnectionError, APIStatusError, OpenAIError, RateLimitError
+
+from app_gen.exceptions import CircuitOpenException, FailedDependencyException
+from app_gen.messages import GenMessages
+from app_gen.models import ProviderCircuit
+
+import logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class GENCircuitBreaker:
+    """
+    Circuit breaker shared by every worker, guarding calls to the provider.
+
+    Each process counts consecutive provider failures; when the count reaches the threshold it opens
+    the circuit for a cooldown period and publishes that in `ProviderCircuit`, which other processes
+    re-read every few seconds. While open, calls fail immediately. Once the cooldown ends, each
+    process lets a single probe through: success closes the circuit for everyone, failure reopens it.
+    """
+    #: Consecutive failures that open the circuit.
+    _threshold: int = config("GEN_BREAKER_THRESHOLD", default=5, cast=int)
+    #: Seconds the circuit stays open before a probe is allowed.
+    _cooldown: int = config("GEN_BREAKER_COOLDOWN", default=30, cast=int)
+    #: Seconds between reads of the shared state.
+    _sync_interval: float = config("GEN_BREAKER_SYNC_INTERVAL", default=2.0, cast=float)
+    #: Row of `ProviderCircuit` holding the shared state.
+    _NAME: str = "openai"
+
+    _lock = threading.Lock()
+    _failures: int = 0
+    _opened_until: float | None = None   # Unix timestamp
+    _probing: bool = False
+    _last_error: str = ""
+    _synced_at: float = -math.inf        # monotonic clock
+
+    @classmethod
+    def check(cls) -> bool:
+        """
+        Lets a call through or sheds it, refreshing the shared state when due.
+
+        Returns:
+            bool: True if the call is the probe of a half-open circuit; unless it ends with
+                  `record_success` or `record_failure`, it must be given up with `abandon_probe`.
+
+        Raises:
+            CircuitOpenException: If the circuit is open.
+        """
+        if cls._sync_due():
+            cls._apply(ProviderCircuit.objects.filter(name=cls._NAME).first())
+        return cls._admit()
+
+    @classmethod
+    async def acheck(cls) -> bool:
+        """
+        Asynchronous counterpart of `check`.
+        """
+        if cls._sync_due():
+            cls._apply(await ProviderCircuit.objects.filter(name=cls._NAME).afirst())
+        return cls._admit()
+
+    @classmethod
+    def abandon_probe(cls) -> None:
+        """
+        Lets another call probe the provider, after a probe ended without its answer (e.g. cancelled).
+        """
+        with cls._lock:
+            cls._probing = False
+
+    @classmethod
+    def record_success(cls) -> None:
+        """
+        Resets the failure count, closing the circuit for every worker if this was a probe.
+        """
+        if cls._on_success():
+            cls._publish(None, "")
+
+    @classmethod
+    async def arecord_success(cls) -> None:
+        """
+        Asynchronous counterpart of `record_success`.
+        """
+        if cls._on_success():
+            await sync_to_async(cls._publish)(None, "")
+
+    @classmethod
+    def record_failure(cls, exc: Exception) -> None:
+        """
+        Counts a provider failure, opening the circuit for every worker at the threshold.
+
+        Args:
+            exc (Exception): The provider error.
+        """
+        opened_until = cls._on_failure(exc)
+        if opened_until is not None:
+            cls._publish(opened_until, cls._last_error)
+
+    @classmethod
+    async def arecord_failure(cls, exc: Exception) -> None:
+        """
+        Asynchronous counterpart of `record_failure`.
+        """
+        opened_until = cls._on_failure(exc)
+        if opened_until is not None:
+            await sync_to_async(cls._publish)(opened_until, cls._last_error)
+
+    @classmethod
+    def state(cls) -> dict[str, str | int | None]:
+        """
+        Describes the breaker as seen by this process, for operators.
+
+        Returns:
+            dict[str, str | int | None]: `closed`, `open` or `half_open`, the consecutive failure
+                                         count, when the circuit reopens and the error that opened it.
+        """
+        with cls._lock:
+            now = time.time()
+            if cls._opened_until is None:
+                state = "closed"
+            elif cls._probing or cls._opened_until <= now:
+                state = "half_open"
+            else:
+                state = "open"
+            return {
+                "state": state,
+                "consecutive_failures": cls._failures,
+                "open_until": (
+                    datetime.fromtimestamp(cls._opened_until, dt_timezone.utc).isoformat()
+                    if cls._opened_until is not None else None
+                ),
+                "last_error": cls._last_error,
+            }
+
+    @classmethod
+    def _sync_due(cls) -> bool:
+        """
+        Tells whether the shared state should be re-read.
+        """
+        return time.monotonic() - cls._synced_at >= cls._sync_interval
+
+    @classmethod
+    def _apply(cls, row: ProviderCircuit | None) -> None:
+        """
+        Adopts the shared state read from the database, unless this process is probing.
+        """
+        with cls._lock:
+            cls._synced_at = time.monotonic()
+            if cls._probing:
+                return
+            if row is None or row.opened_until is None:
+                if cls._opened_until is not None:
+                    cls._opened_until, cls._failures = None, 0
+            else:
+                cls._opened_until = row.opened_until.timestamp()
+                cls._last_error = row.last_error
+
+    @classmethod
+    def _admit(cls) -> bool:
+        """
+        Raises if the circuit is open; after the cooldown, admits one probe per process.
+        """
+        with cls._lock:
+            if cls._opened_until is None:
+                return False
+            remaining = cls._opened_until - time.time()
+            if remaining <= 0 and not cls._probing:
+                cls._probing = True
+                return True
+            raise CircuitOpenException(max(1, math.ceil(remaining)))
+
+    @classmethod
+    def _on_success(cls) -> bool:
+        """
+        Updates local state after a success; returns whether the shared state must be closed.
+        """
+        with cls._lock:
+            was_open = cls._opened_until is not None
+            cls._failures, cls._opened_until, cls._probing = 0, None, False
+        if was_open:
+            logger.warning("OpenAI circuit breaker closed.")
+        return was_open
+
+    @classmethod
+    def _on_failure(cls, exc: Exception) -> float | None:
+        """
+        Updates local state after a failure; returns the reopening time if the circuit just opened.
+        """
+        with cls._lock:
+            cls._failures += 1
+            cls._last_error = f"{type(exc).__name__}: {exc}"[:500]
+            if not cls._probing and cls._failures < cls._threshold:
+                return None
+            cls._probing = False
+            cls._opened_until = time.time() + cls._cooldown
+            opened_until = cls._opened_until
+        logger.warning("OpenAI circuit breaker opened for %ss: %s", cls._cooldown, cls._last_error)
+        return opened_until
+
+    @classmethod
+    def _publish(cls, opened_until: float | None, error: str) -> None:
+        """
+        Writes the shared state read by the other workers.
+        """
+        ProviderCircuit.objects.update_or_create(
+            name=cls._NAME,
+            defaults={
+                "opened_until": (
+                    datetime.fromtimestamp(opened_until, dt_timezone.utc) if opened_until is not None else None
+                ),
+                "last_error": error,
+            },
+        )
+
+class GENResilience:
+    """
+    Retry and circuit-breaking policy wrapped around every provider call.
+
+    Retryable failures (429, 5xx, timeouts and connection errors) are retried with capped
+    exponential backoff and full jitter, honouring the provider's `Retry-After` header, within an
+    overall deadline. Calls are gated by `GENCircuitBreaker`, so during an incident requests fail
+    fast instead of each one waiting for the full timeout.
+    """
+    #: Attempts per call, including the first one.
+    _max_attempts: int = config("GEN_RETRY_MAX_ATTEMPTS", default=3, cast=int)
+    #: Base backoff, in seconds; doubles on each retry before jitter is applied.
+    _base_delay: float = config("GEN_RETRY_BASE_DELAY", default=0.5, cast=float)
+    #: Upper bound of a single backoff, in seconds; longer `Retry-After` values are not waited for.
+    _max_delay: float = config("GEN_RETRY_MAX_DELAY", default=8.0, cast=float)
+    #: No retry is started once this many seconds have elapsed since the first attempt.
+    _deadline: float = config("GEN_RETRY_DEADLINE", default=45.0, cast=float)
+
+    @classmethod
+    def call(cls, operation: Callable[[], T]) -> T:
+        """
+        Runs a provider operation under the retry and circuit breaker policy.
+
+        Args:
+            operation (Callable[[], T]): Performs one provider call.
+
+        Returns:
+            T: The operation's result.
+
+        Raises:
+            CircuitOpenException: If the circuit is open.
+            FailedDependencyException: If the call failed and could not be retried.
+        """
+        probe: bool = GENCircuitBreaker.check()
+        try:
+            return cls._retry(operation)
+        except BaseException:
+            # Settled by `record_failure` for provider errors; anything else (a bug, a timeout of
+            # the worker) must not leave this process rejecting every call as if still probing.
+            if probe:
+                GENCircuitBreaker.abandon_probe()
+            raise
+
+    @classmethod
+    async def acall(cls, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Asynchronous counterpart of `call`.
+        """
+        probe: bool = await GENCircuitBreaker.acheck()
+        try:
+            return await cls._aretry(operation)
+        except BaseException:
+            # Includes the cancellation of a disconnected client or a losing hedge.
+            if probe:
+                GENCircuitBreaker.abandon_probe()
+            raise
+
+    @classmethod
+    def _retry(cls, operation: Callable[[], T]) -> T:
+        """
+        Runs an operation, retrying its transient failures and reporting the outcome to the breaker.
+        """
+        started: float = time.monotonic()
+        attempt: int = 1
+        while True:
+            try:
+                result = operation()
+            except OpenAIError as exc:
+                delay = cls._next_delay(exc, attempt, started)
+                if delay is None:
+                    if cls._is_retryable(exc):
+                        GENCircuitBreaker.record_failure(exc)
+                    else:
+                        # The provider answered (e.g., a 400), so it is healthy.
+                        GENCircuitBreaker.record_success()
+                    raise FailedDependencyException(GenMessages.FAILED_DEPENDENCY) from exc
+                time.sleep(delay)
+                attempt += 1
+            else:
+                GENCircuitBreaker.record_success()
+                return result
+
+    @classmethod
+    async def _aretry(cls, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Asynchronous counterpart of `_retry`.
+        """
+        started: float = time.monotonic()
+        attempt: int = 1
+        while True:
+            try:
+                result = await operation()
+            except OpenAIError as exc:
+                delay = cls._next_delay(exc, attempt, started)
+                if delay is None:
+                    if cls._is_retryable(exc):
+                        await GENCircuitBreaker.arecord_failure(exc)
+                    else:
+                        # The provider answered (e.g., a 400), so it is healthy.
+                        await GENCircuitBreaker.arecord_success()
+                    raise FailedDependencyException(GenMessages.FAILED_DEPENDENCY) from exc
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                await GENCircuitBreaker.arecord_success()
+                return result
+
+    @staticmethod
+    def _is_retryable(exc: OpenAIError) -> bool:
+        """
+        Tells whether an error is transient: rate limits, server errors, timeouts or network failures.
+
+        Exhausted quotas are reported as 429 too, but retrying them is pointless.
+        """
+        if isinstance(exc, RateLimitError):
+            return getattr(exc, "code", None) != "insufficient_quota"
+        if isinstance(exc, APIStatusError):
+            return exc.status_code in (408, 409) or exc.status_code >= 500
+        return isinstance(exc, APIConnectionError)
+
+    @classmethod
+    def _next_delay(cls, exc: OpenAIError, attempt: int, started: float) -> float | None:
+        """
+        Computes how long to wait before retrying, or `None` if the call must not be retried.
+
+        Args:
+            exc (OpenAIError): The error of the last attempt.
+            attempt (int): Number of the attempt that just failed, starting at 1.
+            started (float): Monotonic time of the first attempt.
+
+        Returns:
+            float | None: Seconds to sleep, or `None` to give up.
+        """
+        if attempt >= cls._max_attempts or not cls._is_retryable(exc):
+            return None
+
+        delay: float = random.uniform(0, min(cls._max_delay, cls._base_delay * 2 ** (attempt - 1)))
+        retry_after = cls._retry_after(exc)
+        if retry_after is not None:
+            if retry_after > cls._max_delay:
+                return None
+            delay = retry_after
+
+        if time.monotonic() - started + delay > cls._deadline:
+            return None
+        return delay
+
+    @staticmethod
+    def _retry_after(exc: OpenAIError) -> float | None:
+        """
+        Extracts the provider's requested wait, in seconds, from `Retry-After` (or `retry-after-ms`).
+        """
+        if not isinstance(exc, APIStatusError):
+            return None
+        headers = exc.response.headers
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            # HTTP-date values are rare for this API; fall back to our own backoff.
+            return None
+        return None
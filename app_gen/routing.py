@@ -0,0 +1,190 @@
+import math
+import threading
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, TypeVar
+
+from decouple import Csv, config
+from openai import APIStatusError, APITimeoutError
+
+from app_gen.exceptions import CircuitOpenException, FailedDependencyException
+from app_gen.prompts import GENPrompts
+
+if TYPE_CHECKING:
+    from app_gen.services import GENData
+
+import logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@dataclass(slots=True, frozen=True)
+class RouteDecision:
+    model: str                      # tier chosen for the request
+    tier: int                       # its position in `GEN_MODEL_TIERS`
+    reason: str                     # "size", "document_type" or "default"
+    estimated_tokens: int           # estimated tokens of the user message
+    fallbacks: tuple[str, ...] = () # models tried next if `model` times out or fails with a 5xx
+
+    @property
+    def chain(self) -> tuple[str, ...]:
+        return (self.model, *self.fallbacks)
+
+class GENRouter:
+    """
+    Picks the model of each request from configured tiers, and falls back along them on failure.
+
+    `GEN_MODEL_TIERS` lists models from the cheapest to the most capable. A request starts at
+    the first tier whose limit in `GEN_ROUTE_TOKEN_LIMITS` holds its estimated size, raised to
+    the minimum tier of its document type in `GEN_ROUTE_DOCUMENT_TIERS`. The size is estimated
+    from the user message only, at about four characters per token: the system prompt is the
+    same for every request of a template, so it is what the document type rule accounts for.
+
+    When the chosen model times out or answers with a 5xx after `GENResilience` gave up, the
+    call is repeated on the next tiers up, then on the ones below, before failing with 424.
+    With a single tier (the default, `OPENAI_MODEL`) every request goes to that model as before.
+    """
+    #: Models from the cheapest to the most capable.
+    _tiers: list[str] = config("GEN_MODEL_TIERS", default=config("OPENAI_MODEL", default="gpt-4o-mini"), cast=Csv())
+    #: Largest estimated user message, in tokens, served by each tier but the last.
+    _token_limits: list[int] = config("GEN_ROUTE_TOKEN_LIMITS", default="", cast=Csv(int))
+    #: Minimum tier of each document type ("pdi=1,job_description=0"), by template name.
+    _document_tiers: dict[str, int] = {
+        name.strip(): int(value)
+        for name, value in (item.split("=", 1) for item in config("GEN_ROUTE_DOCUMENT_TIERS", default="", cast=Csv()))
+    }
+    #: Whether failed calls are retried on the other tiers.
+    _fallback: bool = config("GEN_ROUTE_FALLBACK", default=True, cast=bool)
+
+    #: Characters per token used to estimate the size of a prompt.
+    _CHARS_PER_TOKEN: int = 4
+
+    _lock = threading.Lock()
+    _routed: Counter = Counter()
+    _fallbacks: Counter = Counter()
+
+    @classmethod
+    def route(cls, data: "GENData") -> RouteDecision:
+        """
+        Chooses the tier of a request.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+
+        Returns:
+            RouteDecision: The chosen model, why it was chosen and the models to fall back to.
+        """
+        last: int = len(cls._tiers) - 1
+        estimated: int = math.ceil(len(GENPrompts.user_prompt(data)) / cls._CHARS_PER_TOKEN)
+        size_tier: int = min(
+            next((tier for tier, limit in enumerate(cls._token_limits) if estimated <= limit), len(cls._token_limits)),
+            last,
+        )
+        document_tier: int = min(cls._document_tiers.get(GENPrompts.get(data.document_type).name, 0), last)
+
+        if document_tier > size_tier:
+            tier, reason = document_tier, "document_type"
+        elif size_tier > 0 or cls._token_limits:
+            tier, reason = size_tier, "size"
+        else:
+            tier, reason = 0, "default"
+
+        fallbacks: tuple[str, ...] = ()
+        if cls._fallback:
+            fallbacks = (*cls._tiers[tier + 1:], *reversed(cls._tiers[:tier]))
+        return RouteDecision(cls._tiers[tier], tier, reason, estimated, fallbacks)
+
+    @classmethod
+    def call(cls, decision: RouteDecision, operation: Callable[[str], T]) -> tuple[T, str, int]:
+        """
+        Runs a provider operation on the chosen model, falling back along the chain on failure.
+
+        Args:
+            decision (RouteDecision): The request's route.
+            operation (Callable[[str], T]): Performs the provider call (with `GENResilience`) on a model.
+
+        Returns:
+            tuple[T, str, int]: The operation's result, the model that produced it and the number
+                                of models that failed before it.
+
+        Raises:
+            CircuitOpenException: If the circuit is open.
+            FailedDependencyException: If every model in the chain failed.
+        """
+        chain = decision.chain
+        for index, model in enumerate(chain):
+            try:
+                result = operation(model)
+            except FailedDependencyException as exc:
+                if index == len(chain) - 1 or not cls._should_fall_back(exc):
+                    raise
+                cls._record_fallback(model, chain[index + 1], exc)
+            else:
+                cls._record_route(model)
+                return result, model, index
+
+    @classmethod
+    async def acall(cls, decision: RouteDecision, operation: Callable[[str], Awaitable[T]]) -> tuple[T, str, int]:
+        """
+        Asynchronous counterpart of `call`.
+        """
+        chain = decision.chain
+        for index, model in enumerate(chain):
+            try:
+                result = await operation(model)
+            except FailedDependencyException as exc:
+                if index == len(chain) - 1 or not cls._should_fall_back(exc):
+                    raise
+                cls._record_fallback(model, chain[index + 1], exc)
+            else:
+                cls._record_route(model)
+                return result, model, index
+
+    @classmethod
+    def models(cls) -> list[str]:
+        """
+        Returns the configured tiers, from the cheapest to the most capable.
+        """
+        return list(cls._tiers)
+
+    @classmethod
+    def stats(cls) -> dict[str, list[str] | dict[str, int]]:
+        """
+        Reports this process's routing counters, for operators.
+
+        Returns:
+            dict[str, list[str] | dict[str, int]]: The tiers, the provider calls answered by each
+                                                   model and the fallbacks away from each model.
+        """
+        with cls._lock:
+            return {"tiers": list(cls._tiers), "routed": dict(cls._routed), "fallbacks": dict(cls._fallbacks)}
+
+    @staticmethod
+    def _should_fall_back(exc: FailedDependencyException) -> bool:
+        """
+        Tells whether a failure is specific enough to a model to try another: a timeout or a 5xx.
+
+        An open circuit sheds every call to the provider, so it is never worked around.
+        """
+        if isinstance(exc, CircuitOpenException):
+            return False
+        cause = exc.__cause__
+        return isinstance(cause, APITimeoutError) or (isinstance(cause, APIStatusError) and cause.status_code >= 500)
+
+    @classmethod
+    def _record_route(cls, model: str) -> None:
+        """
+        Counts a provider call answered by a model.
+        """
+        with cls._lock:
+            cls._routed[model] += 1
+
+    @classmethod
+    def _record_fallback(cls, model: str, fallback: str, exc: FailedDependencyException) -> None:
+        """
+        Counts and logs a fallback away from a model.
+        """
+        with cls._lock:
+            cls._fallbacks[model] += 1
+        logger.warning("Model %s failed (%r); falling back to %s.", model, exc.__cause__, fallback)
@@ -0,0 +1,205 @@
+from dataclasses import dataclass
+
+from decouple import Csv, config
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import CombinedSearchVector, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Expression, F, Value
+
+from app_gen.content import GENContentStore
+from app_gen.exceptions import SearchUnavailableException
+from app_gen.messages import GenMessages
+from app_gen.models import ContentGenerationLog
+
+@dataclass(slots=True, frozen=True)
+class SearchParams:
+    q: str
+    limit: int
+
+class GENSearch:
+    """
+    Full-text search over the generations of a user, on PostgreSQL.
+
+    Each `ContentGenerationLog` row stores a `search_vector` (`tsvector`) computed when the row is
+    inserted, from the texts that are about to move to `ContentBlob`: the title weighs most, then
+    the objective and data, then the response. Every text is indexed with each configuration of
+    `GEN_SEARCH_CONFIGS` (Portuguese and English stemming by default) and queries are parsed with
+    all of them, so either language matches its inflections. A GIN index answers the `@@` match,
+    so a search reads only the matching rows instead of scanning every text.
+
+    Results are ordered by `ts_rank`, and each gets a highlighted snippet of its response built by
+    `ts_headline`, for the returned rows only. Rows inserted before the column existed are indexed
+    by the `index_generation_logs` command. Searches only cover the generations since
+    `GENLogPartitions.retained_since`, so the planner prunes the partitions of older months.
+    """
+    #: Text search configurations each text is indexed with; the first one builds the snippets.
+    _configs: list[str] = config("GEN_SEARCH_CONFIGS", default="portuguese,english", cast=Csv())
+    #: `ts_headline` options of the snippets.
+    _HEADLINE_OPTIONS: str = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        Tells whether the database supports full-text search.
+
+        Returns:
+            bool: True on PostgreSQL.
+        """
+        return connection.vendor == "postgresql"
+
+    @classmethod
+    def vector(cls, title: Expression, objective: Expression, data: Expression, response: Expression) -> CombinedSearchVector:
+        """
+        Builds the weighted `tsvector` of a generation.
+
+        Args:
+            title (Expression): Title of the request.
+            objective (Expression): Objective of the request.
+            data (Expression): Data of the request.
+            response (Expression): Generated response.
+
+        Returns:
+            CombinedSearchVector: The texts indexed with every configuration.
+        """
+        vectors = [
+            vector
+            for search_config in cls._configs
+            for vector in (
+                SearchVector(title, config=search_config, weight="A"),
+                SearchVector(objective, data, config=search_config, weight="B"),
+                SearchVector(response, config=search_config, weight="C"),
+            )
+        ]
+        combined = vectors[0]
+        for vector in vectors[1:]:
+            combined = combined + vector
+        return combined
+
+    @classmethod
+    def index(cls, logs: list[ContentGenerationLog]) -> None:
+        """
+        Sets the search vector of unsaved log rows from their inline texts.
+
+        Must run before `GENContentStore.pack`, which moves the texts out of the rows.
+
+        Args:
+            logs (list[ContentGenerationLog]): Rows about to be inserted or updated.
+        """
+        if not cls.enabled():
+            return
+        for log in logs:
+            log.search_vector = cls.vector(
+                Value(log.title), Value(log.objective or ""), Value(log.data or ""), Value(log.response or ""),
+            )
+
+    @classmethod
+    def reindex(cls, batch_size: int = 500) -> int:
+        """
+        Computes the search vector of the rows that have none, in batches of increasing id.
+
+        Args:
+            batch_size (int): Rows read and updated per statement.
+
+        Returns:
+            int: Number of rows indexed.
+
+        Raises:
+            SearchUnavailableException: If the database is not PostgreSQL.
+        """
+        cls._require_enabled()
+        indexed = 0
+        last_id = 0
+        while True:
+            logs = list(
+                ContentGenerationLog.objects
+                .filter(id__gt=last_id, search_vector__isnull=True)
+                .order_by("id")[:batch_size]
+            )
+            if not logs:
+                return indexed
+            GENContentStore.unpack(logs)
+            cls.index(logs)
+            ContentGenerationLog.objects.bulk_update(logs, ["search_vector"])
+            indexed += len(logs)
+            last_id = logs[-1].id
+
+    @classmethod
+    def search(cls, user: User, params: SearchParams) -> list[dict]:
+        """
+        Finds the generations of a user matching a query, best first.
+
+        Args:
+            user (User): Owner of the generations.
+            params (SearchParams): Query, in web search syntax (quoted phrases, `or`, `-word`),
+                                   and number of results.
+
+        Returns:
+            list[dict]: Metadata, `rank` and highlighted `snippet` of each match, among the
+                        generations kept by `GENLogPartitions`.
+
+        Raises:
+            SearchUnavailableException: If the database is not PostgreSQL.
+        """
+        # Imported here: `GENLogPartitions` imports this module.
+        from app_gen.partitions import GENLogPartitions
+
+        cls._require_enabled()
+        query = cls.query(params.q)
+        rows = list(
+            ContentGenerationLog.objects
+            .filter(created_by=user, created_at__gte=GENLogPartitions.retained_since(), search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at")
+            .values(
+                "id", "title", "prompt_template", "model_used", "created_at", "rank", "response", "response_blob_id",
+            )[:params.limit]
+        )
+
+        GENContentStore.unpack_rows(rows)
+        snippets = cls._headlines([row.pop("response") or "" for row in rows], params.q)
+        for row, snippet in zip(rows, snippets):
+            row["snippet"] = snippet
+        return rows
+
+    @classmethod
+    def query(cls, q: str) -> SearchQuery:
+        """
+        Parses a web search query with every configuration, matching any of them.
+
+        Args:
+            q (str): Query in web search syntax.
+
+        Returns:
+            SearchQuery: The query, to match against `search_vector`.
+        """
+        queries = [SearchQuery(q, config=search_config, search_type="websearch") for search_config in cls._configs]
+        combined = queries[0]
+        for query in queries[1:]:
+            combined = combined | query
+        return combined
+
+    @classmethod
+    def _headlines(cls, documents: list[str], q: str) -> list[str]:
+        """
+        Highlights the matches of a query in several texts, with a single statement.
+        """
+        if not documents:
+            return []
+        tsquery = " || ".join("websearch_to_tsquery(%s::regconfig, %s)" for _ in cls._configs)
+        params = [value for search_config in cls._configs for value in (search_config, q)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT ts_headline(%s::regconfig, document, {tsquery}, %s) "
+                "FROM unnest(%s::text[]) WITH ORDINALITY AS documents(document, position) ORDER BY position",
+                [cls._configs[0], *params, cls._HEADLINE_OPTIONS, documents],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def _require_enabled(cls) -> None:
+        """
+        Raises unless the database supports full-text search.
+        """
+        if not cls.enabled():
+            raise SearchUnavailableException(GenMessages.NO_SEARCH)
@@ -1,5 +1,12 @@
 from rest_framework import serializers
 
+from app_gen.analytics import UsageQuery
+from app_gen.exports import ExportQuery, GENLogExport
+from app_gen.history import GENHistory, HistoryQuery
+from app_gen.messages import GenMessages
+from app_gen.models import UsageRollup
+from app_gen.prompts import DocumentType
+from app_gen.search import SearchParams
 from app_gen.services import GENData
 
 from decouple import config
@@ -10,6 +17,8 @@ class GENSerializer(serializers.Serializer):
 
     This serializer validates the structure of fields required for AI-driven content generation 
     and transforms the result into a strongly-typed `GENData` object for use by the generation service.
+    The optional `document_type` selects the prompt template of a recurring document type, and
+    `candidates` asks for several alternatives generated by a single provider call.
     """
 
     title = serializers.CharField(
@@ -28,6 +37,15 @@ class GENSerializer(serializers.Serializer):
         max_length=config("RETURN_MAX_LENGTH", cast=int),
         required=True,
     )
+    document_type = serializers.ChoiceField(
+        choices=[document_type.value for document_type in DocumentType],
+        required=False,
+    )
+    candidates = serializers.IntegerField(
+        min_value=1,
+        max_value=config("GEN_MAX_CANDIDATES", default=5, cast=int),
+        required=False,
+    )
 
     def validate(self, attrs: dict) -> GENData:
         """
@@ -40,3 +58,194 @@ class GENSerializer(serializers.Serializer):
             GENData: Structured input for the generation service.
         """
         return GENData(**attrs)
+
+class GENBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch content generation input.
+
+    Wraps a list of `GENSerializer` payloads under `items`, so every entry is validated with the
+    same rules as the single-item endpoint, and returns the list of `GENData` objects.
+    """
+
+    items = GENSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=config("GEN_BATCH_MAX_ITEMS", default=100, cast=int),
+    )
+
+    def validate(self, attrs: dict) -> list[GENData]:
+        """
+        Unwraps the validated items for the service layer.
+
+        Args:
+            attrs (dict): The validated input fields.
+
+        Returns:
+            list[GENData]: Structured inputs, in request order.
+        """
+        return attrs["items"]
+
+class GENQuotaSerializer(serializers.Serializer):
+    """
+    Serializer for an administrator's per-user quota overrides.
+
+    Omitted or null limits fall back to the defaults configured through the environment;
+    0 means unlimited.
+    """
+
+    requests_per_minute = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+    tokens_per_minute = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+    requests_per_day = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+    tokens_per_day = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+
+class GENUsageQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the usage analytics endpoint.
+
+    Validates the day range, granularity, filters and grouping, and returns a `UsageQuery`.
+    """
+
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    granularity = serializers.ChoiceField(choices=UsageRollup.Granularity.choices, default=UsageRollup.Granularity.DAY)
+    user = serializers.IntegerField(min_value=1, required=False)
+    model = serializers.CharField(max_length=100, required=False)
+    group_by = serializers.CharField(required=False, default="user,model,bucket")
+
+    def validate_group_by(self, value: str) -> tuple[str, ...]:
+        """
+        Splits the comma-separated grouping and checks every option.
+
+        Args:
+            value (str): e.g. `user,model`.
+
+        Returns:
+            tuple[str, ...]: The grouping options, without duplicates.
+        """
+        groups = tuple(dict.fromkeys(group.strip() for group in value.split(",") if group.strip()))
+        if any(group not in ("user", "model", "bucket") for group in groups):
+            raise serializers.ValidationError(GenMessages.INVALID_GROUP_BY)
+        return groups
+
+    def validate(self, attrs: dict) -> UsageQuery:
+        """
+        Checks the range and builds the `UsageQuery` for the service layer.
+
+        Args:
+            attrs (dict): The validated input fields.
+
+        Returns:
+            UsageQuery: The analytics query.
+        """
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError(GenMessages.INVALID_USAGE_RANGE)
+        return UsageQuery(
+            start=attrs["start"],
+            end=attrs["end"],
+            granularity=attrs["granularity"],
+            group_by=attrs["group_by"],
+            user_id=attrs.get("user"),
+            model=attrs.get("model"),
+        )
+
+class GENHistoryQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the generation history endpoint.
+
+    Validates the page size and the cursor returned by the previous page, and returns a `HistoryQuery`.
+    """
+
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=config("GEN_HISTORY_MAX_PAGE_SIZE", default=100, cast=int),
+        default=config("GEN_HISTORY_PAGE_SIZE", default=20, cast=int),
+    )
+    cursor = serializers.CharField(max_length=200, required=False)
+
+    def validate_cursor(self, value: str) -> tuple:
+        """
+        Decodes the cursor into the position of the last row already listed.
+
+        Args:
+            value (str): `next_cursor` of the previous page.
+
+        Returns:
+            tuple: Creation time and id of that row.
+        """
+        try:
+            return GENHistory.decode_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError(GenMessages.INVALID_HISTORY_CURSOR)
+
+    def validate(self, attrs: dict) -> HistoryQuery:
+        """
+        Builds the `HistoryQuery` for the service layer.
+
+        Args:
+            attrs (dict): The validated input fields.
+
+        Returns:
+            HistoryQuery: The page to read.
+        """
+        return HistoryQuery(limit=attrs["limit"], after=attrs.get("cursor"))
+
+class GENSearchQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the generation search endpoint.
+
+    Validates the search terms and the number of results, and returns a `SearchParams`.
+    """
+
+    q = serializers.CharField(max_length=200, required=True)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=config("GEN_SEARCH_MAX_RESULTS", default=50, cast=int),
+        default=20,
+    )
+
+    def validate(self, attrs: dict) -> SearchParams:
+        """
+        Builds the `SearchParams` for the service layer.
+
+        Args:
+            attrs (dict): The validated input fields.
+
+        Returns:
+            SearchParams: The search to run.
+        """
+        return SearchParams(q=attrs["q"], limit=attrs["limit"])
+
+class GENExportQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the generation log export endpoint.
+
+    Validates the optional day range and user filter, the format and the compression, and
+    returns an `ExportQuery`.
+    """
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    user = serializers.IntegerField(min_value=1, required=False)
+    # Not `format`, which DRF reserves for choosing a renderer.
+    file_format = serializers.ChoiceField(choices=list(GENLogExport.CONTENT_TYPES), default="ndjson")
+    compress = serializers.ChoiceField(choices=["gzip"], required=False)
+
+    def validate(self, attrs: dict) -> ExportQuery:
+        """
+        Checks the range and builds the `ExportQuery` for the service layer.
+
+        Args:
+            attrs (dict): The validated input fields.
+
+        Returns:
+            ExportQuery: The export to stream.
+        """
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError(GenMessages.INVALID_USAGE_RANGE)
+        return ExportQuery(
+            start=attrs.get("start"),
+            end=attrs.get("end"),
+            user_id=attrs.get("user"),
+            format=attrs["file_format"],
+            compress="compress" in attrs,
+        )
@@ -1,16 +1,35 @@
+import asyncio
+import json
 import time
-from dataclasses import dataclass
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, replace
+from http import HTTPStatus
 
-import openai
-from openai import OpenAIError
+from openai import NOT_GIVEN, OpenAIError
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion
+from openai.types.chat.chat_completion import Choice
 
 from decouple import config
 
 from django.contrib.auth.models import User
+from django.utils import timezone
 
-from app_gen.exceptions import FailedDependencyException
-from app_gen.models import ContentGenerationLog
+from app_gen.budgets import GENTokenBudget
+from app_gen.cache import CachedGeneration, CacheMode, GENCache
+from app_gen.client import GENClient
+from app_gen.coalescing import GENSingleFlight
+from app_gen.exceptions import FailedDependencyException, ProviderBusyException
+from app_gen.hedging import GENHedge
+from app_gen.limiter import GENConcurrencyLimiter
+from app_gen.logwriter import GENLogWriter
 from app_gen.messages import GenMessages
+from app_gen.prompts import GENPrompts
+from app_gen.quotas import GENQuota
+from app_gen.resilience import GENResilience
+from app_gen.routing import GENRouter, RouteDecision
+from app_gen.similarity import GENSimilarCache
 
 @dataclass(slots=True, frozen=True)
 class GENData:
@@ -18,6 +37,25 @@ class GENData:
     objective: str
     data: str
     return_format: str
+    document_type: str | None = None        # selects a `GENPrompts` template
+    candidates: int = 1                     # alternatives generated by the one provider call (`n`)
+
+@dataclass(slots=True, frozen=True)
+class GENResult:
+    model: str
+    content: str
+    alternatives: tuple[str, ...] = ()      # candidates after the first, for multi-candidate requests
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0                  # prompt tokens served from the provider's prompt cache
+    cache_hit: bool = False
+    coalesced: bool = False
+    route: RouteDecision | None = None      # tier chosen by `GENRouter`
+    model_used: str = ""                    # tier that produced the content, if it was not `route.model`
+    fallbacks: int = 0                      # tiers that failed before `model_used` answered
+    max_tokens: int = 0                     # output budget of each call; 0 when unbounded
+    continuations: int = 0                  # calls made to finish an answer cut by the budget
+    truncated: bool = False                 # still cut after the last continuation
 
 class GENServices:
     """
@@ -26,95 +64,699 @@ class GENServices:
     It orchestrates the communication with the OpenAI API, injects a consistent persona, 
     logs generation attempts to the database, and ensures failure resilience through domain-specific exceptions.
     """
-    #: Default model; can be overridden through the `OPENAI_MODEL` env var.
-    _model: str = config("OPENAI_MODEL", default="gpt-4o-mini", cast=str)
     #: Temperature controls randomness;
     _temperature: float = config("OPENAI_TEMPERATURE", default=0.7, cast=float)
     #: Upper bound on latency so that API requests don’t hang indefinitely.
     _timeout: int = config("OPENAI_TIMEOUT", default=30, cast=int)
-    #: Persona injected as *system* message so the behaviour remains consistent.
-    _SYSTEM_PROMPT: str = (
-        "Você é um assistente de RH especialista em gestão de competências, "
-        "descrições de cargo, feedbacks e PDIs (Planos de Desenvolvimento "
-        "Individual). Sempre responda no idioma do usuário e siga exatamente o "
-        "formato pedido."
-    )
+    #: Maximum number of provider calls in flight for a single batch request.
+    _batch_concurrency: int = config("GEN_BATCH_CONCURRENCY", default=8, cast=int)
 
     @classmethod
-    def generate(cls, data: GENData, user: User) -> dict[str, str | int]:
+    def generate(cls, data: GENData, user: User, cache_mode: CacheMode = CacheMode.USE) -> dict[str, str | int | bool]:
         """
         Sends a structured prompt to the OpenAI API and returns the generated response.
 
+        Identical requests are answered from `GENCache` unless `cache_mode` says otherwise;
+        cache hits are still logged, with zero tokens, so usage accounting stays correct.
+
         Args:
             data (GENData): Structured input containing metadata and generation parameters.
             user (User): The Django user initiating the request, used for logging.
+            cache_mode (CacheMode): Whether to use, bypass or refresh the response cache.
+
+        Returns:
+            dict[str, str | int | bool]: A dictionary containing the model used, timestamp of creation, 
+                                         the generated content and whether it came from the cache.
+
+        Raises:
+            ProviderBusyException: If the provider is at capacity and the request could not wait for its turn.
+            FailedDependencyException: If an error occurs during the API call to OpenAI.
+        """
+        result: GENResult = cls._resolve(data, user, cache_mode)
+
+        # Persist metadata about the generation attempt.
+        GENLogWriter.write(cls._build_log(data, user, result))
+        GENQuota.record_tokens(user, result.prompt_tokens + result.completion_tokens)
+
+        return cls._build_payload(result)
+
+    @classmethod
+    async def agenerate(cls, data: GENData, user: User, cache_mode: CacheMode = CacheMode.USE) -> dict[str, str | int | bool]:
+        """
+        Asynchronous counterpart of `generate`.
+
+        Awaits the OpenAI call through `AsyncOpenAI` and persists the log with the async ORM,
+        so an ASGI worker can keep many generations in flight without blocking its event loop.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+            user (User): The Django user initiating the request, used for logging.
+            cache_mode (CacheMode): Whether to use, bypass or refresh the response cache.
+
+        Returns:
+            dict[str, str | int | bool]: Same payload returned by `generate`.
+
+        Raises:
+            ProviderBusyException: If the provider is at capacity and the request could not wait for its turn.
+            FailedDependencyException: If an error occurs during the API call to OpenAI.
+        """
+        result: GENResult = await cls._aresolve(data, user, cache_mode)
+
+        await GENLogWriter.awrite(cls._build_log(data, user, result))
+        await GENQuota.arecord_tokens(user, result.prompt_tokens + result.completion_tokens)
+
+        return cls._build_payload(result)
+
+    @classmethod
+    async def agenerate_batch(
+        cls,
+        items: list[GENData],
+        user: User,
+        cache_mode: CacheMode = CacheMode.USE,
+    ) -> list[dict[str, str | int | bool]]:
+        """
+        Generates content for several inputs concurrently, with bounded fan-out.
+
+        At most `_batch_concurrency` provider calls are in flight at once. A provider failure only
+        affects its own item, which is reported with the same 424 status and message used by
+        `GenView`, or 503 when it could not get a slot of `GENConcurrencyLimiter`. Every
+        successful item is logged through a single `bulk_create`.
+
+        Args:
+            items (list[GENData]): Structured inputs, one per document to generate.
+            user (User): The Django user initiating the request, used for logging.
+            cache_mode (CacheMode): Whether to use, bypass or refresh the response cache.
+
+        Returns:
+            list[dict[str, str | int | bool]]: One entry per input, in input order, holding its
+                                               `index`, HTTP-like `status` and either the
+                                               generation payload or an error `message`.
+        """
+        semaphore = asyncio.Semaphore(cls._batch_concurrency)
+
+        async def resolve(item: GENData) -> GENResult:
+            async with semaphore:
+                return await cls._aresolve(item, user, cache_mode)
+
+        outcomes: list[GENResult | BaseException] = await asyncio.gather(
+            *(resolve(item) for item in items),
+            return_exceptions=True,
+        )
+
+        logs: list[dict] = []
+        results: list[dict[str, str | int | bool]] = []
+        for index, (item, outcome) in enumerate(zip(items, outcomes)):
+            if isinstance(outcome, ProviderBusyException):
+                results.append({"index": index, "status": HTTPStatus.SERVICE_UNAVAILABLE, "message": GenMessages.PROVIDER_BUSY})
+            elif isinstance(outcome, FailedDependencyException):
+                results.append({"index": index, "status": HTTPStatus.FAILED_DEPENDENCY, "message": GenMessages.FAILED_DEPENDENCY})
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                logs.append(cls._build_log(item, user, outcome))
+                results.append({"index": index, "status": HTTPStatus.OK, **cls._build_payload(outcome)})
+
+        await GENLogWriter.awrite_many(logs)
+        await GENQuota.arecord_tokens(user, sum(log["prompt_tokens"] + log["completion_tokens"] for log in logs))
+
+        return results
+
+    @classmethod
+    def _resolve(cls, data: GENData, user: User, cache_mode: CacheMode) -> GENResult:
+        """
+        Produces the completion for a request, from the cache or from the provider.
+
+        The model tier is chosen by `GENRouter`, and caches are scoped to it. The exact cache is
+        checked first, then the near-duplicate `GENSimilarCache`. On a miss, concurrent identical requests (in this process or in other workers) are
+        coalesced by `GENSingleFlight`, so only one of them reaches the provider; the others share
+        its result with zero tokens attributed to them.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+            user (User): The Django user initiating the request, whose turn is taken for the provider call.
+            cache_mode (CacheMode): Whether to use, bypass or refresh the response cache.
 
         Returns:
-            dict[str, str | int]: A dictionary containing the model used, timestamp of creation, 
-                                  and the generated content.
+            GENResult: The generated content and its token usage.
 
         Raises:
+            ProviderBusyException: If no provider slot could be taken.
             FailedDependencyException: If an error occurs during the API call to OpenAI.
         """
-        openai.api_key = config("OPENAI_API_KEY")
+        route: RouteDecision = GENRouter.route(data)
+        key: str = cls._cache_key(data, route.model)
+        if cache_mode is not CacheMode.USE:
+            return cls._complete(data, user, route, key, cache_mode)
+
+        cached = cls._lookup(GENCache.get(key), route)
+        if cached is not None:
+            return cached
+        similar = cls._lookup(GENSimilarCache.lookup(data, route.model), route)
+        if similar is not None:
+            return similar
+
+        result, shared = GENSingleFlight.run(
+            key,
+            lambda: cls._complete(data, user, route, key, cache_mode),
+            lambda: cls._lookup(GENCache.get(key), route),
+        )
+        return replace(result, prompt_tokens=0, completion_tokens=0, cached_tokens=0, coalesced=True) if shared else result
+
+    @classmethod
+    async def _aresolve(cls, data: GENData, user: User, cache_mode: CacheMode) -> GENResult:
+        """
+        Asynchronous counterpart of `_resolve`.
+        """
+        route: RouteDecision = GENRouter.route(data)
+        key: str = cls._cache_key(data, route.model)
+        if cache_mode is not CacheMode.USE:
+            return await cls._acomplete(data, user, route, key, cache_mode)
+
+        cached = cls._lookup(await GENCache.aget(key), route)
+        if cached is not None:
+            return cached
+        similar = cls._lookup(await GENSimilarCache.alookup(data, route.model), route)
+        if similar is not None:
+            return similar
+
+        async def recheck() -> GENResult | None:
+            return cls._lookup(await GENCache.aget(key), route)
+
+        result, shared = await GENSingleFlight.arun(
+            key,
+            lambda: cls._acomplete(data, user, route, key, cache_mode),
+            recheck,
+        )
+        return replace(result, prompt_tokens=0, completion_tokens=0, cached_tokens=0, coalesced=True) if shared else result
 
-        messages: list[dict[str, str]] = cls._build_messages(data)
+    @classmethod
+    def _complete(cls, data: GENData, user: User, route: RouteDecision, key: str, cache_mode: CacheMode) -> GENResult:
+        """
+        Calls the provider and caches the response unless the cache is bypassed.
+
+        When `GENTokenBudget` has learned an output budget for the request, it is sent as
+        `max_completion_tokens`, and an answer cut by it is continued (up to
+        `GENTokenBudget.max_continuations` times) by the model that started it. The calls, with
+        their continuations, hold a single slot of `GENConcurrencyLimiter`, shared by every worker.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+            user (User): The Django user initiating the request, whose turn is taken for the provider call.
+            route (RouteDecision): Model tier chosen for the request, with its fallbacks.
+            key (str): Cache key of the request.
+            cache_mode (CacheMode): Whether to use, bypass or refresh the response cache.
+
+        Returns:
+            GENResult: The generated content and its token usage.
+
+        Raises:
+            ProviderBusyException: If no provider slot could be taken.
+            FailedDependencyException: If an error occurs during the API call to OpenAI.
+        """
+        messages: list[dict[str, str]] = GENPrompts.build_messages(data)
+        # Several candidates cannot be continued one by one, so they are never budgeted.
+        budget: int | None = GENTokenBudget.get(data) if data.candidates == 1 else None
 
+        with GENConcurrencyLimiter.slot(user):
+            response, model_used, fallbacks = cls._create(user, route, messages, data.candidates, budget)
+            responses: list[ChatCompletion] = [response]
+            truncated: bool = budget is not None and response.choices[0].finish_reason == "length"
+            while truncated and len(responses) <= GENTokenBudget.max_continuations:
+                pinned = replace(route, model=model_used, fallbacks=())
+                try:
+                    response, _, _ = cls._create(user, pinned, GENPrompts.continue_messages(messages, cls._partial(responses)), 1, budget)
+                except FailedDependencyException:
+                    # A cut answer is still better than none.
+                    break
+                responses.append(response)
+                truncated = response.choices[0].finish_reason == "length"
+        if budget is not None:
+            GENTokenBudget.record(len(responses) - 1, truncated)
+
+        result = cls._merge(responses, route, model_used, fallbacks, budget, truncated)
+
+        if cache_mode is not CacheMode.BYPASS:
+            entry = CachedGeneration(model=result.model, generated_content=result.content, alternatives=result.alternatives)
+            GENCache.set(key, entry)
+            GENSimilarCache.add(data, route.model, entry)
+
+        return result
+
+    @classmethod
+    async def _acomplete(cls, data: GENData, user: User, route: RouteDecision, key: str, cache_mode: CacheMode) -> GENResult:
+        """
+        Asynchronous counterpart of `_complete`.
+        """
+        messages: list[dict[str, str]] = GENPrompts.build_messages(data)
+        budget: int | None = await GENTokenBudget.aget(data) if data.candidates == 1 else None
+
+        async with GENConcurrencyLimiter.aslot(user):
+            response, model_used, fallbacks = await cls._acreate(user, route, messages, data.candidates, budget)
+            responses: list[ChatCompletion] = [response]
+            truncated: bool = budget is not None and response.choices[0].finish_reason == "length"
+            while truncated and len(responses) <= GENTokenBudget.max_continuations:
+                pinned = replace(route, model=model_used, fallbacks=())
+                try:
+                    response, _, _ = await cls._acreate(user, pinned, GENPrompts.continue_messages(messages, cls._partial(responses)), 1, budget)
+                except FailedDependencyException:
+                    break
+                responses.append(response)
+                truncated = response.choices[0].finish_reason == "length"
+        if budget is not None:
+            GENTokenBudget.record(len(responses) - 1, truncated)
+
+        result = cls._merge(responses, route, model_used, fallbacks, budget, truncated)
+
+        if cache_mode is not CacheMode.BYPASS:
+            entry = CachedGeneration(model=result.model, generated_content=result.content, alternatives=result.alternatives)
+            await GENCache.aset(key, entry)
+            await GENSimilarCache.aadd(data, route.model, entry)
+
+        return result
+
+    @classmethod
+    def _create(
+        cls,
+        user: User,
+        route: RouteDecision,
+        messages: list[dict[str, str]],
+        candidates: int,
+        budget: int | None,
+    ) -> tuple[ChatCompletion, str, int]:
+        """
+        Sends one chat completion request to the provider.
+
+        Transient failures are retried; anything left is mapped by `GENResilience` to a
+        domain-specific exception that the view knows how to translate into the proper HTTP code.
+        Timeouts and 5xx are then retried on the other tiers by `GENRouter`, and each attempt that
+        is slower than usual may be hedged by `GENHedge`, if a slot of `GENConcurrencyLimiter` is
+        free for the hedge.
+
+        Args:
+            user (User): The Django user initiating the request.
+            route (RouteDecision): Model tier to use, with its fallbacks.
+            messages (list[dict[str, str]]): Chat messages to send.
+            candidates (int): Choices to generate (`n`).
+            budget (int | None): Output token limit, if any.
+
+        Returns:
+            tuple[ChatCompletion, str, int]: The completion, the tier that produced it and the
+                                             number of tiers that failed before it.
+
+        Raises:
+            FailedDependencyException: If an error occurs during the API call to OpenAI.
+        """
+        return GENRouter.call(
+            route,
+            lambda model: GENResilience.call(
+                lambda: GENHedge.call(
+                    lambda: GENClient.get_client().chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=cls._temperature,
+                        timeout=cls._timeout,
+                        n=candidates,
+                        max_completion_tokens=budget if budget is not None else NOT_GIVEN,
+                    ),
+                    lambda: GENConcurrencyLimiter.reserve(user),
+                )
+            ),
+        )
+
+    @classmethod
+    async def _acreate(
+        cls,
+        user: User,
+        route: RouteDecision,
+        messages: list[dict[str, str]],
+        candidates: int,
+        budget: int | None,
+    ) -> tuple[ChatCompletion, str, int]:
+        """
+        Asynchronous counterpart of `_create`.
+        """
+        return await GENRouter.acall(
+            route,
+            lambda model: GENResilience.acall(
+                lambda: GENHedge.acall(
+                    lambda: GENClient.get_async_client().chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=cls._temperature,
+                        timeout=cls._timeout,
+                        n=candidates,
+                        max_completion_tokens=budget if budget is not None else NOT_GIVEN,
+                    ),
+                    lambda: GENConcurrencyLimiter.areserve(user),
+                )
+            ),
+        )
+
+    @staticmethod
+    def _partial(responses: list[ChatCompletion]) -> str:
+        """
+        Joins the first choice of a completion and its continuations, unstripped.
+        """
+        return "".join(response.choices[0].message.content or "" for response in responses)
+
+    @classmethod
+    def _merge(
+        cls,
+        responses: list[ChatCompletion],
+        route: RouteDecision,
+        model_used: str,
+        fallbacks: int,
+        budget: int | None,
+        truncated: bool,
+    ) -> GENResult:
+        """
+        Builds the result of a completion and its continuations, adding up their usage.
+
+        Args:
+            responses (list[ChatCompletion]): The completion followed by its continuations.
+            route (RouteDecision): Model tier chosen for the request.
+            model_used (str): Tier that produced the completion.
+            fallbacks (int): Tiers that failed before it.
+            budget (int | None): Output token limit of each call, if any.
+            truncated (bool): Whether the last call was still cut by the budget.
+
+        Returns:
+            GENResult: The generated content and its token usage.
+        """
+        contents: list[str] = cls._choice_contents(responses[0].choices)
+        if len(responses) > 1:
+            contents = [cls._partial(responses).strip()]
+        return GENResult(
+            model=responses[0].model,
+            content=contents[0],
+            alternatives=tuple(contents[1:]),
+            prompt_tokens=sum(response.usage.prompt_tokens for response in responses),
+            completion_tokens=sum(response.usage.completion_tokens for response in responses),
+            cached_tokens=sum(cls._cached_tokens(response.usage) for response in responses),
+            route=route,
+            model_used=model_used,
+            fallbacks=fallbacks,
+            max_tokens=budget or 0,
+            continuations=len(responses) - 1,
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def _lookup(cached: CachedGeneration | None, route: RouteDecision) -> GENResult | None:
+        """
+        Converts a cache entry into a zero-token `GENResult`.
+
+        Args:
+            cached (CachedGeneration | None): Entry returned by `GENCache`, if any.
+            route (RouteDecision): Model tier chosen for the request.
+
+        Returns:
+            GENResult | None: The cached content flagged as a cache hit, or `None` on a miss.
+        """
+        if cached is None:
+            return None
+        return GENResult(
+            model=cached.model,
+            content=cached.generated_content,
+            alternatives=cached.alternatives,
+            cache_hit=True,
+            route=route,
+        )
+
+    @classmethod
+    async def astream(cls, data: GENData, user: User, cache_mode: CacheMode = CacheMode.USE) -> AsyncIterator[str]:
+        """
+        Opens a streamed completion and returns an iterator of Server-Sent Events.
+
+        The provider stream is opened before returning, so connection failures still surface as
+        `FailedDependencyException` (and a proper 424) instead of a broken event stream. Token
+        deltas are emitted as `delta` events as soon as they arrive; the final `done` event carries
+        the same metadata as `generate`, and the log row is written once the stream completes.
+        The stream holds a slot of `GENConcurrencyLimiter` until the provider finishes sending it,
+        or until the returned iterator is closed, even if it was never read.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+            user (User): The Django user initiating the request, used for logging.
+            cache_mode (CacheMode): Whether to use, bypass or refresh the response cache.
+
+        Returns:
+            AsyncIterator[str]: SSE-formatted `delta`, `done` and `error` events.
+
+        Raises:
+            ProviderBusyException: If the provider is at capacity and the request could not wait for its turn.
+            CircuitOpenException: If the circuit breaker is shedding provider calls.
+            FailedDependencyException: If the stream could not be opened.
+        """
+        route: RouteDecision = GENRouter.route(data)
+        key: str = cls._cache_key(data, route.model)
+        if cache_mode is CacheMode.USE:
+            result = cls._lookup(await GENCache.aget(key), route)
+            if result is not None:
+                await GENLogWriter.awrite(cls._build_log(data, user, result))
+                return cls._replay_events(result)
+
+        events = cls._relay_events(data, user, key, cache_mode, route)
+        # Runs the generator until the stream is open, so it already holds its slot and frees it
+        # when closed, even if the response never starts iterating it.
+        await anext(events)
+        return events
+
+    @classmethod
+    async def _relay_events(
+        cls,
+        data: GENData,
+        user: User,
+        key: str,
+        cache_mode: CacheMode,
+        route: RouteDecision,
+    ) -> AsyncIterator[str]:
+        """
+        Opens the provider stream and forwards it as SSE events while assembling the full response.
+
+        The first value is an empty string yielded once the stream is open; `astream` consumes it
+        before returning, so that opening errors surface there. The slot of `GENConcurrencyLimiter`
+        is taken and released inside the generator.
+
+        Args:
+            data (GENData): The input specification sent to the model.
+            user (User): The Django user initiating the request.
+            key (str): Cache key of the request.
+            cache_mode (CacheMode): Whether the final response should be cached.
+            route (RouteDecision): Model tier chosen for the request.
+
+        Yields:
+            str: SSE-formatted events.
+        """
+        messages: list[dict[str, str]] = GENPrompts.build_messages(data)
+        parts: dict[int, list[str]] = {index: [] for index in range(data.candidates)}
+        prompt_tokens: int = 0
+        completion_tokens: int = 0
+        cached_tokens: int = 0
+
+        slot: uuid.UUID | None = await GENConcurrencyLimiter.aacquire(user)
         try:
-            response = openai.chat.completions.create(
-                model=cls._model,
-                messages=messages,
-                temperature=cls._temperature,
-                timeout=cls._timeout,
+            # Only opening the stream can fall back; once deltas are sent, the model cannot change.
+            stream, model_used, fallbacks = await GENRouter.acall(
+                route,
+                lambda model: GENResilience.acall(
+                    lambda: GENClient.get_async_client().chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=cls._temperature,
+                        timeout=cls._timeout,
+                        n=data.candidates,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                ),
             )
-        except OpenAIError as exc:
-            # Map *any* provider failure to a domain-specific exception that the
-            # view knows how to translate into the proper HTTP code.
-            raise FailedDependencyException(GenMessages.FAILED_DEPENDENCY) from exc
+            model: str = model_used
+            yield ""
 
-        choice: str = response.choices[0].message.content.strip()
+            try:
+                async for chunk in stream:
+                    model = chunk.model or model
+                    if chunk.usage is not None:
+                        prompt_tokens = chunk.usage.prompt_tokens
+                        completion_tokens = chunk.usage.completion_tokens
+                        cached_tokens = cls._cached_tokens(chunk.usage)
+                    for choice in chunk.choices:
+                        if choice.delta.content:
+                            parts.setdefault(choice.index, []).append(choice.delta.content)
+                            delta = {"content": choice.delta.content}
+                            if data.candidates > 1:
+                                # Candidates are generated in parallel, so their deltas interleave.
+                                delta["candidate"] = choice.index
+                            yield cls._format_event("delta", delta)
+            except OpenAIError:
+                # Headers are already sent, so the failure can only be reported in-band.
+                yield cls._format_event("error", {"message": GenMessages.FAILED_DEPENDENCY})
+                return
+        finally:
+            # Also runs when the client disconnects mid-stream, or the response is closed unread.
+            await GENConcurrencyLimiter.arelease(slot)
 
-        # Persist metadata about the generation attempt.
-        ContentGenerationLog.objects.create(
-            title=data.title,
-            objective=data.objective,
-            data=data.data,
-            return_format=data.return_format,
-            response=choice,
-            model_used=cls._model,
-            temperature=cls._temperature,
-            prompt_tokens=response.usage.prompt_tokens,
-            completion_tokens=response.usage.completion_tokens,
-            created_by=user,
+        contents: list[str] = ["".join(parts[index]).strip() for index in sorted(parts)]
+        result = GENResult(
+            model=model,
+            content=contents[0],
+            alternatives=tuple(contents[1:]),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            route=route,
+            model_used=model_used,
+            fallbacks=fallbacks,
         )
 
+        await GENLogWriter.awrite(cls._build_log(data, user, result))
+        await GENQuota.arecord_tokens(user, result.prompt_tokens + result.completion_tokens)
+
+        if cache_mode is not CacheMode.BYPASS:
+            await GENCache.aset(
+                key, CachedGeneration(model=result.model, generated_content=result.content, alternatives=result.alternatives),
+            )
+
+        yield cls._format_event("done", cls._build_payload(result))
+
+    @classmethod
+    async def _replay_events(cls, result: GENResult) -> AsyncIterator[str]:
+        """
+        Emits an already complete (cached) response as a single `delta` (one per candidate)
+        followed by `done`.
+
+        Args:
+            result (GENResult): The complete response.
+
+        Yields:
+            str: SSE-formatted events.
+        """
+        if not result.alternatives:
+            yield cls._format_event("delta", {"content": result.content})
+        else:
+            for index, content in enumerate((result.content, *result.alternatives)):
+                yield cls._format_event("delta", {"content": content, "candidate": index})
+        yield cls._format_event("done", cls._build_payload(result))
+
+    @staticmethod
+    def _format_event(event: str, payload: dict) -> str:
+        """
+        Serializes a payload as a Server-Sent Event.
+
+        Args:
+            event (str): Event name (`delta`, `done` or `error`).
+            payload (dict): JSON-serializable event data.
+
+        Returns:
+            str: The event, terminated by a blank line.
+        """
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    @classmethod
+    def _build_log(cls, data: GENData, user: User, result: GENResult) -> dict:
+        """
+        Gathers the fields persisted in `ContentGenerationLog` for a generation attempt.
+
+        Args:
+            data (GENData): The input specification sent to the model.
+            user (User): The Django user initiating the request.
+            result (GENResult): The generated content and its token usage (zero for cache hits
+                                and coalesced requests).
+
+        Returns:
+            dict: Keyword arguments for `ContentGenerationLog`.
+        """
         return {
-            "model": response.model,
+            "title": data.title,
+            "objective": data.objective,
+            "data": data.data,
+            "return_format": data.return_format,
+            "response": result.content,
+            # Candidates share the call's usage; only the extra ones are stored apart.
+            "alternatives": json.dumps(result.alternatives, ensure_ascii=False) if result.alternatives else None,
+            "candidates": data.candidates,
+            "model_used": result.model_used or result.route.model,
+            "temperature": cls._temperature,
+            "prompt_tokens": result.prompt_tokens,
+            "completion_tokens": result.completion_tokens,
+            "cached_tokens": result.cached_tokens,
+            "prompt_template": GENPrompts.get(data.document_type).label,
+            "routed_model": result.route.model,
+            "route_reason": result.route.reason,
+            "estimated_prompt_tokens": result.route.estimated_tokens,
+            "fallbacks": result.fallbacks,
+            "max_tokens": result.max_tokens,
+            "continuations": result.continuations,
+            "truncated": result.truncated,
+            "cache_hit": result.cache_hit,
+            "coalesced": result.coalesced,
+            "created_by_id": user.pk,
+            # Set here rather than on insert, which may be deferred by `GENLogWriter`.
+            "created_at": timezone.now(),
+        }
+
+    @staticmethod
+    def _build_payload(result: GENResult) -> dict[str, str | int | bool | list[str]]:
+        """
+        Shapes the body returned to the API caller.
+
+        Args:
+            result (GENResult): The generated content.
+
+        Returns:
+            dict[str, str | int | bool | list[str]]: Model, creation timestamp, generated content
+                                                     and cache flag, plus every candidate when
+                                                     several were requested.
+        """
+        payload = {
+            "model": result.model,
             "created": int(time.time()),
-            "generated_content": choice,
+            "generated_content": result.content,
+            "cached": result.cache_hit,
         }
+        if result.alternatives:
+            payload["candidates"] = [result.content, *result.alternatives]
+        return payload
 
     @classmethod
-    def _build_messages(cls, data: GENData) -> list[dict[str, str]]:
+    def _cache_key(cls, data: GENData, model: str) -> str:
+        """
+        Builds the response cache key of a request, including the system prompt of its template.
+
+        Args:
+            data (GENData): Structured input containing metadata and generation parameters.
+            model (str): Model tier chosen for the request.
+
+        Returns:
+            str: Key used with `GENCache` and `GENSingleFlight`.
         """
-        Constructs a list of chat messages conforming to the OpenAI Chat Completions API format.
+        system_prompt: str = GENPrompts.system_prompt(GENPrompts.get(data.document_type))
+        return GENCache.make_key(data, model, cls._temperature, system_prompt)
 
-        Includes a system prompt to set the assistant's behavior and a user message with 
-        the generation instructions.
+    @staticmethod
+    def _cached_tokens(usage: CompletionUsage) -> int:
+        """
+        Reads the prompt tokens the provider served from its prompt cache.
 
         Args:
-            data (GENData): The input specification used to form the user message.
+            usage (CompletionUsage): Usage reported by the provider.
 
         Returns:
-            list[dict[str, str]]: List of messages to be passed to the OpenAI API.
+            int: Cached prompt tokens; 0 when the provider does not report them.
         """
-        user_prompt: str = (
-            f"Título: {data.title}\n"
-            f"Objetivo: {data.objective}\n"
-            f"Dados:\n{data.data}\n\n"
-            f"Formato de retorno: {data.return_format}"
-        )
-        return [
-            {"role": "system", "content": cls._SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ]
\ No newline at end of file
+        details = usage.prompt_tokens_details
+        return (details.cached_tokens or 0) if details is not None else 0
+
+    @staticmethod
+    def _choice_contents(choices: list[Choice]) -> list[str]:
+        """
+        Extracts the text of every choice of a completion, in choice order.
+
+        Args:
+            choices (list[Choice]): Choices returned by the provider, one per requested candidate.
+
+        Returns:
+            list[str]: The stripped contents; the first one is the main response.
+        """
+        return [(choice.message.content or "").strip() for choice in sorted(choices, key=lambda choice: choice.index)]
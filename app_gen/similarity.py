@@ -0,0 +1,337 @@
+import hashlib
+import random
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from asgiref.sync import sync_to_async
+from decouple import Csv, config
+
+from django.db import transaction
+from django.utils import timezone
+
+from app_gen.cache import CachedGeneration
+from app_gen.content import GENContentStore
+from app_gen.models import ContentGenerationLog, SimilarityEntry
+from app_gen.prompts import GENPrompts, PromptTemplate
+
+if TYPE_CHECKING:
+    from app_gen.services import GENData
+
+_PRIME: int = (1 << 61) - 1
+
+def _permutations(count: int) -> list[tuple[int, int]]:
+    """
+    Returns the (a, b) coefficients of the hash permutations `(a * x + b) mod _PRIME`.
+
+    The seed is fixed: signatures are persisted, so the permutations must never change.
+    """
+    rng = random.Random(20240501)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(count)]
+
+class GENSimilarCache:
+    """
+    Near-duplicate response cache based on MinHash signatures and locality-sensitive hashing.
+
+    The exact cache misses requests that differ in punctuation or in a word or two. Here, the
+    user message of a request is normalized (case-folded, punctuation dropped, whitespace
+    collapsed), split into character shingles and reduced to a MinHash signature whose agreement
+    with another signature estimates the Jaccard similarity of their shingles. Signatures are
+    split into bands; requests sharing a band are candidates, and a candidate is served if its
+    estimated similarity reaches the threshold of the request's prompt template.
+
+    Entries are persisted in `SimilarityEntry` and every worker keeps the LSH index in memory,
+    loading the newest `GEN_SIMILAR_MAX_ENTRIES` on first use and then only the rows added
+    since, at most every `GEN_SIMILAR_REFRESH_SECONDS`. Lookups are scoped to the template
+    version and configured model, and entries expire after `GEN_SIMILAR_TTL` seconds.
+    """
+    #: Whether the near-duplicate cache is used at all.
+    _enabled: bool = config("GEN_SIMILAR_CACHE", default=False, cast=bool)
+    #: Estimated Jaccard similarity needed to reuse a response; 0 disables the cache.
+    _threshold: float = config("GEN_SIMILAR_THRESHOLD", default=0.9, cast=float)
+    #: Per-template thresholds ("pdi=0.85,generic=0"), keyed by document type or template label.
+    _thresholds: dict[str, float] = {
+        name.strip(): float(value)
+        for name, value in (item.split("=", 1) for item in config("GEN_SIMILAR_THRESHOLDS", default="", cast=Csv()))
+    }
+    #: Lifetime of an entry, in seconds.
+    _ttl: int = config("GEN_SIMILAR_TTL", default=604800, cast=int)
+    #: Entries kept in each worker's index.
+    _max_entries: int = config("GEN_SIMILAR_MAX_ENTRIES", default=50000, cast=int)
+    #: Seconds between reads of the entries added by other workers.
+    _refresh_seconds: float = config("GEN_SIMILAR_REFRESH_SECONDS", default=5.0, cast=float)
+
+    #: Characters per shingle.
+    _SHINGLE: int = 5
+    #: Bands and rows per band of the signature: candidates are found from ~0.7 similarity on.
+    _BANDS: int = 16
+    _ROWS: int = 8
+    _PERMUTATIONS: list[tuple[int, int]] = _permutations(_BANDS * _ROWS)
+
+    _lock = threading.Lock()
+    _entries: "OrderedDict[int, tuple[tuple[str, str], tuple[int, ...], str, str, float]]" = OrderedDict()
+    _buckets: dict[tuple, set[int]] = defaultdict(set)
+    _last_id: int = 0
+    _next_refresh: float = 0.0
+    _hits: int = 0
+    _misses: int = 0
+
+    @classmethod
+    def lookup(cls, data: "GENData", model_used: str) -> CachedGeneration | None:
+        """
+        Finds the response of a previous, near-identical request.
+
+        Args:
+            data (GENData): The generation input.
+            model_used (str): Model that would serve the request.
+
+        Returns:
+            CachedGeneration | None: The most similar response above the threshold, if any.
+        """
+        template = GENPrompts.get(data.document_type)
+        threshold = cls._threshold_for(template)
+        # One reused response cannot stand in for several alternatives.
+        if not threshold or data.candidates > 1:
+            return None
+        cls._refresh()
+
+        scope = (template.label, model_used)
+        signature = cls.signature(GENPrompts.user_prompt(data))
+        with cls._lock:
+            candidates = set().union(*(cls._buckets.get(key, ()) for key in cls._band_keys(scope, signature)))
+            best, best_similarity = None, 0.0
+            for entry_id in candidates:
+                entry = cls._entries.get(entry_id)
+                if entry is None:
+                    continue
+                similarity = sum(a == b for a, b in zip(signature, entry[1])) / len(signature)
+                if similarity > best_similarity:
+                    best, best_similarity = entry, similarity
+
+        if best is None or best_similarity < threshold:
+            cls._misses += 1
+            return None
+        content = GENContentStore.get_many({best[2]}).get(best[2])
+        if content is None:
+            cls._misses += 1
+            return None
+        cls._hits += 1
+        return CachedGeneration(model=best[3], generated_content=content)
+
+    @classmethod
+    async def alookup(cls, data: "GENData", model_used: str) -> CachedGeneration | None:
+        """
+        Asynchronous counterpart of `lookup`.
+        """
+        if not cls._enabled:
+            return None
+        return await sync_to_async(cls.lookup)(data, model_used)
+
+    @classmethod
+    def add(cls, data: "GENData", model_used: str, entry: CachedGeneration) -> None:
+        """
+        Indexes a freshly generated response, for this worker immediately and for the others on
+        their next refresh.
+
+        Args:
+            data (GENData): The generation input.
+            model_used (str): Model configured for the request.
+            entry (CachedGeneration): The generated response.
+        """
+        template = GENPrompts.get(data.document_type)
+        if not cls._threshold_for(template) or data.candidates > 1:
+            return
+        signature = cls.signature(GENPrompts.user_prompt(data))
+        with transaction.atomic():
+            row = SimilarityEntry.objects.create(
+                prompt_template=template.label,
+                model_used=model_used,
+                model=entry.model,
+                signature=array("I", signature).tobytes(),
+                response_id=GENContentStore.put(entry.generated_content),
+            )
+        cls._index(row.id, (template.label, model_used), signature, row.response_id, row.model, time.time())
+
+    @classmethod
+    async def aadd(cls, data: "GENData", model_used: str, entry: CachedGeneration) -> None:
+        """
+        Asynchronous counterpart of `add`.
+        """
+        if cls._enabled:
+            await sync_to_async(cls.add)(data, model_used, entry)
+
+    @classmethod
+    def backfill(cls, days: int, model_used: str, batch_size: int = 500) -> int:
+        """
+        Indexes the responses generated over the last days, e.g. after enabling the cache.
+
+        Only provider responses are indexed (not cache hits or coalesced requests), for the
+        currently configured model and for templates with a threshold.
+
+        Args:
+            days (int): Days of generation logs to index.
+            model_used (str): Model whose logs are indexed.
+            batch_size (int): Logs read per query.
+
+        Returns:
+            int: Number of entries created.
+        """
+        # Imported here: the service layer imports this module.
+        from app_gen.services import GENData
+
+        logs = ContentGenerationLog.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=days),
+            model_used=model_used,
+            cache_hit=False,
+            coalesced=False,
+        ).order_by("id")
+        created, last_id = 0, 0
+        while batch := list(logs.filter(id__gt=last_id)[:batch_size]):
+            last_id = batch[-1].id
+            GENContentStore.unpack(batch)
+            rows: list[SimilarityEntry] = []
+            with transaction.atomic():
+                for log in batch:
+                    # Logs written before templates existed used the generic prompt.
+                    label = log.prompt_template or GENPrompts.get(None).label
+                    name = label.split("@", 1)[0]
+                    document_type = None if name == GENPrompts.get(None).name else name
+                    try:
+                        template = GENPrompts.get(document_type)
+                    except KeyError:
+                        continue  # document type no longer offered
+                    if template.label != label or not cls._threshold_for(template):
+                        continue  # outdated template version, or cache off for it
+                    data = GENData(
+                        title=log.title, objective=log.objective, data=log.data,
+                        return_format=log.return_format, document_type=document_type,
+                    )
+                    rows.append(SimilarityEntry(
+                        prompt_template=label,
+                        model_used=model_used,
+                        model=model_used,
+                        signature=array("I", cls.signature(GENPrompts.user_prompt(data))).tobytes(),
+                        response_id=log.response_blob_id or GENContentStore.put(log.response),
+                    ))
+                SimilarityEntry.objects.bulk_create(rows)
+            created += len(rows)
+        return created
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """
+        Deletes entries older than `GEN_SIMILAR_TTL`.
+
+        Returns:
+            int: Number of rows removed.
+        """
+        deleted, _ = SimilarityEntry.objects.filter(created_at__lte=timezone.now() - timedelta(seconds=cls._ttl)).delete()
+        return deleted
+
+    @classmethod
+    def stats(cls) -> dict[str, bool | int]:
+        """
+        Returns the near-duplicate cache counters of the current process.
+
+        Returns:
+            dict[str, bool | int]: Whether the cache is enabled, indexed entries, hits and misses.
+        """
+        return {"enabled": cls._enabled, "entries": len(cls._entries), "hits": cls._hits, "misses": cls._misses}
+
+    @classmethod
+    def signature(cls, text: str) -> tuple[int, ...]:
+        """
+        Computes the MinHash signature of a text.
+
+        Args:
+            text (str): The text, normalized here.
+
+        Returns:
+            tuple[int, ...]: One 32-bit minimum per permutation.
+        """
+        # Punctuation and symbols become spaces, then whitespace is collapsed.
+        folded = unicodedata.normalize("NFKC", text).casefold()
+        normalized = " ".join("".join(" " if unicodedata.category(char)[0] in "PS" else char for char in folded).split())
+        shingles = {normalized[i:i + cls._SHINGLE] for i in range(max(1, len(normalized) - cls._SHINGLE + 1))}
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little") for shingle in shingles]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in cls._PERMUTATIONS)
+
+    @classmethod
+    def _threshold_for(cls, template: PromptTemplate) -> float:
+        """
+        Returns the similarity threshold of a template, or 0 if the cache is off for it.
+        """
+        if not cls._enabled:
+            return 0.0
+        return cls._thresholds.get(template.label, cls._thresholds.get(template.name, cls._threshold))
+
+    @classmethod
+    def _band_keys(cls, scope: tuple[str, str], signature: tuple[int, ...]) -> list[tuple]:
+        """
+        Returns the LSH bucket of each band of a signature.
+        """
+        return [(scope, band, signature[band * cls._ROWS:(band + 1) * cls._ROWS]) for band in range(cls._BANDS)]
+
+    @classmethod
+    def _index(cls, entry_id: int, scope: tuple[str, str], signature: tuple[int, ...], response: str, model: str, created: float) -> None:
+        """
+        Adds an entry to this worker's index, evicting the oldest beyond `GEN_SIMILAR_MAX_ENTRIES`.
+        """
+        with cls._lock:
+            if entry_id in cls._entries:
+                return
+            cls._entries[entry_id] = (scope, signature, response, model, created)
+            for key in cls._band_keys(scope, signature):
+                cls._buckets[key].add(entry_id)
+            while len(cls._entries) > cls._max_entries:
+                cls._evict()
+
+    @classmethod
+    def _evict(cls) -> None:
+        """
+        Removes the oldest entry from the index. Must be called with `_lock` held.
+        """
+        entry_id, (scope, signature, *_) = cls._entries.popitem(last=False)
+        for key in cls._band_keys(scope, signature):
+            bucket = cls._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del cls._buckets[key]
+
+    @classmethod
+    def _refresh(cls) -> None:
+        """
+        Loads the entries added since the last refresh and drops the expired ones.
+
+        The first refresh of a process loads the newest entries; later ones only read rows with a
+        higher id, so an entry committed out of id order by a concurrent writer may be skipped.
+        """
+        now = time.monotonic()
+        if now < cls._next_refresh:
+            return
+        cls._next_refresh = now + cls._refresh_seconds
+
+        cutoff = timezone.now() - timedelta(seconds=cls._ttl)
+        rows = SimilarityEntry.objects.filter(created_at__gt=cutoff).values_list(
+            "id", "prompt_template", "model_used", "model", "signature", "response_id", "created_at",
+        )
+        if cls._last_id:
+            rows = rows.filter(id__gt=cls._last_id).order_by("id")
+        else:
+            rows = reversed(list(rows.order_by("-id")[:cls._max_entries]))
+
+        for entry_id, label, model_used, model, signature, response, created_at in rows:
+            values = array("I")
+            values.frombytes(bytes(signature))
+            cls._index(entry_id, (label, model_used), tuple(values), response, model, created_at.timestamp())
+            cls._last_id = max(cls._last_id, entry_id)
+
+        with cls._lock:
+            expired = cutoff.timestamp()
+            while cls._entries and next(iter(cls._entries.values()))[4] <= expired:
+                cls._evict()
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from app_gen.analytics import GENAnalytics, UsageQuery
+from app_gen.models import ContentGenerationLog, UsageRollup
+
+class GENAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="usage")
+        self.today = timezone.localdate()
+
+    def _log(self, days_ago: int, **fields) -> None:
+        defaults = {
+            "title": "t", "objective": "o", "data": "d", "return_format": "r", "response": "x",
+            "model_used": "model", "temperature": 0.7, "prompt_tokens": 10, "completion_tokens": 5,
+            "created_by": self.user,
+            "created_at": GENAnalytics._day_start(self.today - timedelta(days=days_ago)) + timedelta(hours=10),
+        }
+        ContentGenerationLog.objects.create(**{**defaults, **fields})
+
+    def _daily(self) -> list[tuple[int, int, int]]:
+        query = UsageQuery(
+            start=self.today - timedelta(days=1), end=self.today, granularity=UsageRollup.Granularity.DAY,
+            group_by=("bucket",),
+        )
+        return [(row["requests"], row["cache_hits"], row["total_tokens"]) for row in GENAnalytics.summary(query)]
+
+    def test_record_adds_to_existing_rollups(self):
+        record = {
+            "created_at": timezone.now(), "created_by_id": self.user.pk, "model_used": "model",
+            "cache_hit": True, "prompt_tokens": 10, "completion_tokens": 5,
+        }
+
+        GENAnalytics.record([record])
+        GENAnalytics.record([record, {**record, "cache_hit": False}])
+
+        self.assertEqual(UsageRollup.objects.count(), 2)
+        self.assertEqual(self._daily(), [(3, 2, 45)])
+
+    def test_rebuild_recomputes_the_rollups_of_the_logs(self):
+        self._log(1)
+        self._log(0)
+        self._log(0, cache_hit=True)
+
+        self.assertEqual(GENAnalytics.rebuild(), 4)
+        # Re-running replaces the rollups instead of adding to them.
+        self.assertEqual(GENAnalytics.rebuild(), 4)
+        self.assertEqual(self._daily(), [(1, 0, 15), (2, 1, 30)])
+
+    def test_rebuild_keeps_the_rollups_of_archived_days(self):
+        archived = UsageRollup.objects.create(
+            granularity=UsageRollup.Granularity.DAY, bucket=GENAnalytics._day_start(self.today - timedelta(days=400)),
+            user=self.user, model_used="model", requests=7,
+        )
+        self._log(0)
+
+        GENAnalytics.rebuild()
+        GENAnalytics.rebuild(self.today - timedelta(days=500), self.today)
+
+        self.assertTrue(UsageRollup.objects.filter(pk=archived.pk, requests=7).exists())
+
+    def test_compact_drops_only_old_hourly_rollups(self):
+        old = GENAnalytics._day_start(self.today - timedelta(days=10))
+        recent = GENAnalytics._day_start(self.today)
+        for granularity in UsageRollup.Granularity.values:
+            for bucket in (old, recent):
+                UsageRollup.objects.create(granularity=granularity, bucket=bucket, user=self.user, model_used="model")
+
+        self.assertEqual(GENAnalytics.compact(retention_days=5), 1)
+        self.assertFalse(UsageRollup.objects.filter(granularity=UsageRollup.Granularity.HOUR, bucket=old).exists())
+        self.assertEqual(UsageRollup.objects.count(), 3)
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from app_gen.budgets import GENTokenBudget
+from app_gen.content import GENContentStore
+from app_gen.models import ContentGenerationLog
+from app_gen.prompts import GENPrompts
+from app_gen.services import GENData
+
+class GENTokenBudgetTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            GENTokenBudget, _enabled=True, _percentile=100.0, _margin=1.5, _min_tokens=10, _min_samples=3,
+            _budgets={}, _next_refresh=0.0, _refreshing=False,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username="budget")
+        self.label = GENPrompts.get("pdi").label
+
+    def _logs(self, return_format: str, *lengths: int, candidates: int = 1, **fields) -> None:
+        logs = [
+            ContentGenerationLog(
+                title="t", data="d", return_format=return_format, response="r", model_used="model",
+                temperature=0.7, prompt_tokens=1, completion_tokens=length, candidates=candidates,
+                prompt_template=self.label, created_by=self.user, **fields,
+            )
+            for length in lengths
+        ]
+        GENContentStore.pack(logs)
+        ContentGenerationLog.objects.bulk_create(logs)
+
+    def _data(self, return_format: str) -> GENData:
+        return GENData(title="t", objective="o", data="d", return_format=return_format, document_type="pdi")
+
+    def test_budget_is_the_percentile_of_the_format_with_margin(self):
+        self._logs("markdown", 100, 200, 400)
+        self._logs("json", 10, 20, 20)
+
+        self.assertEqual(GENTokenBudget.get(self._data("markdown")), 600)
+        self.assertEqual(GENTokenBudget.get(self._data("json")), 30)
+
+    def test_rare_formats_fall_back_to_the_template_budget(self):
+        self._logs("markdown", 100, 200, 400)
+
+        # The template's group holds every format: 400 * 1.5.
+        self.assertEqual(GENTokenBudget.get(self._data("texto corrido")), 600)
+
+    def test_budgets_are_per_candidate_and_skip_calls_that_did_not_reach_the_provider(self):
+        self._logs("markdown", 300, 300, 300, candidates=3)
+        self._logs("markdown", 5000, cache_hit=True)
+        self._logs("markdown", 5000, coalesced=True)
+
+        self.assertEqual(GENTokenBudget.get(self._data("markdown")), 150)
+
+    def test_no_budget_without_enough_history_or_when_disabled(self):
+        self._logs("markdown", 100, 200)
+
+        self.assertIsNone(GENTokenBudget.get(self._data("markdown")))
+        with mock.patch.object(GENTokenBudget, "_enabled", False):
+            self.assertIsNone(GENTokenBudget.get(self._data("markdown")))
+
+class ContinuationTests(SimpleTestCase):
+    def test_cut_answer_is_sent_back_to_be_continued(self):
+        messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "u"}]
+
+        continued = GENPrompts.continue_messages(messages, "Primeira parte")
+
+        self.assertEqual(continued[:2], messages)
+        self.assertEqual(continued[2], {"role": "assistant", "content": "Primeira parte"})
+        self.assertEqual(continued[3]["role"], "user")
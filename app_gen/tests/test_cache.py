@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from app_gen.cache import CachedGeneration, CacheMode, GENCache
+from app_gen.exceptions import InvalidCacheModeException
+from app_gen.models import GenerationCacheEntry
+from app_gen.services import GENData
+
+class CacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.data = GENData(title="PDI", objective="Plano  de\nvendas", data="equipe", return_format="texto")
+
+    def test_spacing_does_not_change_the_key(self):
+        respaced = GENData(title=" PDI", objective="Plano de vendas", data="equipe\n", return_format="texto")
+
+        self.assertEqual(
+            GENCache.make_key(self.data, "model", 0.7, "system"),
+            GENCache.make_key(respaced, "model", 0.7, "system"),
+        )
+
+    def test_every_parameter_changes_the_key(self):
+        key = GENCache.make_key(self.data, "model", 0.7, "system")
+
+        for args in (("other", 0.7, "system"), ("model", 0.2, "system"), ("model", 0.7, "other")):
+            with self.subTest(args=args):
+                self.assertNotEqual(GENCache.make_key(self.data, *args), key)
+
+    def test_mode_parsing(self):
+        self.assertIs(CacheMode.parse(None), CacheMode.USE)
+        self.assertIs(CacheMode.parse("refresh"), CacheMode.REFRESH)
+        with self.assertRaises(InvalidCacheModeException):
+            CacheMode.parse("sometimes")
+
+class GENCacheTests(TestCase):
+    KEY = "ab" * 32
+
+    def setUp(self):
+        patcher = mock.patch.object(GENCache, "_entries", OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.entry = CachedGeneration(model="model", generated_content="content")
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(GENCache.get(self.KEY))
+
+        GENCache.set(self.KEY, self.entry)
+
+        self.assertEqual(GENCache.get(self.KEY), self.entry)
+        self.assertTrue(GenerationCacheEntry.objects.filter(key=self.KEY).exists())
+
+    def test_shared_hit_is_promoted_to_the_local_tier(self):
+        GENCache.set(self.KEY, self.entry)
+        GENCache._entries.clear()
+
+        self.assertEqual(GENCache.get(self.KEY), self.entry)
+        GenerationCacheEntry.objects.all().delete()
+        self.assertEqual(GENCache.get(self.KEY), self.entry)
+
+    def test_expired_shared_entry_is_a_miss(self):
+        GENCache.set(self.KEY, self.entry)
+        GENCache._entries.clear()
+        GenerationCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertIsNone(GENCache.get(self.KEY))
+        self.assertEqual(GENCache.purge_expired(), 1)
+
+    @mock.patch.object(GENCache, "_max_entries", 2)
+    def test_least_recently_used_entry_is_evicted_locally(self):
+        first, second, third = ("%064x" % i for i in range(3))
+        for key in (first, second):
+            GENCache._set_local(key, self.entry)
+        GENCache._get_local(first)
+
+        GENCache._set_local(third, self.entry)
+
+        self.assertEqual(list(GENCache._entries), [first, third])
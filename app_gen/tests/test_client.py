@@ -0,0 +1,38 @@
+import asyncio
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app_gen.client import GENClient
+
+@mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"})
+class AsyncClientPerLoopTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(GENClient, "_async_clients", type(GENClient._async_clients)())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_each_loop_gets_its_own_client(self):
+        async def twice():
+            return GENClient.get_async_client(), GENClient.get_async_client()
+
+        first, again = asyncio.run(twice())
+        # Under WSGI, the next async view runs on a new loop, as `async_to_sync` does.
+        second, _ = asyncio.run(twice())
+
+        self.assertIs(first, again)
+        self.assertIsNot(first, second)
+        # The client of the first, now closed, loop was dropped.
+        self.assertNotIn(first, list(GENClient._async_clients.values()))
+
+    def test_close_only_closes_the_running_loop_client(self):
+        async def open_and_close():
+            client = GENClient.get_async_client()
+            await GENClient.aclose()
+            return client
+
+        client = asyncio.run(open_and_close())
+
+        self.assertTrue(client.is_closed())
+        self.assertEqual(len(GENClient._async_clients), 0)
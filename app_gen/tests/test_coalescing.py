@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app_gen.coalescing import GENSingleFlight
+
+class _Inflight(dict):
+    """
+    Tells when a caller has found the execution it is going to wait on.
+    """
+    def __init__(self):
+        super().__init__()
+        self.joined = threading.Event()
+
+    def get(self, key, default=None):
+        future = super().get(key, default)
+        if future is not None:
+            self.joined.set()
+        return future
+
+class GENSingleFlightTests(SimpleTestCase):
+    KEY = "ab" * 32
+
+    def setUp(self):
+        self.inflight = _Inflight()
+        patcher = mock.patch.object(GENSingleFlight, "_inflight", self.inflight)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def _leader(self):
+        self.calls.append("leader")
+        self.started.set()
+        self.release.wait(5)
+        return "leader result"
+
+    def _follower(self):
+        self.calls.append("follower")
+        return "own result"
+
+    def test_concurrent_callers_share_one_execution(self):
+        with ThreadPoolExecutor(2) as pool:
+            leading = pool.submit(GENSingleFlight.run, self.KEY, self._leader, lambda: None)
+            self.started.wait(5)
+            following = pool.submit(GENSingleFlight.run, self.KEY, self._follower, lambda: None)
+            self.inflight.joined.wait(5)
+            self.release.set()
+
+            self.assertEqual(leading.result(), ("leader result", False))
+            self.assertEqual(following.result(), ("leader result", True))
+        self.assertEqual(self.calls, ["leader"])
+
+    def test_leader_failure_reaches_followers(self):
+        def failing():
+            self.started.set()
+            self.release.wait(5)
+            raise RuntimeError("provider down")
+
+        with ThreadPoolExecutor(2) as pool:
+            leading = pool.submit(GENSingleFlight.run, self.KEY, failing, lambda: None)
+            self.started.wait(5)
+            following = pool.submit(GENSingleFlight.run, self.KEY, self._follower, lambda: None)
+            self.inflight.joined.wait(5)
+            self.release.set()
+
+            for future in (leading, following):
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+    @mock.patch.object(GENSingleFlight, "_wait_timeout", 0.05)
+    def test_follower_of_a_slow_leader_does_the_work_itself(self):
+        with ThreadPoolExecutor(2) as pool:
+            leading = pool.submit(GENSingleFlight.run, self.KEY, self._leader, lambda: None)
+            self.started.wait(5)
+
+            self.assertEqual(GENSingleFlight.run(self.KEY, self._follower, lambda: None), ("own result", False))
+            self.release.set()
+            leading.result()
+        self.assertEqual(self.calls, ["leader", "follower"])
+
+    @mock.patch.object(GENSingleFlight, "_wait_timeout", 0.05)
+    def test_follower_of_a_slow_leader_reuses_a_stored_result(self):
+        with ThreadPoolExecutor(1) as pool:
+            leading = pool.submit(GENSingleFlight.run, self.KEY, self._leader, lambda: None)
+            self.started.wait(5)
+
+            self.assertEqual(GENSingleFlight.run(self.KEY, self._follower, lambda: "stored"), ("stored", True))
+            self.release.set()
+            leading.result()
+        self.assertEqual(self.calls, ["leader"])
+
+    def test_coroutines_share_one_execution(self):
+        calls = []
+
+        async def compute():
+            calls.append("compute")
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def recheck():
+            return None
+
+        async def both():
+            return await asyncio.gather(*(GENSingleFlight.arun(self.KEY, compute, recheck) for _ in range(2)))
+
+        self.assertEqual(asyncio.run(both()), [("result", False), ("result", True)])
+        self.assertEqual(calls, ["compute"])
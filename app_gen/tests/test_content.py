@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from app_gen.content import GENContentStore
+from app_gen.models import ContentBlob, ContentGenerationLog
+
+class GENContentStoreTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(GENContentStore, "_known", OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username="content")
+
+    def _log(self, response: str) -> ContentGenerationLog:
+        return ContentGenerationLog(
+            title="t", objective="objective", data="data", return_format="format", response=response,
+            model_used="model", temperature=0.7, prompt_tokens=1, completion_tokens=1, created_by=self.user,
+        )
+
+    def _put(self, text: str) -> str:
+        key = GENContentStore.digest(text)
+        GENContentStore._store({key: text})
+        return key
+
+    def test_pack_and_unpack_round_trip(self):
+        long = "long response " * 100
+        logs = [self._log("short"), self._log(long)]
+
+        GENContentStore.pack(logs)
+        ContentGenerationLog.objects.bulk_create(logs)
+
+        self.assertIsNone(logs[0].response)
+        # The shared prompt texts are stored once; only the large response is compressed.
+        self.assertEqual(ContentBlob.objects.count(), 5)
+        self.assertTrue(ContentBlob.objects.get(hash=GENContentStore.digest(long)).compressed)
+        self.assertFalse(ContentBlob.objects.get(hash=GENContentStore.digest("short")).compressed)
+
+        stored = list(ContentGenerationLog.objects.order_by("id"))
+        GENContentStore.unpack(stored)
+        self.assertEqual([log.response for log in stored], ["short", long])
+        self.assertEqual(stored[1].objective, "objective")
+
+        rows = list(ContentGenerationLog.objects.order_by("id").values("id", "response", "response_blob_id"))
+        GENContentStore.unpack_rows(rows)
+        self.assertEqual([row["response"] for row in rows], ["short", long])
+        self.assertNotIn("response_blob_id", rows[0])
+
+    def test_collect_keeps_blobs_used_recently(self):
+        stale, recent = self._put("stale"), self._put("recent")
+        ContentBlob.objects.filter(hash=stale).update(used_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(GENContentStore.collect([stale, recent], timezone.now()), 1)
+        self.assertEqual(list(ContentBlob.objects.values_list("hash", flat=True)), [recent])
+
+    def test_storing_an_existing_blob_again_refreshes_it(self):
+        key = self._put("text")
+        ContentBlob.objects.filter(hash=key).update(used_at=timezone.now() - timedelta(days=1))
+
+        self._put("text")
+
+        self.assertGreater(ContentBlob.objects.get(hash=key).used_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(GENContentStore.collect([key], timezone.now()), 0)
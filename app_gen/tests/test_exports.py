@@ -0,0 +1,66 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client, TestCase
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app_gen.exports import ExportQuery, GENLogExport
+from app_gen.models import ContentGenerationLog
+
+class GENLogExportTests(TestCase):
+    URL = "/v1/api/generation/export/"
+
+    def setUp(self):
+        self.admin = User.objects.create(username="export", is_staff=True)
+        self.auth = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+        ContentGenerationLog.objects.bulk_create([
+            ContentGenerationLog(
+                title=f"title {i}", data="data", response="response", model_used="model",
+                temperature=0.7, prompt_tokens=1, completion_tokens=1, created_by=self.admin,
+            )
+            for i in range(6)
+        ])
+        patcher = mock.patch.object(GENLogExport, "_chunk_size", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_async_stream_sends_first_chunk_before_reading_the_rest(self):
+        fetched = []
+        chunks = GENLogExport._chunks
+
+        def counting(query):
+            for rows in chunks(query):
+                fetched.append(len(rows))
+                yield rows
+
+        async def first_chunk():
+            stream = GENLogExport.astream(ExportQuery())
+            chunk = await stream.__anext__()
+            seen = list(fetched)
+            await stream.aclose()
+            return chunk, seen
+
+        with mock.patch.object(GENLogExport, "_chunks", side_effect=counting):
+            chunk, seen = async_to_sync(first_chunk)()
+
+        self.assertEqual(seen, [2])
+        self.assertEqual(len(chunk.decode().splitlines()), 2)
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        response = await AsyncClient().get(self.URL, headers={"Authorization": self.auth})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)["title"] for line in lines], [f"title {i}" for i in range(6)])
+
+    def test_wsgi_export_is_streamed_synchronously(self):
+        response = Client().get(self.URL, {"file_format": "csv"}, headers={"Authorization": self.auth})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 7)
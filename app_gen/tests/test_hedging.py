@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app_gen.hedging import GENHedge
+
+class HedgeSlotTests(SimpleTestCase):
+    def setUp(self):
+        # Every call is slow enough to be hedged after 50 ms, and the budget always allows it.
+        for name, value in (("_admit", 0.05), ("_spend", True)):
+            patcher = mock.patch.object(GENHedge, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.calls = 0
+
+    def _slow_then_fast(self) -> str:
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(0.3)
+            return "primary"
+        return "hedge"
+
+    def test_no_hedge_without_a_free_slot(self):
+        self.assertEqual(GENHedge.call(self._slow_then_fast, lambda: None), "primary")
+        self.assertEqual(self.calls, 1)
+
+    def test_no_hedge_without_a_free_thread(self):
+        with mock.patch.object(GENHedge, "_idle_threads", threading.BoundedSemaphore(1)) as idle:
+            idle.acquire()
+
+            self.assertEqual(GENHedge.call(self._slow_then_fast), "primary")
+        self.assertEqual(self.calls, 1)
+
+    def test_calls_do_not_wait_for_the_hedge_pool(self):
+        threads = []
+
+        def operation() -> str:
+            threads.append(threading.current_thread().name)
+            return "primary"
+
+        with mock.patch.object(GENHedge, "_pool", side_effect=AssertionError("pool used by a call")):
+            self.assertEqual(GENHedge.call(operation), "primary")
+        self.assertNotEqual(threads, [threading.current_thread().name])
+
+    def test_slot_is_freed_once_the_background_loser_finishes(self):
+        released = threading.Event()
+
+        self.assertEqual(GENHedge.call(self._slow_then_fast, lambda: released.set), "hedge")
+
+        # The primary call is still running in the background, so the slot is still in use.
+        self.assertFalse(released.is_set())
+        self.assertTrue(released.wait(2))
+
+    def test_async_no_hedge_without_a_free_slot(self):
+        async def operation() -> str:
+            self.calls += 1
+            await asyncio.sleep(0.2)
+            return "primary"
+
+        async def reserve():
+            return None
+
+        self.assertEqual(asyncio.run(GENHedge.acall(operation, reserve)), "primary")
+        self.assertEqual(self.calls, 1)
+
+    def test_async_slot_is_freed_after_the_race(self):
+        released = []
+
+        async def operation() -> str:
+            self.calls += 1
+            await asyncio.sleep(0.3 if self.calls == 1 else 0)
+            return "primary" if self.calls == 1 else "hedge"
+
+        async def release():
+            released.append(True)
+
+        async def reserve():
+            return release
+
+        self.assertEqual(asyncio.run(GENHedge.acall(operation, reserve)), "hedge")
+        self.assertEqual(released, [True])
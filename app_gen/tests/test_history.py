@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from app_gen.history import GENHistory, HistoryQuery
+from app_gen.models import ContentGenerationLog
+from app_gen.partitions import GENLogPartitions
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        created_at = timezone.now()
+
+        cursor = GENHistory.encode_cursor(created_at, 42)
+
+        self.assertNotIn("=", cursor)
+        self.assertEqual(GENHistory.decode_cursor(cursor), (created_at, 42))
+
+    def test_foreign_cursor_is_rejected(self):
+        for cursor in ("not a cursor", "bm90IGpzb24", GENHistory.encode_cursor(timezone.now(), 1)[:-3]):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                GENHistory.decode_cursor(cursor)
+
+class GENHistoryTests(TestCase):
+    def setUp(self):
+        self.user, self.other = (User.objects.create(username=name) for name in ("owner", "other"))
+        now = timezone.now()
+        # Two rows share a creation time, so pages must also be ordered by id.
+        times = [now, now - timedelta(minutes=1), now - timedelta(minutes=1), now - timedelta(minutes=2), now]
+        self.logs = [
+            self._log(self.user, f"title {i}", created_at) for i, created_at in enumerate(times)
+        ]
+        self._log(self.other, "someone else's", now)
+
+    @staticmethod
+    def _log(user, title, created_at):
+        return ContentGenerationLog.objects.create(
+            title=title, data="data", response="response", model_used="model", temperature=0.7,
+            prompt_tokens=1, completion_tokens=1, created_by=user, created_at=created_at,
+        )
+
+    def test_pages_list_every_row_once_newest_first(self):
+        seen, after = [], None
+        while True:
+            page = GENHistory.page(self.user, HistoryQuery(limit=2, after=after))
+            seen.extend(row["id"] for row in page["results"])
+            if page["next_cursor"] is None:
+                break
+            after = GENHistory.decode_cursor(page["next_cursor"])
+
+        expected = sorted(self.logs, key=lambda log: (log.created_at, log.id), reverse=True)
+        self.assertEqual(seen, [log.id for log in expected])
+
+    def test_last_full_page_has_no_cursor(self):
+        page = GENHistory.page(self.user, HistoryQuery(limit=len(self.logs)))
+
+        self.assertEqual(len(page["results"]), len(self.logs))
+        self.assertIsNone(page["next_cursor"])
+
+    def test_rows_before_the_retention_window_are_left_out(self):
+        old = self._log(self.user, "archived soon", GENLogPartitions.retained_since() - timedelta(seconds=1))
+
+        page = GENHistory.page(self.user, HistoryQuery(limit=100))
+
+        self.assertNotIn(old.id, [row["id"] for row in page["results"]])
+        with self.assertRaises(ContentGenerationLog.DoesNotExist):
+            GENHistory.get(self.user, old.id)
+
+    def test_get_returns_the_texts_of_own_generations_only(self):
+        log = self.logs[0]
+
+        self.assertEqual(GENHistory.get(self.user, log.id)["response"], "response")
+        with self.assertRaises(ContentGenerationLog.DoesNotExist):
+            GENHistory.get(self.other, log.id)
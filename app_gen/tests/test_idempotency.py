@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from app_gen.exceptions import IdempotencyInFlightException, IdempotencyKeyReusedException
+from app_gen.idempotency import GENIdempotency
+from app_gen.models import IdempotencyKey
+
+class GENIdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="idempotency")
+
+    def test_completed_request_is_replayed(self):
+        claim = GENIdempotency.begin(self.user, "key", "fingerprint")
+        self.assertEqual(claim.status, IdempotencyKey.Status.IN_FLIGHT)
+
+        GENIdempotency.complete(claim, 200, {"generated_content": "x"})
+        stored = GENIdempotency.begin(self.user, "key", "fingerprint")
+
+        self.assertEqual(stored.status, IdempotencyKey.Status.COMPLETED)
+        self.assertEqual((stored.status_code, stored.response), (200, {"generated_content": "x"}))
+
+    def test_key_reused_with_another_request_is_rejected(self):
+        GENIdempotency.begin(self.user, "key", "fingerprint")
+
+        with self.assertRaises(IdempotencyKeyReusedException):
+            GENIdempotency.begin(self.user, "key", "other")
+
+    def test_retry_gives_up_while_the_original_runs(self):
+        GENIdempotency.begin(self.user, "key", "fingerprint")
+
+        with mock.patch.object(GENIdempotency, "_wait", 0), self.assertRaises(IdempotencyInFlightException):
+            GENIdempotency.begin(self.user, "key", "fingerprint")
+
+    def test_released_key_runs_again(self):
+        GENIdempotency.release(GENIdempotency.begin(self.user, "key", "fingerprint"))
+
+        self.assertEqual(GENIdempotency.begin(self.user, "key", "other").status, IdempotencyKey.Status.IN_FLIGHT)
+
+    def test_original_outliving_its_lease_cannot_touch_the_retry_claim(self):
+        original = GENIdempotency.begin(self.user, "key", "fingerprint")
+        IdempotencyKey.objects.filter(pk=original.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        retry = GENIdempotency.begin(self.user, "key", "fingerprint")
+        self.assertNotEqual(retry.lease_token, original.lease_token)
+
+        GENIdempotency.complete(original, 200, {"generated_content": "late"})
+        GENIdempotency.release(original)
+        row = IdempotencyKey.objects.get(pk=retry.pk)
+        self.assertEqual((row.status, row.lease_token), (IdempotencyKey.Status.IN_FLIGHT, retry.lease_token))
+
+        GENIdempotency.complete(retry, 200, {"generated_content": "retry"})
+        self.assertEqual(IdempotencyKey.objects.get(pk=retry.pk).response, {"generated_content": "retry"})
+
+class GenViewIdempotencyTests(TestCase):
+    URL = "/v1/api/generation/"
+    PAYLOAD = {"title": "t", "objective": "o", "data": "d", "return_format": "r"}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="client"))
+
+    @mock.patch("app_gen.views.GENServices.generate", return_value={"generated_content": "x"})
+    def test_retry_is_replayed_without_a_second_generation(self, generate):
+        first = self.client.post(self.URL, self.PAYLOAD, format="json", HTTP_IDEMPOTENCY_KEY="key")
+        retry = self.client.post(self.URL, self.PAYLOAD, format="json", HTTP_IDEMPOTENCY_KEY="key")
+        reused = self.client.post(self.URL, {**self.PAYLOAD, "data": "x"}, format="json", HTTP_IDEMPOTENCY_KEY="key")
+
+        self.assertEqual((first.status_code, retry.status_code, reused.status_code), (200, 200, 422))
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        generate.assert_called_once()
@@ -0,0 +1,111 @@
+import uuid
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app_gen.exceptions import FailedDependencyException
+from app_gen.jobs import GENJobServices
+from app_gen.messages import GenMessages
+from app_gen.models import GenerationJob
+
+class GENJobServicesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="jobs")
+
+    def _job(self, **fields) -> GenerationJob:
+        defaults = {
+            "payload": {"title": "t", "objective": "o", "data": "d", "return_format": "r"},
+            "cache_mode": "use",
+            "max_attempts": 3,
+            "created_by": self.user,
+        }
+        return GenerationJob.objects.create(**{**defaults, **fields})
+
+    def test_claim_takes_runnable_jobs_with_a_fresh_lease(self):
+        pending = self._job()
+        expired = self._job(
+            status=GenerationJob.Status.RUNNING, attempts=1, lease_token=uuid.uuid4(),
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self._job(available_at=timezone.now() + timedelta(hours=1))
+
+        claimed = {job.pk: job for job in GENJobServices.claim(10)}
+
+        self.assertEqual(set(claimed), {pending.pk, expired.pk})
+        self.assertEqual(claimed[pending.pk].attempts, 1)
+        self.assertEqual(claimed[expired.pk].attempts, 2)
+        self.assertNotEqual(claimed[expired.pk].lease_token, expired.lease_token)
+        self.assertEqual(GenerationJob.objects.get(pk=pending.pk).status, GenerationJob.Status.RUNNING)
+
+    def test_claim_fails_expired_jobs_out_of_attempts(self):
+        job = self._job(
+            status=GenerationJob.Status.RUNNING, attempts=3, lease_token=uuid.uuid4(),
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertEqual(GENJobServices.claim(10), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.FAILED)
+        self.assertEqual(job.error, GenMessages.JOB_LEASE_EXPIRED)
+
+    @skipUnless(connection.vendor == "postgresql", "row locks require PostgreSQL")
+    def test_claim_locks_only_job_rows(self):
+        self._job()
+        with CaptureQueriesContext(connection) as queries:
+            GENJobServices.claim(10)
+
+        locking = [query["sql"] for query in queries if "FOR UPDATE" in query["sql"]]
+        self.assertEqual(len(locking), 1)
+        self.assertIn(f'FOR UPDATE OF "{GenerationJob._meta.db_table}" SKIP LOCKED', locking[0])
+
+    def test_fail_schedules_retry_with_exponential_backoff(self):
+        job = self._job(status=GenerationJob.Status.RUNNING, attempts=2, lease_token=uuid.uuid4())
+        before = timezone.now()
+
+        GENJobServices._fail(job, GenMessages.FAILED_DEPENDENCY)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.PENDING)
+        self.assertIsNone(job.lease_token)
+        self.assertEqual(job.error, GenMessages.FAILED_DEPENDENCY)
+        delay = GENJobServices._retry_backoff * 2
+        self.assertGreaterEqual(job.available_at, before + timedelta(seconds=delay))
+        self.assertLessEqual(job.available_at, timezone.now() + timedelta(seconds=delay))
+
+    def test_fail_marks_job_failed_after_max_attempts(self):
+        job = self._job(status=GenerationJob.Status.RUNNING, attempts=3, lease_token=uuid.uuid4())
+
+        GENJobServices._fail(job, GenMessages.FAILED_DEPENDENCY)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_claim_does_not_overwrite_reclaimed_job(self):
+        job = self._job(status=GenerationJob.Status.RUNNING, attempts=1, lease_token=uuid.uuid4())
+        reclaimed = uuid.uuid4()
+        GenerationJob.objects.filter(pk=job.pk).update(attempts=2, lease_token=reclaimed)
+
+        GENJobServices._fail(job, GenMessages.FAILED_DEPENDENCY)
+        with mock.patch("app_gen.jobs.GENServices.generate", return_value={"generated_content": "x"}):
+            GENJobServices.run(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.RUNNING)
+        self.assertEqual(job.lease_token, reclaimed)
+        self.assertIsNone(job.result)
+
+    def test_run_retries_on_provider_failure(self):
+        job = self._job(status=GenerationJob.Status.RUNNING, attempts=1, lease_token=uuid.uuid4())
+
+        with mock.patch("app_gen.jobs.GENServices.generate", side_effect=FailedDependencyException()):
+            GENJobServices.run(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.PENDING)
+        self.assertEqual(job.error, GenMessages.FAILED_DEPENDENCY)
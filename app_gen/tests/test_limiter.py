@@ -0,0 +1,76 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from app_gen.exceptions import ProviderBusyException
+from app_gen.limiter import GENConcurrencyLimiter
+from app_gen.models import ProviderSlot, ProviderWaiter
+
+class GENConcurrencyLimiterTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            GENConcurrencyLimiter, _concurrency=2, _queue_size=3, _queue_per_user=2, _slots_ready=False,
+            _stats={"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        GENConcurrencyLimiter._ensure_slots()
+        self.busy, self.idle, self.newcomer = (User.objects.create(username=name) for name in ("busy", "idle", "new"))
+
+    def test_user_holding_slots_waits_behind_other_users(self):
+        self.assertIsNotNone(GENConcurrencyLimiter._admit(self.busy, None))
+        busy_waiter = GENConcurrencyLimiter._enqueue(self.busy)
+        idle_waiter = GENConcurrencyLimiter._enqueue(self.idle)
+        now = timezone.now()
+
+        self.assertEqual(GENConcurrencyLimiter._rank(self.idle.pk, idle_waiter.pk, now), 0)
+        self.assertEqual(GENConcurrencyLimiter._rank(self.busy.pk, busy_waiter.pk, now), 1)
+        # A newcomer with no slot is still served before the earlier waiter of the busy user.
+        self.assertEqual(GENConcurrencyLimiter._rank(self.newcomer.pk, None, now), 1)
+
+        # Only one slot is left, and it goes to the idle user although the busy one queued first.
+        self.assertIsNone(GENConcurrencyLimiter._admit(self.busy, busy_waiter))
+        self.assertIsNotNone(GENConcurrencyLimiter._admit(self.idle, idle_waiter))
+        self.assertFalse(ProviderWaiter.objects.filter(pk=idle_waiter.pk).exists())
+
+    def test_stale_waiters_are_ignored(self):
+        stale = timezone.now() - timedelta(seconds=GENConcurrencyLimiter._stale_after + 1)
+        ProviderWaiter.objects.create(user=self.idle, enqueued_at=stale, seen_at=stale)
+
+        self.assertEqual(GENConcurrencyLimiter._rank(self.newcomer.pk, None, timezone.now()), 0)
+
+    def test_full_queue_rejects_at_once(self):
+        for user in (self.busy, self.idle, self.newcomer):
+            GENConcurrencyLimiter._enqueue(user)
+
+        with self.assertRaises(ProviderBusyException):
+            GENConcurrencyLimiter._enqueue(self.idle)
+        self.assertEqual(ProviderWaiter.objects.count(), 3)
+        self.assertEqual(GENConcurrencyLimiter._stats["rejected"], 1)
+
+    def test_full_user_queue_rejects_only_that_user(self):
+        for _ in range(2):
+            GENConcurrencyLimiter._enqueue(self.busy)
+
+        with self.assertRaises(ProviderBusyException):
+            GENConcurrencyLimiter._enqueue(self.busy)
+        GENConcurrencyLimiter._enqueue(self.idle)
+        self.assertEqual(ProviderWaiter.objects.filter(user=self.busy).count(), 2)
+
+    def test_expired_lease_is_taken_over(self):
+        dead = uuid.uuid4()
+        ProviderSlot.objects.update(
+            token=dead, user=self.busy, lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        token = GENConcurrencyLimiter._admit(self.idle, None)
+
+        self.assertIsNotNone(token)
+        self.assertEqual(ProviderSlot.objects.get(token=token).user, self.idle)
+        # The worker that lost the slot must not free it from under its new holder.
+        GENConcurrencyLimiter.release(dead)
+        self.assertTrue(ProviderSlot.objects.filter(token=token).exists())
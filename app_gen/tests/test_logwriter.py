@@ -0,0 +1,71 @@
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from app_gen.logwriter import GENLogWriter
+from app_gen.models import ContentGenerationLog
+
+class GENLogWriterTests(TestCase):
+    def setUp(self):
+        spill_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spill_dir.cleanup)
+        self.spill_dir = Path(spill_dir.name)
+        patcher = mock.patch.multiple(
+            GENLogWriter, _spill_dir=self.spill_dir, _written=0, _spilled=0, _stopped=threading.Event(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username="writer")
+
+    def _record(self, title: str) -> dict:
+        return {
+            "title": title, "data": "data", "response": "response", "model_used": "model", "temperature": 0.7,
+            "prompt_tokens": 1, "completion_tokens": 1, "cache_hit": False, "created_by_id": self.user.pk,
+            "created_at": timezone.now(),
+        }
+
+    @mock.patch.object(GENLogWriter, "_enabled", False)
+    def test_unbuffered_writes_go_straight_to_the_database(self):
+        GENLogWriter.write(self._record("direct"))
+
+        self.assertTrue(ContentGenerationLog.objects.filter(title="direct").exists())
+
+    @mock.patch.object(GENLogWriter, "_enabled", True)
+    def test_writes_after_drain_are_not_queued(self):
+        GENLogWriter._stopped.set()
+
+        self.assertFalse(GENLogWriter._enqueue(self._record("late")))
+
+    def test_failed_batch_is_spilled_and_replayed_once(self):
+        records = [self._record(f"title {i}") for i in range(3)]
+
+        with mock.patch.object(GENLogWriter, "_insert", side_effect=DatabaseError):
+            GENLogWriter._flush(records)
+
+        self.assertEqual(len(list(self.spill_dir.glob("*.ndjson"))), 1)
+        self.assertEqual(GENLogWriter.stats()["spilled"], 3)
+        self.assertFalse(ContentGenerationLog.objects.exists())
+
+        self.assertEqual(GENLogWriter.replay_spills(), 3)
+        self.assertEqual(GENLogWriter.replay_spills(), 0)
+        self.assertEqual(
+            list(ContentGenerationLog.objects.order_by("title").values_list("created_at", flat=True)),
+            [record["created_at"] for record in records],
+        )
+        self.assertEqual(list(self.spill_dir.iterdir()), [])
+
+    def test_successful_flush_catches_up_on_earlier_spills(self):
+        GENLogWriter._spill([self._record("spilled")])
+
+        GENLogWriter._flush([self._record("flushed")])
+
+        self.assertEqual(GENLogWriter.stats()["written"], 1)
+        self.assertEqual(
+            sorted(ContentGenerationLog.objects.values_list("title", flat=True)), ["flushed", "spilled"],
+        )
@@ -0,0 +1,51 @@
+from datetime import datetime
+from unittest import mock
+
+from django.db import models
+from django.db.migrations import Migration
+from django.db.migrations.operations import AddField, AddIndex, AlterField, CreateModel, RunSQL
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from app_gen.exceptions import LogPartitionException
+from app_gen.partitions import GENLogPartitions
+
+class LogMigrationGuardTests(SimpleTestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(GENLogPartitions, "is_partitioned", return_value=True),
+            mock.patch("app_gen.partitions.connection", vendor="postgresql"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _check(self, *operations) -> None:
+        migration = Migration("0099_test", "app_gen")
+        migration.operations = list(operations)
+        GENLogPartitions.check_migrations([(migration, False)])
+
+    def test_ordinary_columns_and_indexes_are_allowed(self):
+        self._check(
+            AddField("contentgenerationlog", "extra", models.IntegerField(default=0)),
+            AddIndex("contentgenerationlog", models.Index(fields=["title"], name="log_title")),
+            RunSQL("SELECT 1"),
+        )
+
+    def test_key_unique_and_foreign_key_changes_are_refused(self):
+        for operation in (
+            AlterField("contentgenerationlog", "id", models.BigAutoField(primary_key=True)),
+            AddField("contentgenerationlog", "reference", models.CharField(max_length=10, unique=True)),
+            CreateModel("Note", [
+                ("id", models.AutoField(primary_key=True)),
+                ("log", models.ForeignKey("app_gen.ContentGenerationLog", on_delete=models.CASCADE)),
+            ]),
+        ):
+            with self.subTest(operation=operation.describe()), self.assertRaises(LogPartitionException):
+                self._check(operation)
+
+class RetentionWindowTests(SimpleTestCase):
+    @mock.patch.object(GENLogPartitions, "_retention_months", 12)
+    def test_retained_since_is_the_oldest_kept_month(self):
+        now = timezone.make_aware(datetime(2025, 3, 15, 12))
+        with mock.patch("app_gen.partitions.timezone.now", return_value=now):
+            self.assertEqual(GENLogPartitions.retained_since(), timezone.make_aware(datetime(2024, 3, 1)))
@@ -0,0 +1,50 @@
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+
+from django.test import SimpleTestCase
+
+from app_gen.prompts import DocumentType, GENPrompts
+from app_gen.services import GENData, GENServices
+
+class GENPromptsTests(SimpleTestCase):
+    def _data(self, title: str, document_type: str | None = DocumentType.PDI.value) -> GENData:
+        return GENData(
+            title=title, objective="Crescer na área", data="Analista há dois anos", return_format="markdown",
+            document_type=document_type,
+        )
+
+    def test_requests_of_a_type_share_the_system_message(self):
+        first = GENPrompts.build_messages(self._data("PDI de Ana"))
+        second = GENPrompts.build_messages(self._data("PDI de Bruno"))
+
+        self.assertEqual(first[0], second[0])
+        self.assertNotEqual(first[1], second[1])
+        # The request's fields only reach the last message, after the cacheable prefix.
+        self.assertNotIn("PDI de Ana", first[0]["content"])
+        self.assertIn("PDI de Ana", first[-1]["content"])
+
+    def test_each_type_has_its_own_versioned_template(self):
+        labels = {GENPrompts.get(document_type.value).label for document_type in DocumentType}
+
+        self.assertEqual(len(labels), len(DocumentType))
+        self.assertIn("pdi@1", labels)
+
+    def test_free_form_requests_keep_the_generic_prompt(self):
+        template = GENPrompts.get(None)
+
+        self.assertEqual(template.label, "generic@1")
+        self.assertEqual(GENPrompts.build_messages(self._data("Carta", None))[0]["content"], template.instructions)
+
+class CachedTokensTests(SimpleTestCase):
+    def test_cached_tokens_are_read_from_the_usage_details(self):
+        usage = CompletionUsage(
+            prompt_tokens=1500, completion_tokens=200, total_tokens=1700,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=1280),
+        )
+
+        self.assertEqual(GENServices._cached_tokens(usage), 1280)
+
+    def test_missing_details_count_as_no_cached_tokens(self):
+        usage = CompletionUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+
+        self.assertEqual(GENServices._cached_tokens(usage), 0)
@@ -0,0 +1,67 @@
+import threading
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from app_gen.exceptions import QuotaExceededException
+from app_gen.models import UsageCounter, UsageQuota
+from app_gen.quotas import GENQuota
+
+class QuotaTestMixin:
+    def setUp(self):
+        # Per-process caches would outlive the rows of the previous test.
+        GENQuota._limits.clear()
+        GENQuota._provisioned.clear()
+        self.user = User.objects.create(username="quota")
+        UsageQuota.objects.create(user=self.user, requests_per_minute=3)
+
+    def _minute_requests(self) -> int:
+        return UsageCounter.objects.get(user=self.user, window=UsageCounter.Window.MINUTE).requests
+
+class GENQuotaTests(QuotaTestMixin, TestCase):
+    def test_requests_over_the_limit_are_rejected_and_not_counted(self):
+        for _ in range(3):
+            GENQuota.check(self.user)
+
+        with self.assertRaises(QuotaExceededException) as raised:
+            GENQuota.check(self.user)
+
+        self.assertTrue(1 <= raised.exception.retry_after <= 60)
+        self.assertEqual(self._minute_requests(), 3)
+
+    def test_batch_is_admitted_only_if_it_fits(self):
+        GENQuota.check(self.user, 2)
+
+        with self.assertRaises(QuotaExceededException):
+            GENQuota.check(self.user, 2)
+        GENQuota.check(self.user, 1)
+
+        self.assertEqual(self._minute_requests(), 3)
+
+@skipUnless(connection.vendor == "postgresql", "row locks require PostgreSQL")
+class GENQuotaConcurrencyTests(QuotaTestMixin, TransactionTestCase):
+    def test_concurrent_requests_do_not_overshoot_the_limit(self):
+        GENQuota.check(self.user)
+        admitted = []
+        barrier = threading.Barrier(8)
+
+        def request():
+            try:
+                barrier.wait()
+                GENQuota.check(self.user)
+                admitted.append(True)
+            except QuotaExceededException:
+                pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(admitted), 2)
+        self.assertEqual(self._minute_requests(), 3)
@@ -0,0 +1,56 @@
+import asyncio
+import math
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app_gen.exceptions import CircuitOpenException
+from app_gen.resilience import GENCircuitBreaker, GENResilience
+
+class HalfOpenProbeTests(SimpleTestCase):
+    def setUp(self):
+        # Cooldown just elapsed; the shared state is never re-read, so no database is needed.
+        patcher = mock.patch.multiple(
+            GENCircuitBreaker, _opened_until=time.time() - 1, _probing=False, _failures=0, _synced_at=math.inf,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_probe_failing_outside_the_provider_is_released(self):
+        def broken():
+            raise RuntimeError("not an OpenAIError")
+
+        with self.assertRaises(RuntimeError):
+            GENResilience.call(broken)
+
+        self.assertFalse(GENCircuitBreaker._probing)
+        self.assertTrue(GENCircuitBreaker.check())
+
+    def test_cancelled_probe_is_released(self):
+        async def cancel_probe():
+            task = asyncio.ensure_future(GENResilience.acall(lambda: asyncio.sleep(10)))
+            await asyncio.sleep(0)
+            self.assertTrue(GENCircuitBreaker._probing)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_probe())
+
+        self.assertFalse(GENCircuitBreaker._probing)
+
+    def test_only_one_probe_at_a_time(self):
+        self.assertTrue(GENCircuitBreaker.check())
+        with self.assertRaises(CircuitOpenException):
+            GENCircuitBreaker.check()
+
+    def test_failing_call_admitted_while_closed_keeps_the_probe(self):
+        GENCircuitBreaker._opened_until = None
+        self.assertFalse(GENCircuitBreaker.check())
+        GENCircuitBreaker._probing = True
+
+        with self.assertRaises(RuntimeError):
+            GENResilience.call(lambda: (_ for _ in ()).throw(RuntimeError()))
+
+        self.assertTrue(GENCircuitBreaker._probing)
@@ -0,0 +1,105 @@
+import asyncio
+from collections import Counter
+from unittest import mock
+
+import httpx
+from openai import APIStatusError, APITimeoutError
+
+from django.test import SimpleTestCase
+
+from app_gen.exceptions import CircuitOpenException, FailedDependencyException
+from app_gen.routing import GENRouter
+from app_gen.services import GENData
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+def failure(cause: Exception) -> FailedDependencyException:
+    """
+    Builds the exception `GENResilience` raises once it gives up on a call.
+    """
+    try:
+        raise FailedDependencyException() from cause
+    except FailedDependencyException as exc:
+        return exc
+
+class RouteTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            GENRouter, _tiers=["mini", "standard", "large"], _token_limits=[100, 1000],
+            _document_tiers={"pdi": 1}, _fallback=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _data(self, size: int, document_type: str | None = None) -> GENData:
+        return GENData(title="t", objective="o", data="x" * size, return_format="r", document_type=document_type)
+
+    def test_requests_go_to_the_smallest_tier_that_holds_them(self):
+        for size, model in ((100, "mini"), (1000, "standard"), (10000, "large")):
+            with self.subTest(size=size):
+                decision = GENRouter.route(self._data(size))
+                self.assertEqual((decision.model, decision.reason), (model, "size"))
+
+    def test_document_type_raises_the_tier(self):
+        decision = GENRouter.route(self._data(10, "pdi"))
+
+        self.assertEqual((decision.model, decision.reason), ("standard", "document_type"))
+        # Fallbacks go up the tiers first, then down.
+        self.assertEqual(decision.chain, ("standard", "large", "mini"))
+
+    def test_single_tier_routes_everything_to_it(self):
+        with mock.patch.multiple(GENRouter, _tiers=["only"], _token_limits=[], _document_tiers={}):
+            decision = GENRouter.route(self._data(10000, "pdi"))
+
+        self.assertEqual((decision.model, decision.reason, decision.fallbacks), ("only", "default", ()))
+
+class FallbackTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            GENRouter, _tiers=["mini", "standard"], _token_limits=[], _document_tiers={}, _fallback=True,
+            _routed=Counter(), _fallbacks=Counter(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.decision = GENRouter.route(GENData(title="t", objective="o", data="d", return_format="r"))
+
+    def _failing_on_first(self, error: FailedDependencyException):
+        tried = []
+
+        def operation(model: str) -> str:
+            tried.append(model)
+            if len(tried) == 1:
+                raise error
+            return "answer"
+
+        return operation, tried
+
+    def test_timeouts_and_server_errors_fall_back(self):
+        server_error = APIStatusError("unavailable", response=httpx.Response(503, request=REQUEST), body=None)
+        for cause in (APITimeoutError(REQUEST), server_error):
+            with self.subTest(cause=type(cause).__name__):
+                operation, tried = self._failing_on_first(failure(cause))
+
+                with self.assertLogs("app_gen.routing", "WARNING"):
+                    self.assertEqual(GENRouter.call(self.decision, operation), ("answer", "standard", 1))
+                self.assertEqual(tried, ["mini", "standard"])
+
+    def test_client_errors_and_open_circuit_do_not_fall_back(self):
+        client_error = APIStatusError("bad request", response=httpx.Response(400, request=REQUEST), body=None)
+        for error in (failure(client_error), CircuitOpenException(5)):
+            with self.subTest(error=error):
+                operation, tried = self._failing_on_first(error)
+
+                with self.assertRaises(FailedDependencyException):
+                    GENRouter.call(self.decision, operation)
+                self.assertEqual(tried, ["mini"])
+
+    def test_async_fallback(self):
+        async def operation(model: str) -> str:
+            if model == "mini":
+                raise failure(APITimeoutError(REQUEST))
+            return "answer"
+
+        with self.assertLogs("app_gen.routing", "WARNING"):
+            self.assertEqual(asyncio.run(GENRouter.acall(self.decision, operation)), ("answer", "standard", 1))
+        self.assertEqual(GENRouter.stats()["fallbacks"], {"mini": 1})
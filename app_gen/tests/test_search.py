@@ -0,0 +1,48 @@
+from datetime import timedelta
+from unittest import skipIf, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from app_gen.exceptions import SearchUnavailableException
+from app_gen.models import ContentGenerationLog
+from app_gen.partitions import GENLogPartitions
+from app_gen.search import GENSearch, SearchParams
+
+@skipIf(connection.vendor == "postgresql", "Full-text search is available on PostgreSQL")
+class SearchUnavailableTests(TestCase):
+    def test_other_databases_refuse_searches(self):
+        with self.assertRaises(SearchUnavailableException):
+            GENSearch.search(User.objects.create(username="owner"), SearchParams(q="vendas", limit=10))
+
+@skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL")
+class GENSearchTests(TestCase):
+    def setUp(self):
+        self.user, self.other = (User.objects.create(username=name) for name in ("owner", "other"))
+
+    def _log(self, user, title, response, created_at=None):
+        log = ContentGenerationLog(
+            title=title, data="data", response=response, model_used="model", temperature=0.7,
+            prompt_tokens=1, completion_tokens=1, created_by=user, created_at=created_at or timezone.now(),
+        )
+        GENSearch.index([log])
+        log.save()
+        return log
+
+    def test_title_matches_rank_first_with_highlighted_snippets(self):
+        in_response = self._log(self.user, "Relatório", "Metas da equipe de vendas")
+        in_title = self._log(self.user, "Plano de vendas", "Metas do trimestre")
+        self._log(self.user, "Outro", "Nada a ver")
+        self._log(self.other, "Vendas", "Metas de vendas")
+
+        rows = GENSearch.search(self.user, SearchParams(q="venda", limit=10))
+
+        self.assertEqual([row["id"] for row in rows], [in_title.id, in_response.id])
+        self.assertIn("<mark>vendas</mark>", rows[1]["snippet"])
+
+    def test_rows_before_the_retention_window_are_left_out(self):
+        self._log(self.user, "Vendas", "Metas", GENLogPartitions.retained_since() - timedelta(seconds=1))
+
+        self.assertEqual(GENSearch.search(self.user, SearchParams(q="vendas", limit=10)), [])
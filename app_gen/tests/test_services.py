@@ -0,0 +1,42 @@
+import asyncio
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app_gen.cache import CacheMode
+from app_gen.exceptions import FailedDependencyException
+from app_gen.limiter import GENConcurrencyLimiter
+from app_gen.routing import GENRouter
+from app_gen.services import GENData, GENServices
+
+class StreamSlotTests(SimpleTestCase):
+    def setUp(self):
+        self.slot = uuid.uuid4()
+        self.data = GENData(title="t", objective="o", data="d", return_format="r")
+        self.release = mock.AsyncMock()
+        for name, value in (
+            ("aacquire", mock.AsyncMock(return_value=self.slot)),
+            ("arelease", self.release),
+        ):
+            patcher = mock.patch.object(GENConcurrencyLimiter, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_slot_is_released_when_the_stream_is_closed_unread(self):
+        async def open_and_close():
+            events = await GENServices.astream(self.data, mock.Mock(), CacheMode.BYPASS)
+            self.release.assert_not_awaited()
+            await events.aclose()
+
+        with mock.patch.object(GENRouter, "acall", mock.AsyncMock(return_value=(mock.Mock(), "model", 0))):
+            asyncio.run(open_and_close())
+
+        self.release.assert_awaited_once_with(self.slot)
+
+    def test_slot_is_released_when_the_stream_cannot_be_opened(self):
+        with mock.patch.object(GENRouter, "acall", mock.AsyncMock(side_effect=FailedDependencyException())):
+            with self.assertRaises(FailedDependencyException):
+                asyncio.run(GENServices.astream(self.data, mock.Mock(), CacheMode.BYPASS))
+
+        self.release.assert_awaited_once_with(self.slot)
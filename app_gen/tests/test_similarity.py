@@ -0,0 +1,74 @@
+from collections import OrderedDict, defaultdict
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from app_gen.cache import CachedGeneration
+from app_gen.models import SimilarityEntry
+from app_gen.services import GENData
+from app_gen.similarity import GENSimilarCache
+
+DATA = (
+    "Analista de vendas há dois anos na equipe de contas corporativas, com metas de receita "
+    "atingidas em todos os trimestres, boa relação com clientes e interesse em assumir a "
+    "coordenação da equipe no próximo ciclo. Precisa desenvolver negociação com diretoria, "
+    "planejamento de território e condução de reuniões de acompanhamento com o time."
+)
+
+class SignatureTests(SimpleTestCase):
+    def test_case_punctuation_and_spacing_are_ignored(self):
+        self.assertEqual(
+            GENSimilarCache.signature("Plano de vendas, equipe Sul!"),
+            GENSimilarCache.signature("plano  de vendas equipe sul"),
+        )
+
+    def test_signature_agreement_follows_text_similarity(self):
+        def agreement(a: str, b: str) -> float:
+            pairs = zip(GENSimilarCache.signature(a), GENSimilarCache.signature(b))
+            return sum(x == y for x, y in pairs) / len(GENSimilarCache._PERMUTATIONS)
+
+        self.assertGreater(agreement(DATA, DATA.replace("dois anos", "três anos")), 0.8)
+        self.assertLess(agreement(DATA, "Descrição de cargo para engenheira de dados sênior."), 0.2)
+
+class GENSimilarCacheTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            GENSimilarCache, _enabled=True, _threshold=0.8, _thresholds={}, _entries=OrderedDict(),
+            _buckets=defaultdict(set), _last_id=0, _next_refresh=0.0, _hits=0, _misses=0,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.data = GENData(title="PDI", objective="Liderança", data=DATA, return_format="markdown")
+        self.entry = CachedGeneration(model="model", generated_content="Plano de desenvolvimento")
+
+    def test_near_duplicate_request_is_served(self):
+        GENSimilarCache.add(self.data, "model", self.entry)
+
+        near = GENData(title="PDI", objective="Liderança.", data=DATA.replace("dois", "três"), return_format="markdown")
+
+        self.assertEqual(GENSimilarCache.lookup(near, "model"), self.entry)
+        self.assertEqual(GENSimilarCache.stats()["hits"], 1)
+
+    def test_other_models_and_unrelated_requests_miss(self):
+        GENSimilarCache.add(self.data, "model", self.entry)
+        unrelated = GENData(title="Cargo", objective="Vaga", data="Engenheira de dados", return_format="texto")
+
+        self.assertIsNone(GENSimilarCache.lookup(self.data, "other model"))
+        self.assertIsNone(GENSimilarCache.lookup(unrelated, "model"))
+
+    def test_entries_of_other_workers_are_loaded_on_refresh(self):
+        GENSimilarCache.add(self.data, "model", self.entry)
+        # A fresh worker knows nothing but the table.
+        GENSimilarCache._entries.clear()
+        GENSimilarCache._buckets.clear()
+        GENSimilarCache._last_id = 0
+
+        self.assertEqual(GENSimilarCache.lookup(self.data, "model"), self.entry)
+        self.assertEqual(SimilarityEntry.objects.count(), 1)
+
+    def test_disabled_cache_neither_stores_nor_serves(self):
+        with mock.patch.object(GENSimilarCache, "_enabled", False):
+            GENSimilarCache.add(self.data, "model", self.entry)
+
+            self.assertIsNone(GENSimilarCache.lookup(self.data, "model"))
+        self.assertFalse(SimilarityEntry.objects.exists())
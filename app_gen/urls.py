@@ -1,9 +1,21 @@
 from django.urls import path
 
-from app_gen.views import GenView
+from app_gen.views import AsyncGenView, BatchGenView, GenExportView, GenHistoryItemView, GenHistoryView, GenJobsView, GenJobView, GenQuotaView, GenSearchView, GenStatsView, GenUsageView, GenView, StreamGenView
 
 app_name = 'app_gen'
 
 urlpatterns = [
     path('', GenView.as_view(), name='gen_view'),
-]
\ No newline at end of file
+    path('async/', AsyncGenView.as_view(), name='async_gen_view'),
+    path('stream/', StreamGenView.as_view(), name='stream_gen_view'),
+    path('batch/', BatchGenView.as_view(), name='batch_gen_view'),
+    path('jobs/', GenJobsView.as_view(), name='gen_jobs_view'),
+    path('jobs/<str:job_id>/', GenJobView.as_view(), name='gen_job_view'),
+    path('history/', GenHistoryView.as_view(), name='gen_history_view'),
+    path('history/<str:log_id>/', GenHistoryItemView.as_view(), name='gen_history_item_view'),
+    path('search/', GenSearchView.as_view(), name='gen_search_view'),
+    path('stats/', GenStatsView.as_view(), name='gen_stats_view'),
+    path('quotas/<str:user_id>/', GenQuotaView.as_view(), name='gen_quota_view'),
+    path('usage/', GenUsageView.as_view(), name='gen_usage_view'),
+    path('export/', GenExportView.as_view(), name='gen_export_view'),
+]
@@ -1,14 +1,46 @@
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework.views import Request, Response
-from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, ParseError, ValidationError
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework import status
 
-from app_gen.exceptions import FailedDependencyException
-from app_gen.serializers import GENSerializer
-from app_gen.services import GENServices
+from app_gen.analytics import GENAnalytics
+from app_gen.budgets import GENTokenBudget
+from app_gen.cache import CacheMode
+from app_gen.client import GENClient
+from app_gen.exceptions import CircuitOpenException, FailedDependencyException, IdempotencyInFlightException, IdempotencyKeyReusedException, InvalidCacheModeException, InvalidIdempotencyKeyException, ProviderBusyException, QuotaExceededException, SearchUnavailableException
+from app_gen.exports import GENLogExport
+from app_gen.hedging import GENHedge
+from app_gen.history import GENHistory
+from app_gen.idempotency import GENIdempotency
+from app_gen.jobs import GENJobServices
+from app_gen.limiter import GENConcurrencyLimiter
+from app_gen.logwriter import GENLogWriter
+from app_gen.models import ContentGenerationLog, GenerationJob, IdempotencyKey
+from app_gen.quotas import GENQuota
+from app_gen.resilience import GENCircuitBreaker
+from app_gen.routing import GENRouter
+from app_gen.search import GENSearch
+from app_gen.serializers import GENBatchSerializer, GENExportQuerySerializer, GENHistoryQuerySerializer, GENQuotaSerializer, GENSearchQuerySerializer, GENSerializer, GENUsageQuerySerializer
+from app_gen.services import GENData, GENServices
+from app_gen.similarity import GENSimilarCache
 from app_gen.messages import GenMessages
 
+from app_auth.messages import AuthMessages
+from app_users.messages import UserMessages
 from core.messages import CoreMessages
+from core.utils import AsyncJWTAuthentication
 
 import logging
 logger = logging.getLogger(__name__)
@@ -21,6 +53,8 @@ class GenView(APIView):
     the request to `GENServices.generate`. It returns the generated content or a meaningful error response.
 
     Typical use case involves AI-generated outputs such as feedbacks, job descriptions, or development plans.
+    Requests sent with an `Idempotency-Key` header run at most once per key: retries get the stored
+    response (see `GENIdempotency`).
     """
     def post(self, request: Request) -> Response:
         """
@@ -31,24 +65,69 @@ class GenView(APIView):
 
         Returns:
             Response:
-                - 200: Successfully generated content.
-                - 400: Malformed input or validation failure.
+                - 200: Successfully generated content, or replayed for a repeated `Idempotency-Key`.
+                - 400: Malformed input, validation failure, unknown cache mode or invalid `Idempotency-Key`.
+                - 409: A request with the same `Idempotency-Key` is still running; `Retry-After` tells when to retry.
+                - 422: The `Idempotency-Key` was already used with a different payload.
                 - 424: Dependency failure during generation (e.g., external service error).
+                - 429: Generation quota exceeded; `Retry-After` tells when it resets.
                 - 500: Internal server error for unhandled exceptions.
+                - 503: The provider is at capacity and the request could not wait for its turn; `Retry-After` tells when to retry.
         """
+        key = request.headers.get('Idempotency-Key')
+        claim = None
         try:
+            cache_mode = CacheMode.parse(request.query_params.get('cache'))
             serializer = GENSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            payload = GENServices.generate(serializer.validated_data, request.user)
+            if key is not None:
+                fingerprint = GENIdempotency.fingerprint(request.path, request.query_params.get('cache'), request.data)
+                stored = GENIdempotency.begin(request.user, key, fingerprint)
+                if stored.status == IdempotencyKey.Status.COMPLETED:
+                    return Response(stored.response, status=stored.status_code, headers={'Idempotent-Replayed': 'true'})
+                claim = stored
+            GENQuota.check(request.user)
+            payload = GENServices.generate(serializer.validated_data, request.user, cache_mode)
+            if claim is not None:
+                GENIdempotency.complete(claim, status.HTTP_200_OK, payload)
+                claim = None
             return Response(payload, status=status.HTTP_200_OK)
         except ParseError:
             logger.info(CoreMessages.BAD_REQUEST)
             payload = {'message': CoreMessages.BAD_REQUEST}
             return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidCacheModeException:
+            logger.info(GenMessages.INVALID_CACHE_MODE)
+            payload = {'message': GenMessages.INVALID_CACHE_MODE}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
         except ValidationError as e:
             logger.info(e.detail)
             payload = {'message': e.detail}
             return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidIdempotencyKeyException:
+            logger.info(GenMessages.BAD_IDEMPOTENCY_KEY)
+            payload = {'message': GenMessages.BAD_IDEMPOTENCY_KEY}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except IdempotencyInFlightException as e:
+            logger.info(GenMessages.IDEMPOTENCY_IN_FLIGHT)
+            payload = {'message': GenMessages.IDEMPOTENCY_IN_FLIGHT}
+            return Response(payload, status=status.HTTP_409_CONFLICT, headers={'Retry-After': str(e.retry_after)})
+        except IdempotencyKeyReusedException:
+            logger.info(GenMessages.IDEMPOTENCY_KEY_REUSED)
+            payload = {'message': GenMessages.IDEMPOTENCY_KEY_REUSED}
+            return Response(payload, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        except QuotaExceededException as e:
+            logger.info(GenMessages.QUOTA_EXCEEDED)
+            payload = {'message': GenMessages.QUOTA_EXCEEDED}
+            return Response(payload, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+        except ProviderBusyException as e:
+            logger.info(GenMessages.PROVIDER_BUSY)
+            payload = {'message': GenMessages.PROVIDER_BUSY}
+            return Response(payload, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(e.retry_after)})
+        except CircuitOpenException as e:
+            logger.info(GenMessages.CIRCUIT_OPEN)
+            payload = {'message': GenMessages.CIRCUIT_OPEN}
+            return Response(payload, status=status.HTTP_424_FAILED_DEPENDENCY, headers={'Retry-After': str(e.retry_after)})
         except FailedDependencyException:
             logger.info(GenMessages.FAILED_DEPENDENCY)
             payload = {'message': GenMessages.FAILED_DEPENDENCY}
@@ -57,3 +136,590 @@ class GenView(APIView):
             logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
             payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
             return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            if claim is not None:
+                # Failed requests are not replayed: a retry runs again.
+                GENIdempotency.release(claim)
+
+class AsyncGenView(View):
+    """
+    Native async variant of `GenView`, meant to be served through `project.asgi`.
+
+    The OpenAI call and the log write are awaited, so a single ASGI worker can hold hundreds of
+    concurrent generations while login and user CRUD keep being served. Under WSGI the view still
+    works, one request per worker, which keeps `GenView` and this endpoint interchangeable.
+    """
+    serializer_class = GENSerializer
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Exempts the view from CSRF checks, as DRF does for `APIView`, since it authenticates via JWT.
+        """
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        """
+        Processes a POST request to generate content based on validated input data.
+
+        Args:
+            request (HttpRequest): The HTTP request containing the generation payload and a bearer token.
+
+        Returns:
+            HttpResponse:
+                - 200: Successfully generated content.
+                - 400: Malformed input, validation failure or unknown cache mode.
+                - 401: Missing, invalid or expired token.
+                - 424: Dependency failure during generation (e.g., external service error).
+                - 429: Generation quota exceeded; `Retry-After` tells when it resets.
+                - 500: Internal server error for unhandled exceptions.
+                - 503: The provider is at capacity and the request could not wait for its turn; `Retry-After` tells when to retry.
+        """
+        try:
+            user = await AsyncJWTAuthentication.authenticate(request)
+            cache_mode = CacheMode.parse(request.GET.get('cache'))
+            serializer = self.serializer_class(data=json.loads(request.body))
+            serializer.is_valid(raise_exception=True)
+            data = serializer.validated_data
+            await GENQuota.acheck(user, len(data) if isinstance(data, list) else 1)
+            return await self.respond(data, user, cache_mode)
+        except InvalidToken:
+            logger.info(AuthMessages.INVALID_TOKEN)
+            payload = {'message': AuthMessages.INVALID_TOKEN}
+            return JsonResponse(payload, status=status.HTTP_401_UNAUTHORIZED)
+        except (NotAuthenticated, AuthenticationFailed) as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return JsonResponse(payload, status=status.HTTP_401_UNAUTHORIZED)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return JsonResponse(payload, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidCacheModeException:
+            logger.info(GenMessages.INVALID_CACHE_MODE)
+            payload = {'message': GenMessages.INVALID_CACHE_MODE}
+            return JsonResponse(payload, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return JsonResponse(payload, status=status.HTTP_400_BAD_REQUEST)
+        except QuotaExceededException as e:
+            logger.info(GenMessages.QUOTA_EXCEEDED)
+            payload = {'message': GenMessages.QUOTA_EXCEEDED}
+            return JsonResponse(payload, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+        except ProviderBusyException as e:
+            logger.info(GenMessages.PROVIDER_BUSY)
+            payload = {'message': GenMessages.PROVIDER_BUSY}
+            return JsonResponse(payload, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(e.retry_after)})
+        except CircuitOpenException as e:
+            logger.info(GenMessages.CIRCUIT_OPEN)
+            payload = {'message': GenMessages.CIRCUIT_OPEN}
+            return JsonResponse(payload, status=status.HTTP_424_FAILED_DEPENDENCY, headers={'Retry-After': str(e.retry_after)})
+        except FailedDependencyException:
+            logger.info(GenMessages.FAILED_DEPENDENCY)
+            payload = {'message': GenMessages.FAILED_DEPENDENCY}
+            return JsonResponse(payload, status=status.HTTP_424_FAILED_DEPENDENCY)
+        except Exception as e:
+            # The DB log handler is synchronous, so it must not run on the event loop.
+            await sync_to_async(logger.critical)(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=e, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return JsonResponse(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def respond(self, data: GENData, user: User, cache_mode: CacheMode) -> HttpResponse:
+        """
+        Runs the generation and builds the success response; subclasses change the delivery format.
+
+        Args:
+            data (GENData): Validated generation input.
+            user (User): The authenticated user.
+            cache_mode (CacheMode): Requested cache behaviour.
+
+        Returns:
+            HttpResponse: JSON body with the generated content.
+        """
+        payload = await GENServices.agenerate(data, user, cache_mode)
+        return JsonResponse(payload, status=status.HTTP_200_OK)
+
+class StreamGenView(AsyncGenView):
+    """
+    Streams generated content as Server-Sent Events.
+
+    Accepts the same payload as `GenView` but answers with `text/event-stream`: one `delta` event per
+    token chunk, then a `done` event with the usual metadata (or an `error` event if the provider fails
+    mid-stream). The first bytes reach the client as soon as the model starts answering. Requires
+    ASGI to actually stream; under WSGI the events are buffered until the end.
+    """
+    async def respond(self, data: GENData, user: User, cache_mode: CacheMode) -> HttpResponse:
+        """
+        Opens the provider stream and relays it through a streaming response.
+
+        Args:
+            data (GENData): Validated generation input.
+            user (User): The authenticated user.
+            cache_mode (CacheMode): Requested cache behaviour.
+
+        Returns:
+            HttpResponse: `text/event-stream` response fed by the provider stream.
+        """
+        events = await GENServices.astream(data, user, cache_mode)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        # Keep proxies (nginx/ingress) from buffering or caching the event stream.
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class BatchGenView(AsyncGenView):
+    """
+    Generates several documents in a single request.
+
+    Expects `{"items": [...]}` where each item follows the `GenView` payload. Items are sent to the
+    provider concurrently, up to a configured limit, and answered in input order; an item whose
+    generation fails is reported individually with status 424 instead of failing the whole batch,
+    or 503 when the provider is at capacity.
+    """
+    serializer_class = GENBatchSerializer
+
+    async def respond(self, data: list[GENData], user: User, cache_mode: CacheMode) -> HttpResponse:
+        """
+        Runs the batch and returns the per-item results.
+
+        Args:
+            data (list[GENData]): Validated generation inputs.
+            user (User): The authenticated user.
+            cache_mode (CacheMode): Requested cache behaviour, applied to every item.
+
+        Returns:
+            HttpResponse: JSON body with a `results` list in input order.
+        """
+        results = await GENServices.agenerate_batch(data, user, cache_mode)
+        return JsonResponse({'results': results}, status=status.HTTP_200_OK)
+
+class GenJobsView(APIView):
+    """
+    Queues content generation requests for background processing.
+
+    Accepts the same payload as `GenView` but returns immediately with a job id, which is then
+    polled through `GenJobView`. Suited to long generations that would otherwise hit proxy timeouts.
+    """
+    def post(self, request: Request) -> Response:
+        """
+        Validates the payload and queues a generation job.
+
+        Args:
+            request (Request): The HTTP request containing the generation payload.
+
+        Returns:
+            Response:
+                - 202: Job queued; body holds `job_id` and `status`.
+                - 400: Malformed input, validation failure or unknown cache mode.
+                - 429: Generation quota exceeded; `Retry-After` tells when it resets.
+                - 500: Internal server error for unhandled exceptions.
+        """
+        try:
+            cache_mode = CacheMode.parse(request.query_params.get('cache'))
+            serializer = GENSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            GENQuota.check(request.user)
+            payload = GENJobServices.submit(serializer.validated_data, request.user, cache_mode)
+            return Response(payload, status=status.HTTP_202_ACCEPTED)
+        except ParseError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidCacheModeException:
+            logger.info(GenMessages.INVALID_CACHE_MODE)
+            payload = {'message': GenMessages.INVALID_CACHE_MODE}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except QuotaExceededException as e:
+            logger.info(GenMessages.QUOTA_EXCEEDED)
+            payload = {'message': GenMessages.QUOTA_EXCEEDED}
+            return Response(payload, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenJobView(APIView):
+    """
+    Reports the status and, once finished, the result of a queued generation job.
+    """
+    def get(self, request: Request, job_id: str) -> Response:
+        """
+        Retrieves a job owned by the requesting user.
+
+        Args:
+            request (Request): The HTTP request.
+            job_id (str): Id returned when the job was queued. String is due to URL routing.
+
+        Returns:
+            Response:
+                - 200: Job found; `result` is present once it succeeded, `message` once it failed.
+                - 400: Malformed job id.
+                - 404: Job not found.
+                - 500: Internal error.
+        """
+        try:
+            payload = GENJobServices.get_job(uuid.UUID(job_id), request.user)
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValueError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except GenerationJob.DoesNotExist:
+            logger.info(GenMessages.JOB_NOT_FOUND)
+            payload = {'message': GenMessages.JOB_NOT_FOUND}
+            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenHistoryView(APIView):
+    """
+    Lists the generations of the requesting user, newest first, one keyset page at a time.
+
+    Only metadata is listed; the prompt and response texts of a generation are returned by
+    `GenHistoryItemView`.
+    """
+    def get(self, request: Request) -> Response:
+        """
+        Returns a page of the user's generations.
+
+        Args:
+            request (Request): The HTTP request; query parameters are described by `GENHistoryQuerySerializer`.
+
+        Returns:
+            Response:
+                - 200: `results` and the `next_cursor` of the following page (null on the last one).
+                - 400: Invalid page size or cursor.
+                - 500: Internal error.
+        """
+        try:
+            serializer = GENHistoryQuerySerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            payload = GENHistory.page(request.user, serializer.validated_data)
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenHistoryItemView(APIView):
+    """
+    Returns a single generation of the requesting user, including its prompt and response texts.
+    """
+    def get(self, request: Request, log_id: str) -> Response:
+        """
+        Retrieves a generation owned by the requesting user.
+
+        Args:
+            request (Request): The HTTP request.
+            log_id (str): Id listed by `GenHistoryView`. String is due to URL routing.
+
+        Returns:
+            Response:
+                - 200: Generation found.
+                - 400: Malformed id.
+                - 404: Generation not found.
+                - 500: Internal error.
+        """
+        try:
+            payload = GENHistory.get(request.user, int(log_id))
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValueError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except ContentGenerationLog.DoesNotExist:
+            logger.info(GenMessages.GENERATION_NOT_FOUND)
+            payload = {'message': GenMessages.GENERATION_NOT_FOUND}
+            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenSearchView(APIView):
+    """
+    Full-text search over the generations of the requesting user, best matches first.
+
+    Backed by the `search_vector` column and its GIN index (see `GENSearch`); each result carries
+    a highlighted snippet of its response.
+    """
+    def get(self, request: Request) -> Response:
+        """
+        Searches the user's generations.
+
+        Args:
+            request (Request): The HTTP request; query parameters are described by `GENSearchQuerySerializer`.
+
+        Returns:
+            Response:
+                - 200: `results`, ranked, with their `snippet`.
+                - 400: Missing query or invalid limit.
+                - 501: The database does not support full-text search.
+                - 500: Internal error.
+        """
+        try:
+            serializer = GENSearchQuerySerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            payload = {'results': GENSearch.search(request.user, serializer.validated_data)}
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except SearchUnavailableException:
+            logger.info(GenMessages.NO_SEARCH)
+            payload = {'message': GenMessages.NO_SEARCH}
+            return Response(payload, status=status.HTTP_501_NOT_IMPLEMENTED)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenStatsView(APIView):
+    """
+    Exposes operational counters of the generation service for the current worker process.
+
+    Restricted to staff users; each worker keeps its own counters, so repeated calls may be
+    answered by different processes.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        """
+        Returns the generation service counters.
+
+        Args:
+            request (Request): The HTTP request.
+
+        Returns:
+            Response:
+                - 200: Counters of this worker process.
+                - 500: Internal error.
+        """
+        try:
+            payload = {
+                'client': GENClient.stats(),
+                'circuit': GENCircuitBreaker.state(),
+                'log_writer': GENLogWriter.stats(),
+                'similar_cache': GENSimilarCache.stats(),
+                'router': GENRouter.stats(),
+                'hedging': GENHedge.stats(),
+                'token_budget': GENTokenBudget.stats(),
+                'provider_limiter': GENConcurrencyLimiter.stats(),
+            }
+            return Response(payload, status=status.HTTP_200_OK)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenQuotaView(APIView):
+    """
+    Lets staff users inspect and configure the generation quota of a user.
+
+    - `GET`: Returns the user's overrides, effective limits and current usage.
+    - `PUT`: Replaces the user's overrides; omitted or null limits use the defaults.
+    - `DELETE`: Removes the user's overrides.
+
+    Other workers apply a change within `GEN_QUOTA_CACHE_SECONDS`.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request, user_id: str) -> Response:
+        """
+        Retrieves a user's quota and usage.
+
+        Args:
+            request (Request): The HTTP request.
+            user_id (str): ID of the user. String is due to URL routing.
+
+        Returns:
+            Response:
+                - 200: The user's quota.
+                - 400: Malformed user ID.
+                - 404: User not found.
+                - 500: Internal error.
+        """
+        try:
+            payload = GENQuota.describe(int(user_id))
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValueError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except User.DoesNotExist:
+            logger.info(UserMessages.USER_NOT_FOUND)
+            payload = {'message': UserMessages.USER_NOT_FOUND}
+            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def put(self, request: Request, user_id: str) -> Response:
+        """
+        Replaces a user's quota overrides.
+
+        Args:
+            request (Request): The HTTP request with the limits.
+            user_id (str): ID of the user. String is due to URL routing.
+
+        Returns:
+            Response:
+                - 200: The updated quota.
+                - 400: Malformed user ID or validation failure.
+                - 404: User not found.
+                - 500: Internal error.
+        """
+        try:
+            serializer = GENQuotaSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            payload = GENQuota.set_limits(int(user_id), serializer.validated_data)
+            return Response(payload, status=status.HTTP_200_OK)
+        except ParseError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except User.DoesNotExist:
+            logger.info(UserMessages.USER_NOT_FOUND)
+            payload = {'message': UserMessages.USER_NOT_FOUND}
+            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def delete(self, request: Request, user_id: str) -> Response:
+        """
+        Removes a user's quota overrides.
+
+        Args:
+            request (Request): The HTTP request.
+            user_id (str): ID of the user. String is due to URL routing.
+
+        Returns:
+            Response:
+                - 200: The quota, now with the default limits.
+                - 400: Malformed user ID.
+                - 404: User not found.
+                - 500: Internal error.
+        """
+        try:
+            payload = GENQuota.reset_limits(int(user_id))
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValueError:
+            logger.info(CoreMessages.BAD_REQUEST)
+            payload = {'message': CoreMessages.BAD_REQUEST}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except User.DoesNotExist:
+            logger.info(UserMessages.USER_NOT_FOUND)
+            payload = {'message': UserMessages.USER_NOT_FOUND}
+            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenUsageView(APIView):
+    """
+    Reports generation usage (requests, cache hits and tokens) by user, model and period.
+
+    Backed by the `UsageRollup` tables maintained by `GENAnalytics`, so even a year of history is
+    answered from a few thousand narrow rows. Restricted to staff users.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        """
+        Aggregates usage over the requested range of days.
+
+        Args:
+            request (Request): The HTTP request; query parameters are described by `GENUsageQuerySerializer`.
+
+        Returns:
+            Response:
+                - 200: Usage rows, one per group.
+                - 400: Invalid range, granularity, filter or grouping.
+                - 500: Internal error.
+        """
+        try:
+            serializer = GENUsageQuerySerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            query = serializer.validated_data
+            payload = {
+                'start': query.start,
+                'end': query.end,
+                'granularity': query.granularity,
+                'results': GENAnalytics.summary(query),
+            }
+            return Response(payload, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class GenExportView(APIView):
+    """
+    Streams generation logs as NDJSON or CSV, optionally gzipped, for compliance exports.
+
+    Rows come from a server-side cursor and are encoded as they arrive (see `GENLogExport`), so
+    exports of any size keep the worker's memory flat. Restricted to staff users.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> HttpResponse:
+        """
+        Exports the logs matching the query parameters as a file download.
+
+        Args:
+            request (Request): The HTTP request; query parameters are described by `GENExportQuerySerializer`.
+
+        Returns:
+            HttpResponse:
+                - 200: Streamed export, as an attachment.
+                - 400: Invalid range, user, format or compression.
+                - 500: Internal error.
+        """
+        try:
+            serializer = GENExportQuerySerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            query = serializer.validated_data
+            content_type = 'application/gzip' if query.compress else GENLogExport.CONTENT_TYPES[query.format]
+            # ASGI would read a synchronous iterator whole before sending it.
+            chunks = GENLogExport.astream(query) if isinstance(request._request, ASGIRequest) else GENLogExport.stream(query)
+            response = StreamingHttpResponse(chunks, content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="{GENLogExport.filename(query)}"'
+            return response
+        except ValidationError as e:
+            logger.info(e.detail)
+            payload = {'message': e.detail}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            logger.critical(CoreMessages.INTERNAL_SERVER_ERROR, exc_info=True, extra={'request': request})
+            payload = {'message': CoreMessages.INTERNAL_SERVER_ERROR}
+            return Response(payload, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
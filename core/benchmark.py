@@ -0,0 +1,316 @@
+import asyncio
+import io
+import json
+import secrets
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+@dataclass(slots=True, frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: str
+    body: dict | None = None
+    as_admin: bool = False      # authenticate as the staff user (otherwise as a regular user)
+    anonymous: bool = False     # send no token at all
+
+@dataclass(slots=True)
+class ScenarioResult:
+    interface: str
+    scenario: str
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    duration: float = 0.0
+    queries: int = 0
+
+    def summary(self) -> dict:
+        """
+        Returns the percentiles, throughput and query count of the run.
+        """
+        latencies = sorted(self.latencies)
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        requests = len(latencies)
+        return {
+            "interface": self.interface,
+            "scenario": self.scenario,
+            "requests": requests,
+            "errors": sum(count for status, count in self.statuses.items() if status >= 400),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "throughput": round(requests / self.duration, 2) if self.duration else 0.0,
+            "p50_ms": round(cuts[49] * 1000, 1),
+            "p95_ms": round(cuts[94] * 1000, 1),
+            "p99_ms": round(cuts[98] * 1000, 1),
+            "queries_per_request": round(self.queries / requests, 2) if requests else 0.0,
+        }
+
+class QueryCounter:
+    """
+    Counts the SQL statements executed on every database connection, from any thread.
+
+    Django keeps one connection per thread, so the counter hooks each connection as it is
+    created (and the ones already open in the calling thread).
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "QueryCounter":
+        connection_created.connect(self._on_connection_created)
+        for connection in connections.all():
+            self._hook(connection)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        connection_created.disconnect(self._on_connection_created)
+
+    def _on_connection_created(self, sender, connection, **kwargs) -> None:
+        self._hook(connection)
+
+    def _hook(self, connection) -> None:
+        if self._wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self._wrapper)
+
+    def _wrapper(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+class APIBenchmark:
+    """
+    In-process load test of the API through its real WSGI and ASGI entry points.
+
+    Each scenario sends `requests` requests, at most `concurrency` at a time, through
+    `project.wsgi.application` (one thread per in-flight request, as a threaded WSGI server does)
+    and/or `project.asgi.application` (one task per in-flight request on a single event loop).
+    Requests go through the whole middleware stack but skip the network, so results measure the
+    application and its database, not the HTTP server. Generation scenarios call the provider,
+    which should be `run_fake_provider` (see `OPENAI_BASE_URL`) rather than OpenAI.
+
+    A staff and a regular user are created for the run and deleted, with their logs, afterwards;
+    run it against a development or staging database.
+    """
+    #: Request body of the generation scenarios.
+    _GENERATION_BODY: dict = {
+        "title": "Geração de competências ideais",
+        "objective": "Liste 10 competências com breve resumo para o cargo informado.",
+        "data": "cargo: Engenheiro de Produção, nível: Pleno, perfil empresa: Indústria metalúrgica",
+        "return_format": "markdown com até 500 caracteres",
+    }
+
+    def __init__(self, requests: int, concurrency: int) -> None:
+        self.requests = requests
+        self.concurrency = concurrency
+        self._password = secrets.token_urlsafe(16)
+        self._host = next((host for host in settings.ALLOWED_HOSTS if host and "*" not in host), "localhost").lstrip(".")
+        self._tokens: dict[str, str] = {}
+
+    @classmethod
+    def scenarios(cls) -> dict[str, Scenario]:
+        """
+        Returns the available scenarios, by name.
+        """
+        # `cache=bypass` so every generation reaches the (fake) provider.
+        return {
+            "login": Scenario("login", "POST", "/v1/api/auth/login/", anonymous=True),
+            "users": Scenario("users", "GET", "/v1/api/users/", as_admin=True),
+            "generation": Scenario("generation", "POST", "/v1/api/generation/?cache=bypass", cls._GENERATION_BODY),
+            "generation-async": Scenario("generation-async", "POST", "/v1/api/generation/async/?cache=bypass", cls._GENERATION_BODY),
+        }
+
+    def run(self, interfaces: list[str], names: list[str]) -> list[dict]:
+        """
+        Runs the selected scenarios on the selected interfaces.
+
+        Args:
+            interfaces (list[str]): "wsgi" and/or "asgi".
+            names (list[str]): Scenario names, see `scenarios`.
+
+        Returns:
+            list[dict]: One summary per interface and scenario.
+        """
+        from project.asgi import application as asgi_application
+        from project.wsgi import application as wsgi_application
+
+        suffix = secrets.token_hex(4)
+        admin = User.objects.create_user(f"bench-admin-{suffix}", password=self._password, is_staff=True)
+        user = User.objects.create_user(f"bench-user-{suffix}", password=self._password)
+        try:
+            summaries: list[dict] = []
+            for interface in interfaces:
+                for name in names:
+                    scenario = self.scenarios()[name]
+                    if scenario.name == "login":
+                        scenario = Scenario(
+                            "login", "POST", scenario.path, {"username": user.username, "password": self._password}, anonymous=True,
+                        )
+                    if not self._tokens:
+                        self._tokens = {
+                            "admin": self._login(wsgi_application, admin.username),
+                            "user": self._login(wsgi_application, user.username),
+                        }
+                    if interface == "wsgi":
+                        result = self._run_wsgi(wsgi_application, scenario)
+                    else:
+                        result = self._run_asgi(asgi_application, scenario)
+                    summaries.append(result.summary())
+            return summaries
+        finally:
+            User.objects.filter(pk__in=[admin.pk, user.pk]).delete()
+
+    def _login(self, application, username: str) -> str:
+        """
+        Obtains an access token through the login endpoint.
+        """
+        scenario = Scenario("login", "POST", "/v1/api/auth/login/", {"username": username, "password": self._password}, anonymous=True)
+        status, body = self._call_wsgi(application, scenario)
+        if status != 200:
+            raise RuntimeError(f"Benchmark login failed with status {status}: {body!r}")
+        return json.loads(body)["access_token"]
+
+    def _headers(self, scenario: Scenario) -> dict[str, str]:
+        """
+        Returns the Authorization header of a scenario, if any.
+        """
+        if scenario.anonymous:
+            return {}
+        return {"Authorization": f"Bearer {self._tokens['admin' if scenario.as_admin else 'user']}"}
+
+    def _run_wsgi(self, application, scenario: Scenario) -> ScenarioResult:
+        """
+        Sends the scenario's requests through the WSGI application from a pool of threads.
+        """
+        result = ScenarioResult("wsgi", scenario.name)
+
+        def call() -> None:
+            started = time.perf_counter()
+            status, _ = self._call_wsgi(application, scenario)
+            elapsed = time.perf_counter() - started
+            with lock:
+                result.latencies.append(elapsed)
+                result.statuses[status] += 1
+
+        lock = threading.Lock()
+        with QueryCounter() as counter, ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            started = time.perf_counter()
+            for future in [pool.submit(call) for _ in range(self.requests)]:
+                future.result()
+            result.duration = time.perf_counter() - started
+        result.queries = counter.count
+        return result
+
+    def _call_wsgi(self, application, scenario: Scenario) -> tuple[int, bytes]:
+        """
+        Sends one request through a WSGI application.
+        """
+        path, _, query = scenario.path.partition("?")
+        payload = json.dumps(scenario.body).encode("utf-8") if scenario.body is not None else b""
+        environ = {
+            "REQUEST_METHOD": scenario.method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": self._host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": self._host,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": io.BytesIO(payload),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.url_scheme": "http",
+            "wsgi.version": (1, 0),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in self._headers(scenario).items():
+            environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+
+        status: list[int] = []
+
+        def start_response(status_line: str, headers: list, exc_info=None) -> None:
+            status.append(int(status_line.split(" ", 1)[0]))
+
+        response = application(environ, start_response)
+        try:
+            body = b"".join(response)
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+        return status[0], body
+
+    def _run_asgi(self, application, scenario: Scenario) -> ScenarioResult:
+        """
+        Sends the scenario's requests through the ASGI application from concurrent tasks.
+        """
+        result = ScenarioResult("asgi", scenario.name)
+
+        async def main() -> None:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def call() -> None:
+                async with semaphore:
+                    started = time.perf_counter()
+                    status = await self._call_asgi(application, scenario)
+                    result.latencies.append(time.perf_counter() - started)
+                    result.statuses[status] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(call() for _ in range(self.requests)))
+            result.duration = time.perf_counter() - started
+
+        with QueryCounter() as counter:
+            asyncio.run(main())
+        result.queries = counter.count
+        return result
+
+    async def _call_asgi(self, application, scenario: Scenario) -> int:
+        """
+        Sends one request through an ASGI application.
+        """
+        path, _, query = scenario.path.partition("?")
+        payload = json.dumps(scenario.body).encode("utf-8") if scenario.body is not None else b""
+        headers = [
+            (b"host", self._host.encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ] + [(name.lower().encode(), value.encode()) for name, value in self._headers(scenario).items()]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": scenario.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": (self._host, 80),
+        }
+        sent = False
+        status: list[int] = []
+
+        async def receive() -> dict:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # Wait like a client that keeps the connection open.
+            await asyncio.Event().wait()
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await application(scope, receive, send)
+        return status[0]
@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after the app registry is ready.
+from app_gen.lifespan import lifespan  # noqa: E402
+
+application = lifespan(django_application)
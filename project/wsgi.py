@@ -13,3 +13,8 @@ from dj_static import Cling
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 application = Cling(get_wsgi_application())
+
+# Imported after the app registry is ready; pays the OpenAI TLS handshake at worker boot.
+from app_gen.client import GENClient  # noqa: E402
+
+GENClient.warm_up()
@@ -1,4 +1,4 @@
 python -m venv antenv
 source antenv/bin/activate
 pip install -r requirements.txt
-gunicorn project.wsgi --bind=0.0.0.0 --timeout 600
+gunicorn project.asgi -k uvicorn.workers.UvicornWorker --bind=0.0.0.0 --timeout 600